@@ -1,27 +1,29 @@
-import psycopg2
+import io
 import os
-import smtplib
-from email.mime.text import MIMEText
+import csv
 import json
-from email.mime.multipart import MIMEMultipart
+import base64
 from datetime import datetime
 import logging
 import hashlib # --- CORREÇÃO: Importado para hashear a senha ---
+from psycopg2.extras import execute_values
+from comum.db import obter_conexao, liberar_conexao
+from comum.roteador import Roteador
+from comum.outbox import SQL_ENFILEIRAR_EMAIL, parametros_email, enfileirar_emails
+from comum.autenticacao import NaoAutorizado, escopo_empresa
+from comum.paginacao import (
+    CursorInvalido, ler_parametros, buscar_pagina, contar_total, cabecalhos_paginacao
+)
 
 # --- MELHORIA: Configuração do Logger no início ---
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-DB_HOST = os.environ.get('DB_HOST', 'localhost')
-DB_NAME = os.environ.get('DB_NAME', 'onboarding')
-DB_USER = os.environ.get('DB_USER', 'postgres')
-DB_PASS = os.environ.get('DB_PASS', 'postgres')
-DB_PORT = '5432'
-
-EMAIL_HOST = 'smtp.gmail.com'
-EMAIL_USER = os.environ.get('EMAIL_USER')
-EMAIL_PASS = os.environ.get('EMAIL_PASS')
-EMAIL_PORT = 587
+# Máximo de linhas aceitas por POST /candidatos/bulk
+CANDIDATOS_BULK_MAXIMO = int(os.environ.get('CANDIDATOS_BULK_MAXIMO', '5000'))
+CAMPOS_CANDIDATO = ('nome', 'email', 'cpf', 'telefone', 'estado', 'vaga', 'sexo', 'empresa')
+# Máximo de documentos por aprovação/reprovação em lote
+DOCUMENTOS_LOTE_MAXIMO = int(os.environ.get('DOCUMENTOS_LOTE_MAXIMO', '500'))
 
 def gerar_senha(cpf):
     cpf_numeros = ''.join(filter(str.isdigit, cpf))
@@ -32,104 +34,747 @@ def gerar_senha(cpf):
 # --- MELHORIA: Função para hashear a senha ---
 def hash_senha(senha: str) -> str:
     return hashlib.sha256(senha.encode()).hexdigest()
+
+
+roteador = Roteador('candidatos')
+
+
+# POST /candidatos
+@roteador.rota('POST', '/candidatos')
+def criar_candidato(event, data, conn, cur):
+    nome = data.get('nome')
+    email = data.get('email')
+    cpf = data.get('cpf')
+    telefone = data.get('telefone')
+    estado = data.get('estado')
+    vaga = data.get('vaga')
+    sexo = data.get('sexo')
+    empresa = data.get('empresa')
+
+    if not all([nome, email, cpf, empresa]):
+        return {'statusCode': 400, 'body': json.dumps({'error': 'nome, email, cpf e empresa são obrigatórios'})}
+
+    senha_plana = gerar_senha(cpf)
+    # --- CORREÇÃO DE SEGURANÇA: Hasheando a senha ---
+    senha_hash = hash_senha(senha_plana)
+
+    # Candidato, usuário (role 'candidato') e e-mail de boas-vindas num único
+    # comando: CTEs que modificam dados rodam mesmo sem serem referenciadas, e
+    # uma violação em qualquer INSERT desfaz os três. A Lambda envio-emails
+    # faz o envio SMTP fora da requisição
+    logger.info(f"Criando candidato e registro correspondente na tabela 'usuarios' para o e-mail {email}")
+    role_candidato = 'candidato'
+    cur.execute(
+        f'''
+        WITH candidato AS (
+            INSERT INTO candidatos (nome, email, cpf, senha, telefone, estado, vaga, sexo, situacao, empresa)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            RETURNING id
+        ), usuario AS (
+            INSERT INTO usuarios (nome, email, senha, role, empresa) VALUES (%s, %s, %s, %s, %s)
+        ), email AS (
+            {SQL_ENFILEIRAR_EMAIL}
+        )
+        SELECT id FROM candidato
+        ''',
+        (
+            nome, email, cpf, senha_hash, telefone, estado, vaga, sexo, 'Pendente', empresa,
+            nome, email, senha_hash, role_candidato, empresa,
+            *parametros_email(email, 'boas_vindas_candidato', {'nome_candidato': nome, 'usuario': email})
+        )
+    )
+    candidato_id = cur.fetchone()[0]
+    conn.commit()
+
+    return {
+        'statusCode': 201, 'body': json.dumps({'id': candidato_id, 'email': email}),
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
+    }
+
+
+def eh_csv(event):
+    headers = event.get('headers') or {}
+    content_type = next((v for k, v in headers.items() if k.lower() == 'content-type'), None) or ''
+    return 'csv' in content_type.lower()
+
+
+def ler_linhas_bulk(event, data):
+    """
+    Linhas do POST /candidatos/bulk: array JSON, {"candidatos": [...]} ou CSV
+    (Content-Type text/csv, com cabeçalho; separador vírgula ou ponto e vírgula).
+    """
+    if eh_csv(event):
+        corpo = event.get('body') or ''
+        if event.get('isBase64Encoded', False):
+            corpo = base64.b64decode(corpo).decode('utf-8-sig')
+        elif corpo.startswith('\ufeff'):
+            corpo = corpo[1:]
+        cabecalho = corpo.split('\n', 1)[0]
+        delimitador = ';' if cabecalho.count(';') > cabecalho.count(',') else ','
+        leitor = csv.DictReader(io.StringIO(corpo), delimiter=delimitador)
+        return [{(k or '').strip().lower(): v for k, v in linha.items()} for linha in leitor]
+
+    linhas = data.get('candidatos') if isinstance(data, dict) else data
+    if not isinstance(linhas, list):
+        raise ValueError('Envie um array JSON de candidatos, {"candidatos": [...]} ou um CSV.')
+    return linhas
+
+
+def validar_linha_bulk(linha, empresa_padrao):
+    """Retorna (candidato, None) com a senha já gerada e hasheada, ou (None, erro)."""
+    if not isinstance(linha, dict):
+        return None, 'linha deve ser um objeto'
+    candidato = {campo: (str(linha[campo]).strip() or None) if linha.get(campo) is not None else None
+                 for campo in CAMPOS_CANDIDATO}
+    candidato['empresa'] = candidato['empresa'] or empresa_padrao
+    faltando = [campo for campo in ('nome', 'email', 'cpf', 'empresa') if not candidato[campo]]
+    if faltando:
+        return None, f"campos obrigatórios ausentes: {', '.join(faltando)}"
+    try:
+        candidato['senha'] = hash_senha(gerar_senha(candidato['cpf']))
+    except ValueError as e:
+        return None, str(e)
+    return candidato, None
+
+
+# POST /candidatos/bulk - Cadastro em lote (turmas inteiras de contratação)
+@roteador.rota('POST', '/candidatos/bulk')
+def criar_candidatos_bulk(event, data, conn, cur):
+    """
+    Valida todas as linhas numa passada e insere candidatos, usuários e e-mails
+    de boas-vindas com INSERTs em lote, numa única transação. Linhas inválidas
+    ou já cadastradas (e-mail ou CPF) voltam em 'erros' sem abortar o lote.
+    """
+    headers_resposta = {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
+    try:
+        linhas = ler_linhas_bulk(event, data)
+    except (ValueError, csv.Error) as e:
+        return {'statusCode': 400, 'body': json.dumps({'error': str(e)}), 'headers': headers_resposta}
+    if len(linhas) > CANDIDATOS_BULK_MAXIMO:
+        return {
+            'statusCode': 413,
+            'body': json.dumps({'error': f'Máximo de {CANDIDATOS_BULK_MAXIMO} candidatos por requisição.'}),
+            'headers': headers_resposta
+        }
+
+    query_params = event.get('queryStringParameters') or {}
+    empresa_padrao = query_params.get('empresa') or (data.get('empresa') if isinstance(data, dict) else None)
+
+    erros = []
+    validos = []  # (numero da linha, candidato)
+    emails_vistos, cpfs_vistos = set(), set()
+    for numero, linha in enumerate(linhas, start=1):
+        candidato, erro = validar_linha_bulk(linha, empresa_padrao)
+        if candidato:
+            email_normalizado = candidato['email'].lower()
+            if email_normalizado in emails_vistos:
+                erro = 'email repetido no lote'
+            elif candidato['cpf'] in cpfs_vistos:
+                erro = 'cpf repetido no lote'
+        if erro:
+            email = linha.get('email') if isinstance(linha, dict) else None
+            erros.append({'linha': numero, 'email': email, 'error': erro})
+            continue
+        emails_vistos.add(email_normalizado)
+        cpfs_vistos.add(candidato['cpf'])
+        validos.append((numero, candidato))
+
+    # Já cadastrados: uma consulta para o lote inteiro em vez de uma por linha
+    ja_cadastrados = {}
+    if validos:
+        emails = [c['email'] for _, c in validos]
+        cpfs = [c['cpf'] for _, c in validos]
+        cur.execute(
+            '''
+            SELECT email, cpf FROM candidatos WHERE email = ANY(%s) OR cpf = ANY(%s)
+            ''',
+            (emails, cpfs)
+        )
+        for email, cpf in cur.fetchall():
+            ja_cadastrados[('email', email)] = 'email já cadastrado'
+            ja_cadastrados[('cpf', cpf)] = 'cpf já cadastrado'
+        cur.execute('SELECT email FROM usuarios WHERE email = ANY(%s)', (emails,))
+        for (email,) in cur.fetchall():
+            ja_cadastrados.setdefault(('email', email), 'email já cadastrado em usuarios')
+
+    a_inserir = []
+    for numero, candidato in validos:
+        erro = ja_cadastrados.get(('email', candidato['email'])) or ja_cadastrados.get(('cpf', candidato['cpf']))
+        if erro:
+            erros.append({'linha': numero, 'email': candidato['email'], 'error': erro})
+        else:
+            a_inserir.append((numero, candidato))
+
+    criados = []
+    if a_inserir:
+        # ON CONFLICT DO NOTHING: um cadastro concorrente entre a consulta acima
+        # e o INSERT vira erro da linha, não do lote
+        inseridos = execute_values(
+            cur,
+            '''
+            INSERT INTO candidatos (nome, email, cpf, senha, telefone, estado, vaga, sexo, situacao, empresa)
+            VALUES %s
+            ON CONFLICT DO NOTHING
+            RETURNING id, email
+            ''',
+            [
+                (c['nome'], c['email'], c['cpf'], c['senha'], c['telefone'], c['estado'], c['vaga'], c['sexo'],
+                 'Pendente', c['empresa'])
+                for _, c in a_inserir
+            ],
+            page_size=1000,
+            fetch=True
+        )
+        ids = {email: candidato_id for candidato_id, email in inseridos}
+
+        novos = [(numero, c) for numero, c in a_inserir if c['email'] in ids]
+        usuarios_inseridos = set()
+        if novos:
+            usuarios_inseridos = {
+                row[0] for row in execute_values(
+                    cur,
+                    'INSERT INTO usuarios (nome, email, senha, role, empresa) VALUES %s ON CONFLICT DO NOTHING RETURNING email',
+                    [(c['nome'], c['email'], c['senha'], 'candidato', c['empresa']) for _, c in novos],
+                    page_size=1000,
+                    fetch=True
+                )
+            }
+            # Candidato sem o usuário correspondente (e-mail criado em usuarios
+            # por outra requisição nesse meio tempo) não fica pela metade
+            sem_usuario = [ids[c['email']] for _, c in novos if c['email'] not in usuarios_inseridos]
+            if sem_usuario:
+                cur.execute('DELETE FROM candidatos WHERE id = ANY(%s)', (sem_usuario,))
+
+        for numero, c in a_inserir:
+            if c['email'] in usuarios_inseridos:
+                criados.append({'linha': numero, 'id': ids[c['email']], 'email': c['email']})
+            elif c['email'] in ids:
+                erros.append({'linha': numero, 'email': c['email'], 'error': 'email já cadastrado em usuarios'})
+            else:
+                erros.append({'linha': numero, 'email': c['email'], 'error': 'email ou cpf já cadastrado'})
+
+        enfileirar_emails(cur, [
+            (c['email'], 'boas_vindas_candidato', {'nome_candidato': c['nome'], 'usuario': c['email']})
+            for numero, c in a_inserir if c['email'] in usuarios_inseridos
+        ])
+
+    conn.commit()
+    erros.sort(key=lambda e: e['linha'])
+    logger.info(f"Cadastro em lote: {len(linhas)} linha(s), {len(criados)} criado(s), {len(erros)} erro(s)")
+
+    return {
+        'statusCode': 200,
+        'body': json.dumps({
+            'total': len(linhas),
+            'criados': len(criados),
+            'com_erro': len(erros),
+            'candidatos': criados,
+            'erros': erros,
+        }),
+        'headers': headers_resposta
+    }
+
+
+# GET /candidatos
+@roteador.rota('GET', '/candidatos')
+def listar_candidatos(event, data, conn, cur):
+    # A empresa vem do token quando o usuário não tem acesso global
+    empresa_para_filtrar = escopo_empresa(event, data.get('empresa'))
+
+    try:
+        limite, chave, incluir_total = ler_parametros(event.get('queryStringParameters'), (int,))
+    except CursorInvalido as e:
+        return {
+            'statusCode': 400, 'body': json.dumps({'error': str(e)}),
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
+        }
+    
+    # --- CORREÇÃO: Adicionada a coluna 'empresa' no SELECT ---
+    sql_query = 'SELECT id, nome, email, situacao, estado, vaga, telefone, sexo, empresa FROM candidatos'
+    params = []
+    conditions = []
+    
+    if empresa_para_filtrar:
+        conditions.append('empresa = %s')
+        params.append(empresa_para_filtrar)
+
+    total = None
+    if incluir_total:
+        sql_contagem = 'SELECT COUNT(*) FROM candidatos'
+        if conditions:
+            sql_contagem += ' WHERE ' + ' AND '.join(conditions)
+        total = contar_total(cur, sql_contagem, params)
+
+    # Paginação por chave: continua a partir do último id da página anterior
+    if chave:
+        conditions.append('id > %s')
+        params.append(chave[0])
+    if conditions:
+        sql_query += ' WHERE ' + ' AND '.join(conditions)
+    sql_query += ' ORDER BY id LIMIT %s'
+
+    linhas, proximo_cursor = buscar_pagina(conn, sql_query, params, limite, lambda r: (r[0],))
+    
+    candidatos = [{'id': r[0], 'nome': r[1], 'email': r[2], 'situacao': r[3], 'estado': r[4], 'vaga': r[5], 'telefone': r[6], 'sexo': r[7], 'empresa': r[8]} for r in linhas]
+    
+    return {
+        'statusCode': 200, 'body': json.dumps(candidatos),
+        'headers': {
+            'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*',
+            **cabecalhos_paginacao(proximo_cursor, total)
+        }
+    }
+
+
+# GET /documentos - Busca documentos do candidato pelo email
+@roteador.rota('GET', '/candidatos/documentos')
+def listar_documentos_candidato(event, data, conn, cur):
+    logger.info("Executando rota GET /candidatos/documentos.")
     
-# ===== FUNÇÃO DE E-MAIL ATUALIZADA COM LOGS E NOME DOCFLOW =====
-def enviar_email(destinatario, nome_candidato, usuario, senha):
-    assunto = 'Seu Acesso à Plataforma DocFlow Foi Criado!'
+    # --- CORREÇÃO: Lendo o e-mail dos parâmetros da URL (query string) ---
+    query_params = event.get('queryStringParameters') or {}
+    email_candidato = query_params.get('email')
     
-    cor_principal = "#6A1B9A"
-
-    corpo_html = f"""
-    <!DOCTYPE html>
-    <html lang="pt-BR">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <style>
-            body {{ font-family: Arial, sans-serif; margin: 0; padding: 0; background-color: #f4f4f4; }}
-            .container {{ max-width: 600px; margin: 20px auto; background-color: #ffffff; border-radius: 8px; overflow: hidden; box-shadow: 0 4px 8px rgba(0,0,0,0.1); }}
-            .header {{ background-color: {cor_principal}; color: #ffffff; padding: 40px; text-align: center; }}
-            .header h1 {{ margin: 0; font-size: 24px; }}
-            .content {{ padding: 30px; color: #333333; line-height: 1.6; }}
-            .credentials {{ background-color: #f9f9f9; border-left: 5px solid {cor_principal}; padding: 15px; margin: 20px 0; }}
-            .credentials p {{ margin: 5px 0; }}
-            .btn-container {{ text-align: center; margin: 30px 0; }}
-            .btn-plataforma {{ background-color: {cor_principal}; color: #ffffff; padding: 12px 30px; text-decoration: none; border-radius: 5px; font-weight: bold; display: inline-block; transition: background-color 0.3s; }}
-            .btn-plataforma:hover {{ background-color: #4A148C; }}
-            .footer {{ background-color: #f4f4f4; color: #888888; text-align: center; padding: 20px; font-size: 12px; }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h1>Bem-vindo(a) ao DocFlow!</h1>
-            </div>
-            <div class="content">
-                <p>Olá, {nome_candidato},</p>
-                <p>Seu cadastro em nossa plataforma de onboarding foi realizado com sucesso. Abaixo estão seus dados de acesso iniciais.</p>
-                <div class="credentials">
-                    <p><strong>Usuário:</strong> {usuario}</p>
-                    <p><strong>Senha Provisória:</strong> os 3 primeiros e os 2 últimos dígitos do seu CPF.</p>
-                </div>
-                <div class="btn-container">
-                    <a href="https://docflow.com.br/login" class="btn-plataforma">Acessar Plataforma</a>
-                </div>
-                <p>Recomendamos que você acesse a plataforma assim que possível para dar continuidade ao seu processo de contratação.</p>
-                <p>Atenciosamente,<br>Equipe DocFlow Emai: rh@docflow.com.br</p>
-            </div>
-            <div class="footer">
-                <p>&copy; {datetime.now().year} DocFlow. Todos os direitos reservados.</p>
-                <p>Dúvidas ou suporte? Entre em contato: (11) 95813-6258 ou com o seu RH.</p>
-                <p>Este é um e-mail automático. Por favor, não responda.</p>
-            </div>
-        </div>
-    </body>
-    </html>
+    # LOG: Verifica o e-mail recebido para o filtro
+    logger.info(f"Tentando buscar documentos para o e-mail: '{email_candidato}'")
+    # email_candidato = data.get('email')
+
+    if not email_candidato:
+        return {
+            'statusCode': 400,
+            'body': json.dumps({'error': "O campo 'email' é obrigatório para buscar documentos."}),
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
+        }
+
+    cur.execute(
+        'SELECT nome_documento, tipo_documento, status FROM documentos_candidatos WHERE email_candidato = %s',
+        (email_candidato,)
+    )
+    documentos = [
+        {
+            'nome_documento': r[0],
+            'tipo_documento': r[1],
+            'status': r[2]
+        }
+        for r in cur.fetchall()
+    ]
+    return {
+        'statusCode': 200,
+        'body': json.dumps(documentos),
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
+    }
+
+
+def atualizar_status_documento(cur, nome_documento, email_candidato, atribuicoes, valores):
     """
+    Atualiza o documento do candidato e retorna (status_anterior,), ou None se
+    ele não existir. Um único comando: a subconsulta trava a linha (FOR UPDATE)
+    e fornece o status anterior ao RETURNING, no lugar do SELECT + UPDATE.
+    """
+    cur.execute(
+        f'''
+        UPDATE documentos_candidatos d
+        SET {atribuicoes}
+        FROM (
+            SELECT id, status FROM documentos_candidatos
+            WHERE nome_documento = %s AND email_candidato = %s
+            LIMIT 1
+            FOR UPDATE
+        ) anterior
+        WHERE d.id = anterior.id
+        RETURNING anterior.status
+        ''',
+        (*valores, nome_documento, email_candidato)
+    )
+    return cur.fetchone()
+
+
+# PUT /candidatos/documentos/aprovar - Aprova documento pelo nome
+@roteador.rota('PUT', '/candidatos/documentos/aprovar')
+def aprovar_documento(event, data, conn, cur):
+    logger.info("Executando rota PUT /candidatos/documentos/aprovar.")
+    
+    nome_documento = data.get('nome_documento')
+    email_candidato = data.get('email_candidato')
     
-    corpo_texto = f"Olá, {nome_candidato},\n\nSeu cadastro na plataforma DocFlow foi realizado com sucesso.\n\nUsuário: {usuario}\nSenha Provisória: os 3 primeiros e os 2 últimos dígitos do seu CPF.\n\nAtenciosamente,\nEquipe DocFlow"
+    # LOG: Verifica os dados recebidos
+    logger.info(f"Tentando aprovar documento '{nome_documento}' para o candidato '{email_candidato}'")
+
+    if not nome_documento:
+        return {
+            'statusCode': 400,
+            'body': json.dumps({'error': "O campo 'nome_documento' é obrigatório para aprovar um documento."}),
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
+        }
+
+    if not email_candidato:
+        return {
+            'statusCode': 400,
+            'body': json.dumps({'error': "O campo 'email_candidato' é obrigatório para identificar o candidato."}),
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
+        }
+
+    # Atualiza o status para 'Aprovado' e devolve o anterior no mesmo comando
+    documento_atualizado = atualizar_status_documento(
+        cur, nome_documento, email_candidato, 'status = %s', ('APROVADO',)
+    )
+
+    if not documento_atualizado:
+        return {
+            'statusCode': 404,
+            'body': json.dumps({'error': f"Documento '{nome_documento}' não encontrado para o candidato '{email_candidato}'."}),
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
+        }
+
+    status_atual = documento_atualizado[0]
+    conn.commit()
+
+    # LOG: Status anterior do documento
+    logger.info(f"Status anterior do documento: '{status_atual}'")
+
+    logger.info(f"Documento '{nome_documento}' aprovado com sucesso para o candidato '{email_candidato}'")
+
+    return {
+        'statusCode': 200,
+        'body': json.dumps({
+            'message': f"Documento '{nome_documento}' aprovado com sucesso.",
+            'nome_documento': nome_documento,
+            'email_candidato': email_candidato,
+            'status_anterior': status_atual,
+            'status_atual': 'Aprovado',
+            'data_aprovacao': datetime.now().isoformat()
+        }),
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
+    }
+
+
+# PUT /candidatos/documentos/reprovar - Reprova documento pelo nome
+@roteador.rota('PUT', '/candidatos/documentos/reprovar')
+def reprovar_documento(event, data, conn, cur):
+    logger.info("Executando rota PUT /candidatos/documentos/reprovar.")
+    
+    nome_documento = data.get('nome_documento')
+    email_candidato = data.get('email_candidato')
+    motivo_reprovacao = data.get('motivo_reprovacao', 'Não especificado')
+    
+    # LOG: Verifica os dados recebidos
+    logger.info(f"Tentando reprovar documento '{nome_documento}' para o candidato '{email_candidato}' com motivo: '{motivo_reprovacao}'")
+
+    if not nome_documento:
+        return {
+            'statusCode': 400,
+            'body': json.dumps({'error': "O campo 'nome_documento' é obrigatório para reprovar um documento."}),
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
+        }
+
+    if not email_candidato:
+        return {
+            'statusCode': 400,
+            'body': json.dumps({'error': "O campo 'email_candidato' é obrigatório para identificar o candidato."}),
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
+        }
+
+    # Atualiza o status para 'Reprovado' e adiciona o motivo, devolvendo o status anterior
+    documento_atualizado = atualizar_status_documento(
+        cur, nome_documento, email_candidato,
+        'status = %s, motivo_reprovacao = %s, data_reprovacao = %s',
+        ('Reprovado', motivo_reprovacao, datetime.now())
+    )
+
+    if not documento_atualizado:
+        return {
+            'statusCode': 404,
+            'body': json.dumps({'error': f"Documento '{nome_documento}' não encontrado para o candidato '{email_candidato}'."}),
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
+        }
+
+    status_atual = documento_atualizado[0]
+    conn.commit()
 
-    # LOG: Ponto de partida do envio de e-mail
-    logger.info(f"Iniciando tentativa de envio de e-mail para {destinatario}")
+    # LOG: Status anterior do documento
+    logger.info(f"Status anterior do documento: '{status_atual}'")
 
-    if not EMAIL_USER or not EMAIL_PASS:
-        # LOG: Erro crítico - credenciais ausentes
-        logger.error("ERRO CRÍTICO: As variáveis de ambiente EMAIL_USER ou EMAIL_PASS não estão configuradas.")
-        return # Adicionado 'return' para parar a execução aqui
+    logger.info(f"Documento '{nome_documento}' reprovado com sucesso para o candidato '{email_candidato}'")
 
+    return {
+        'statusCode': 200,
+        'body': json.dumps({
+            'message': f"Documento '{nome_documento}' reprovado com sucesso.",
+            'nome_documento': nome_documento,
+            'email_candidato': email_candidato,
+            'status_anterior': status_atual,
+            'status_atual': 'Reprovado',
+            'motivo_reprovacao': motivo_reprovacao,
+            'data_reprovacao': datetime.now().isoformat()
+        }),
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
+    }
+
+
+def atualizar_documentos_lote(data, cur, novo_status, reprovar=False):
+    """
+    Aprova/reprova vários documentos com um único UPDATE ... FROM unnest(...).
+
+    O corpo traz {"ids": [...]} ou {"documentos": [{"email_candidato", "nome_documento"}, ...]};
+    na reprovação, cada item pode ter seu "motivo_reprovacao" (o do corpo vale
+    como padrão). O status anterior vem da própria linha via self-join, sem
+    SELECT prévio. Retorna (atualizados, nao_encontrados) ou levanta ValueError.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('Corpo da requisição deve ser um objeto JSON.')
+    ids = data.get('ids')
+    documentos = data.get('documentos')
+    if bool(ids) == bool(documentos):
+        raise ValueError("Informe 'ids' ou 'documentos' (lista de {email_candidato, nome_documento}).")
+    itens = ids or documentos
+    if not isinstance(itens, list):
+        raise ValueError("'ids'/'documentos' deve ser uma lista.")
+    if len(itens) > DOCUMENTOS_LOTE_MAXIMO:
+        raise ValueError(f'Máximo de {DOCUMENTOS_LOTE_MAXIMO} documentos por requisição.')
+
+    motivo_padrao = data.get('motivo_reprovacao', 'Não especificado')
+    if ids:
+        try:
+            chaves = [int(i) for i in ids]
+        except (TypeError, ValueError):
+            raise ValueError("'ids' deve conter apenas números.")
+        motivos = [motivo_padrao] * len(chaves)
+        alvo = 'unnest(%s::bigint[], %s::text[]) AS alvo(id, motivo) ON anterior.id = alvo.id'
+        parametros = [chaves, motivos]
+    else:
+        if any(not isinstance(d, dict) or not d.get('email_candidato') or not d.get('nome_documento')
+               for d in documentos):
+            raise ValueError("Cada item de 'documentos' precisa de email_candidato e nome_documento.")
+        chaves = [(d['email_candidato'], d['nome_documento']) for d in documentos]
+        motivos = [d.get('motivo_reprovacao') or motivo_padrao for d in documentos]
+        alvo = '''unnest(%s::text[], %s::text[], %s::text[]) AS alvo(email, nome, motivo)
+            ON anterior.email_candidato = alvo.email AND anterior.nome_documento = alvo.nome'''
+        parametros = [[c[0] for c in chaves], [c[1] for c in chaves], motivos]
+
+    if reprovar:
+        atribuicoes = 'status = %s, motivo_reprovacao = alvo.motivo, data_reprovacao = now()'
+    else:
+        atribuicoes = 'status = %s'
+
+    cur.execute(
+        f'''
+        UPDATE documentos_candidatos d
+        SET {atribuicoes}
+        FROM documentos_candidatos anterior
+        JOIN {alvo}
+        WHERE d.id = anterior.id
+        RETURNING d.id, d.email_candidato, d.nome_documento, anterior.status, d.status
+        ''',
+        [novo_status] + parametros
+    )
+    linhas = cur.fetchall()
+
+    atualizados = [
+        {'id': r[0], 'email_candidato': r[1], 'nome_documento': r[2], 'status_anterior': r[3], 'status_atual': r[4]}
+        for r in linhas
+    ]
+    if ids:
+        encontrados = {r[0] for r in linhas}
+        nao_encontrados = [{'id': i} for i in dict.fromkeys(chaves) if i not in encontrados]
+    else:
+        encontrados = {(r[1], r[2]) for r in linhas}
+        nao_encontrados = [
+            {'email_candidato': email, 'nome_documento': nome}
+            for email, nome in dict.fromkeys(chaves) if (email, nome) not in encontrados
+        ]
+    return atualizados, nao_encontrados
+
+
+def responder_lote(event, data, conn, cur, novo_status, reprovar=False):
+    headers = {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
     try:
-        mensagem = MIMEMultipart('alternative')
-        mensagem['Subject'] = assunto
-        mensagem['From'] = f"DocFlow <{EMAIL_USER}>"
-        mensagem['To'] = destinatario
+        atualizados, nao_encontrados = atualizar_documentos_lote(data, cur, novo_status, reprovar)
+    except ValueError as e:
+        return {'statusCode': 400, 'body': json.dumps({'error': str(e)}), 'headers': headers}
+    conn.commit()
+
+    logger.info(f"Lote {novo_status}: {len(atualizados)} documento(s) atualizado(s), "
+                f"{len(nao_encontrados)} não encontrado(s)")
+    return {
+        'statusCode': 200,
+        'body': json.dumps({
+            'status_atual': novo_status,
+            'atualizados': atualizados,
+            'nao_encontrados': nao_encontrados,
+            'data': datetime.now().isoformat()
+        }),
+        'headers': headers
+    }
+
+
+# PUT /candidatos/documentos/aprovar/lote - Aprova vários documentos num único UPDATE
+@roteador.rota('PUT', '/candidatos/documentos/aprovar/lote')
+def aprovar_documentos_lote(event, data, conn, cur):
+    return responder_lote(event, data, conn, cur, 'APROVADO')
+
+
+# PUT /candidatos/documentos/reprovar/lote - Reprova vários documentos num único UPDATE
+@roteador.rota('PUT', '/candidatos/documentos/reprovar/lote')
+def reprovar_documentos_lote(event, data, conn, cur):
+    return responder_lote(event, data, conn, cur, 'Reprovado', reprovar=True)
+
+
+# GET /candidatos/documentos/todos - Lista todos os documentos com filtros
+@roteador.rota('GET', '/candidatos/documentos/todos')
+def listar_todos_documentos(event, data, conn, cur):
+    logger.info("Executando rota GET /candidatos/documentos/todos.")
+    
+    query_params = event.get('queryStringParameters') or {}
+    status_filtro = query_params.get('status')  # Filtro opcional por status
+    empresa_filtro = escopo_empresa(event, query_params.get('empresa'))  # Filtro opcional por empresa (ou a do token)
+    
+    # LOG: Parâmetros de filtro recebidos
+    logger.info(f"Filtros aplicados - Status: '{status_filtro}', Empresa: '{empresa_filtro}'")
 
-        mensagem.attach(MIMEText(corpo_texto, 'plain', 'utf-8'))
-        mensagem.attach(MIMEText(corpo_html, 'html', 'utf-8'))
-        
-        # LOG: Antes da conexão com o servidor SMTP
-        logger.info(f"Conectando ao servidor SMTP {EMAIL_HOST}:{EMAIL_PORT}...")
-        with smtplib.SMTP(EMAIL_HOST, EMAIL_PORT) as server:
-            server.starttls()
-            # LOG: Antes de fazer o login
-            logger.info(f"Realizando login com o usuário {EMAIL_USER}...")
-            server.login(EMAIL_USER, EMAIL_PASS)
-            # LOG: Antes de enviar o e-mail
-            logger.info(f"Enviando a mensagem para {destinatario}...")
-            server.sendmail(EMAIL_USER, destinatario, mensagem.as_string())
+    try:
+        limite, chave, incluir_total = ler_parametros(query_params, (str, str, int))
+    except CursorInvalido as e:
+        return {
+            'statusCode': 400,
+            'body': json.dumps({'error': str(e)}),
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
+        }
+
+    # Monta a query base
+    sql_query = '''
+        SELECT dc.nome_documento, dc.tipo_documento, dc.status, dc.email_candidato, 
+               c.nome as nome_candidato, c.empresa, dc.motivo_reprovacao,
+               dc.data_aprovacao, dc.data_reprovacao, dc.id
+        FROM documentos_candidatos dc
+        INNER JOIN candidatos c ON c.id = dc.candidato_id
+    '''
+    sql_contagem = '''
+        SELECT COUNT(*)
+        FROM documentos_candidatos dc
+        INNER JOIN candidatos c ON c.id = dc.candidato_id
+    '''
+    params = []
+    conditions = []
+
+    # Adiciona filtros conforme necessário
+    if status_filtro:
+        conditions.append('dc.status = %s')
+        params.append(status_filtro)
         
-        # LOG: Sucesso!
-        logger.info(f"E-mail enviado com SUCESSO para {destinatario}.")
-    except Exception as e:
-        # LOG: Captura qualquer erro durante o processo
-        logger.error(f"Falha ao enviar e-mail para {destinatario}: {e}", exc_info=True)
+    if empresa_filtro:
+        conditions.append('c.empresa = %s')
+        params.append(empresa_filtro)
+
+    total = None
+    if incluir_total:
+        if conditions:
+            sql_contagem += ' WHERE ' + ' AND '.join(conditions)
+        total = contar_total(cur, sql_contagem, params)
+
+    # Paginação por chave sobre a mesma ordenação (nome do candidato, documento),
+    # desempatada pelo id do documento para ser estável
+    if chave:
+        conditions.append("(c.nome, COALESCE(dc.nome_documento, ''), dc.id) > (%s, %s, %s)")
+        params.extend(chave)
+
+    # Adiciona condições WHERE se houver filtros
+    if conditions:
+        sql_query += ' WHERE ' + ' AND '.join(conditions)
+
+    # Ordena por nome do candidato
+    sql_query += " ORDER BY c.nome, COALESCE(dc.nome_documento, ''), dc.id LIMIT %s"
+
+    linhas, proximo_cursor = buscar_pagina(
+        conn, sql_query, params, limite, lambda r: (r[4], r[0] or '', r[9])
+    )
+    
+    documentos = [
+        {
+            'nome_documento': r[0],
+            'tipo_documento': r[1],
+            'status': r[2],
+            'email_candidato': r[3],
+            'nome_candidato': r[4],
+            'empresa': r[5],
+            'motivo_reprovacao': r[6],
+            'data_aprovacao': r[7].isoformat() if r[7] else None,
+            'data_reprovacao': r[8].isoformat() if r[8] else None
+        }
+        for r in linhas
+    ]
+    
+    logger.info(f"Retornando {len(documentos)} documentos.")
+
+    # Uma única página sem cursor já é o resultado inteiro: o total sai de graça
+    if total is None and not chave and not proximo_cursor:
+        total = len(documentos)
+
+    resposta = {
+        'documentos': documentos,
+        'proximo_cursor': proximo_cursor,
+        'filtros_aplicados': {
+            'status': status_filtro,
+            'empresa': empresa_filtro
+        }
+    }
+    if total is not None:
+        resposta['total'] = total
+    
+    return {
+        'statusCode': 200,
+        'body': json.dumps(resposta),
+        'headers': {
+            'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*',
+            **cabecalhos_paginacao(proximo_cursor, total)
+        }
+    }
 
-def lambda_handler(event, context):
-    http_method = event.get('requestContext', {}).get('http', {}).get('method', '')
-    path = event.get('rawPath', '')
+
+# PUT /candidatos
+@roteador.rota('PUT', '/candidatos')
+def atualizar_candidato(event, data, conn, cur):
+    candidato_id = data.get('id')
+    if not candidato_id:
+        return {'statusCode': 400, 'body': json.dumps({'error': "O campo 'id' é obrigatório no corpo para atualizar."})}
+    
+    # ... (código para pegar outros campos do 'data')
+    nome = data.get('nome')
+    email = data.get('email')
+    situacao = data.get('situacao')
     
+    cur.execute(
+        'UPDATE candidatos SET nome=%s, email=%s, situacao=%s WHERE id=%s',
+        (nome, email, situacao, candidato_id)
+    )
+    conn.commit()
+
+    return {
+        'statusCode': 200, 'body': json.dumps({'message': 'Candidato atualizado com sucesso'}),
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
+    }
+
+
+# DELETE /candidatos
+@roteador.rota('DELETE', '/candidatos')
+def deletar_candidato(event, data, conn, cur):
+    candidato_id = data.get('id')
+    if not candidato_id:
+        return {'statusCode': 400, 'body': json.dumps({'error': "O campo 'id' é obrigatório no corpo para deletar."})}
+
+    cur.execute('DELETE FROM candidatos WHERE id=%s', (candidato_id,))
+    conn.commit()
+
+    return {
+        'statusCode': 200, 'body': json.dumps({'result': 'Candidato deletado'}),
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
+    }
+
+
+def lambda_handler(event, context):
     # --- CORREÇÃO: Tratamento robusto do body ---
     data = {}
-    if 'body' in event and event['body']:
+    # CSV (POST /candidatos/bulk) é lido pela própria rota
+    if 'body' in event and event['body'] and not eh_csv(event):
         try:
             body_content = event['body']
             data = json.loads(body_content) if isinstance(body_content, str) else body_content
@@ -142,351 +787,22 @@ def lambda_handler(event, context):
     conn = None
     cur = None
     try:
-        # --- MELHORIA: Conexão única com o banco ---
-        conn = psycopg2.connect(host=DB_HOST, dbname=DB_NAME, user=DB_USER, password=DB_PASS, port=DB_PORT)
+        # --- MELHORIA: Conexão reaproveitada do pool do container ---
+        conn = obter_conexao()
         cur = conn.cursor()
 
-        # POST /candidatos
-        if path == '/candidatos' and http_method == 'POST':
-            nome = data.get('nome')
-            email = data.get('email')
-            cpf = data.get('cpf')
-            telefone = data.get('telefone')
-            estado = data.get('estado')
-            vaga = data.get('vaga')
-            sexo = data.get('sexo')
-            empresa = data.get('empresa')
-
-            if not all([nome, email, cpf, empresa]):
-                return {'statusCode': 400, 'body': json.dumps({'error': 'nome, email, cpf e empresa são obrigatórios'})}
-
-            senha_plana = gerar_senha(cpf)
-            # --- CORREÇÃO DE SEGURANÇA: Hasheando a senha ---
-            senha_hash = hash_senha(senha_plana)
-
-            cur.execute(
-                'INSERT INTO candidatos (nome, email, cpf, senha, telefone, estado, vaga, sexo, situacao, empresa) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s) RETURNING id',
-                (nome, email, cpf, senha_hash, telefone, estado, vaga, sexo, 'Pendente', empresa)
-            )
-            candidato_id = cur.fetchone()[0]
-
-            # --- NOVA LÓGICA ADICIONADA ---
-            # 2. Insere na tabela 'usuarios' com a role 'candidato'
-            logger.info(f"Criando registro correspondente na tabela 'usuarios' para o e-mail {email}")
-            role_candidato = 'candidato'
-            cur.execute(
-                'INSERT INTO usuarios (nome, email, senha, role, empresa) VALUES (%s, %s, %s, %s, %s)',
-                (nome, email, senha_hash, role_candidato, empresa)
-            )
-            
-            conn.commit()
-
-            enviar_email(email, nome, email, senha_plana) # O e-mail ainda envia a senha fácil de lembrar
+        resposta = roteador.despachar(event, data, conn, cur)
+        if resposta is not None:
+            return resposta
 
-            return {
-                'statusCode': 201, 'body': json.dumps({'id': candidato_id, 'email': email}),
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
-            }
-
-        # GET /candidatos
-        elif path == '/candidatos' and http_method == 'GET':
-            empresa_para_filtrar = data.get('empresa')
-            
-            # --- CORREÇÃO: Adicionada a coluna 'empresa' no SELECT ---
-            sql_query = 'SELECT id, nome, email, situacao, estado, vaga, telefone, sexo, empresa FROM candidatos'
-            params = []
-            
-            if empresa_para_filtrar:
-                sql_query += ' WHERE empresa = %s'
-                params.append(empresa_para_filtrar)
-
-            cur.execute(sql_query, params)
-            
-            candidatos = [{'id': r[0], 'nome': r[1], 'email': r[2], 'situacao': r[3], 'estado': r[4], 'vaga': r[5], 'telefone': r[6], 'sexo': r[7], 'empresa': r[8]} for r in cur.fetchall()]
-            
-            return {
-                'statusCode': 200, 'body': json.dumps(candidatos),
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
-            }
-        
-        # GET /documentos - Busca documentos do candidato pelo email
-        elif path == '/candidatos/documentos' and http_method == 'GET':
-            logger.info("Executando rota GET /candidatos/documentos.")
-            
-            # --- CORREÇÃO: Lendo o e-mail dos parâmetros da URL (query string) ---
-            query_params = event.get('queryStringParameters') or {}
-            email_candidato = query_params.get('email')
-            
-            # LOG: Verifica o e-mail recebido para o filtro
-            logger.info(f"Tentando buscar documentos para o e-mail: '{email_candidato}'")
-            # email_candidato = data.get('email')
-
-            if not email_candidato:
-                return {
-                    'statusCode': 400,
-                    'body': json.dumps({'error': "O campo 'email' é obrigatório para buscar documentos."}),
-                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
-                }
-
-            cur.execute(
-                'SELECT nome_documento, tipo_documento, status FROM documentos_candidatos WHERE email_candidato = %s',
-                (email_candidato,)
-            )
-            documentos = [
-                {
-                    'nome_documento': r[0],
-                    'tipo_documento': r[1],
-                    'status': r[2]
-                }
-                for r in cur.fetchall()
-            ]
-            return {
-                'statusCode': 200,
-                'body': json.dumps(documentos),
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
-            }
-
-        # PUT /candidatos/documentos/aprovar - Aprova documento pelo nome
-        elif path == '/candidatos/documentos/aprovar' and http_method == 'PUT':
-            logger.info("Executando rota PUT /candidatos/documentos/aprovar.")
-            
-            nome_documento = data.get('nome_documento')
-            email_candidato = data.get('email_candidato')
-            
-            # LOG: Verifica os dados recebidos
-            logger.info(f"Tentando aprovar documento '{nome_documento}' para o candidato '{email_candidato}'")
-
-            if not nome_documento:
-                return {
-                    'statusCode': 400,
-                    'body': json.dumps({'error': "O campo 'nome_documento' é obrigatório para aprovar um documento."}),
-                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
-                }
-
-            if not email_candidato:
-                return {
-                    'statusCode': 400,
-                    'body': json.dumps({'error': "O campo 'email_candidato' é obrigatório para identificar o candidato."}),
-                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
-                }
-
-            # Verifica se o documento existe
-            cur.execute(
-                'SELECT id, status FROM documentos_candidatos WHERE nome_documento = %s AND email_candidato = %s',
-                (nome_documento, email_candidato)
-            )
-            documento_existente = cur.fetchone()
-
-            if not documento_existente:
-                return {
-                    'statusCode': 404,
-                    'body': json.dumps({'error': f"Documento '{nome_documento}' não encontrado para o candidato '{email_candidato}'."}),
-                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
-                }
-
-            documento_id, status_atual = documento_existente
-            
-            # LOG: Status atual do documento
-            logger.info(f"Status atual do documento: '{status_atual}'")
-
-            # Atualiza o status para 'Aprovado'
-            cur.execute(
-                'UPDATE documentos_candidatos SET status = %s WHERE id = %s',
-                ('APROVADO', documento_id)
-            )
-            conn.commit()
-
-            logger.info(f"Documento '{nome_documento}' aprovado com sucesso para o candidato '{email_candidato}'")
-
-            return {
-                'statusCode': 200,
-                'body': json.dumps({
-                    'message': f"Documento '{nome_documento}' aprovado com sucesso.",
-                    'nome_documento': nome_documento,
-                    'email_candidato': email_candidato,
-                    'status_anterior': status_atual,
-                    'status_atual': 'Aprovado',
-                    'data_aprovacao': datetime.now().isoformat()
-                }),
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
-            }
-
-        # PUT /candidatos/documentos/reprovar - Reprova documento pelo nome
-        elif path == '/candidatos/documentos/reprovar' and http_method == 'PUT':
-            logger.info("Executando rota PUT /candidatos/documentos/reprovar.")
-            
-            nome_documento = data.get('nome_documento')
-            email_candidato = data.get('email_candidato')
-            motivo_reprovacao = data.get('motivo_reprovacao', 'Não especificado')
-            
-            # LOG: Verifica os dados recebidos
-            logger.info(f"Tentando reprovar documento '{nome_documento}' para o candidato '{email_candidato}' com motivo: '{motivo_reprovacao}'")
-
-            if not nome_documento:
-                return {
-                    'statusCode': 400,
-                    'body': json.dumps({'error': "O campo 'nome_documento' é obrigatório para reprovar um documento."}),
-                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
-                }
-
-            if not email_candidato:
-                return {
-                    'statusCode': 400,
-                    'body': json.dumps({'error': "O campo 'email_candidato' é obrigatório para identificar o candidato."}),
-                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
-                }
-
-            # Verifica se o documento existe
-            cur.execute(
-                'SELECT id, status FROM documentos_candidatos WHERE nome_documento = %s AND email_candidato = %s',
-                (nome_documento, email_candidato)
-            )
-            documento_existente = cur.fetchone()
-
-            if not documento_existente:
-                return {
-                    'statusCode': 404,
-                    'body': json.dumps({'error': f"Documento '{nome_documento}' não encontrado para o candidato '{email_candidato}'."}),
-                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
-                }
-
-            documento_id, status_atual = documento_existente
-            
-            # LOG: Status atual do documento
-            logger.info(f"Status atual do documento: '{status_atual}'")
-
-            # Atualiza o status para 'Reprovado' e adiciona o motivo
-            cur.execute(
-                'UPDATE documentos_candidatos SET status = %s, motivo_reprovacao = %s, data_reprovacao = %s WHERE id = %s',
-                ('Reprovado', motivo_reprovacao, datetime.now(), documento_id)
-            )
-            conn.commit()
-
-            logger.info(f"Documento '{nome_documento}' reprovado com sucesso para o candidato '{email_candidato}'")
-
-            return {
-                'statusCode': 200,
-                'body': json.dumps({
-                    'message': f"Documento '{nome_documento}' reprovado com sucesso.",
-                    'nome_documento': nome_documento,
-                    'email_candidato': email_candidato,
-                    'status_anterior': status_atual,
-                    'status_atual': 'Reprovado',
-                    'motivo_reprovacao': motivo_reprovacao,
-                    'data_reprovacao': datetime.now().isoformat()
-                }),
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
-            }
-
-        # GET /candidatos/documentos/todos - Lista todos os documentos com filtros
-        elif path == '/candidatos/documentos/todos' and http_method == 'GET':
-            logger.info("Executando rota GET /candidatos/documentos/todos.")
-            
-            query_params = event.get('queryStringParameters') or {}
-            status_filtro = query_params.get('status')  # Filtro opcional por status
-            empresa_filtro = query_params.get('empresa')  # Filtro opcional por empresa
-            
-            # LOG: Parâmetros de filtro recebidos
-            logger.info(f"Filtros aplicados - Status: '{status_filtro}', Empresa: '{empresa_filtro}'")
-
-            # Monta a query base
-            sql_query = '''
-                SELECT dc.nome_documento, dc.tipo_documento, dc.status, dc.email_candidato, 
-                       c.nome as nome_candidato, c.empresa, dc.motivo_reprovacao,
-                       dc.data_aprovacao, dc.data_reprovacao
-                FROM documentos_candidatos dc
-                INNER JOIN candidatos c ON dc.email_candidato = c.email
-            '''
-            params = []
-            conditions = []
-
-            # Adiciona filtros conforme necessário
-            if status_filtro:
-                conditions.append('dc.status = %s')
-                params.append(status_filtro)
-                
-            if empresa_filtro:
-                conditions.append('c.empresa = %s')
-                params.append(empresa_filtro)
-
-            # Adiciona condições WHERE se houver filtros
-            if conditions:
-                sql_query += ' WHERE ' + ' AND '.join(conditions)
-
-            # Ordena por nome do candidato
-            sql_query += ' ORDER BY c.nome, dc.nome_documento'
-
-            cur.execute(sql_query, params)
-            
-            documentos = [
-                {
-                    'nome_documento': r[0],
-                    'tipo_documento': r[1],
-                    'status': r[2],
-                    'email_candidato': r[3],
-                    'nome_candidato': r[4],
-                    'empresa': r[5],
-                    'motivo_reprovacao': r[6],
-                    'data_aprovacao': r[7].isoformat() if r[7] else None,
-                    'data_reprovacao': r[8].isoformat() if r[8] else None
-                }
-                for r in cur.fetchall()
-            ]
-            
-            logger.info(f"Retornando {len(documentos)} documentos.")
-            
-            return {
-                'statusCode': 200,
-                'body': json.dumps({
-                    'documentos': documentos,
-                    'total': len(documentos),
-                    'filtros_aplicados': {
-                        'status': status_filtro,
-                        'empresa': empresa_filtro
-                    }
-                }),
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
-            }
-
-        # PUT /candidatos
-        elif path == '/candidatos' and http_method == 'PUT': # --- CORREÇÃO: Rota consistente ---
-            candidato_id = data.get('id')
-            if not candidato_id:
-                return {'statusCode': 400, 'body': json.dumps({'error': "O campo 'id' é obrigatório no corpo para atualizar."})}
-            
-            # ... (código para pegar outros campos do 'data')
-            nome = data.get('nome')
-            email = data.get('email')
-            situacao = data.get('situacao')
-            
-            cur.execute(
-                'UPDATE candidatos SET nome=%s, email=%s, situacao=%s WHERE id=%s',
-                (nome, email, situacao, candidato_id)
-            )
-            conn.commit()
-
-            return {
-                'statusCode': 200, 'body': json.dumps({'message': 'Candidato atualizado com sucesso'}),
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
-            }
-
-        # DELETE /candidatos
-        elif path == '/candidatos' and http_method == 'DELETE': # --- CORREÇÃO: Rota consistente ---
-            candidato_id = data.get('id')
-            if not candidato_id:
-                return {'statusCode': 400, 'body': json.dumps({'error': "O campo 'id' é obrigatório no corpo para deletar."})}
-
-            cur.execute('DELETE FROM candidatos WHERE id=%s', (candidato_id,))
-            conn.commit()
-
-            return {
-                'statusCode': 200, 'body': json.dumps({'result': 'Candidato deletado'}),
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
-            }
-        
         # Se nenhuma rota correspondeu, retorna 404
         return {'statusCode': 404, 'body': json.dumps({'error': 'Not found'})}
 
+    except NaoAutorizado as e:
+        return {
+            'statusCode': e.status, 'body': json.dumps({'error': str(e)}),
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
+        }
     except Exception as e:
         logger.error(f"Erro na execução da Lambda: {e}", exc_info=True)
         return {
@@ -494,8 +810,8 @@ def lambda_handler(event, context):
             'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
         }
     finally:
-        # --- MELHORIA: Garante que a conexão seja sempre fechada ---
+        # --- MELHORIA: Garante que a conexão sempre volte ao pool ---
         if cur:
             cur.close()
         if conn:
-            conn.close()
\ No newline at end of file
+            liberar_conexao(conn)
\ No newline at end of file
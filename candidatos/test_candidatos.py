@@ -0,0 +1,118 @@
+"""
+Cada rota de escrita abaixo deve fazer um único comando SQL (um round trip
+até o RDS) e manter o corpo de resposta de antes. GET /candidatos/documentos/todos
+continua devolvendo em `total` a quantidade de documentos, não a da página.
+"""
+
+import json
+
+import pytest
+
+from conftest import carregar_lambda
+
+candidatos = carregar_lambda('candidatos')
+
+
+def test_criar_candidato_um_comando(invocar):
+    corpo = {
+        'nome': 'Ana', 'email': 'ana@exemplo.com', 'cpf': '123.456.789-01',
+        'empresa': 'acme', 'telefone': '11999990000', 'vaga': 'Dev',
+    }
+    resposta, conn = invocar(candidatos, 'POST', '/candidatos', corpo, [(42,)])
+
+    assert conn.comandos == 1
+    assert conn.commits == 1
+    assert resposta['statusCode'] == 201
+    assert json.loads(resposta['body']) == {'id': 42, 'email': 'ana@exemplo.com'}
+    # Candidato, usuário e e-mail de boas-vindas no mesmo comando
+    sql = conn.executados[0][0]
+    assert 'INSERT INTO candidatos' in sql
+    assert 'INSERT INTO usuarios' in sql
+    assert 'INSERT INTO email_outbox' in sql
+
+
+@pytest.mark.parametrize('caminho, acao, status_atual', [
+    ('/candidatos/documentos/aprovar', 'aprovado', 'Aprovado'),
+    ('/candidatos/documentos/reprovar', 'reprovado', 'Reprovado'),
+])
+def test_atualizar_documento_um_comando(invocar, caminho, acao, status_atual):
+    corpo = {'nome_documento': 'rg.pdf', 'email_candidato': 'ana@exemplo.com', 'motivo_reprovacao': 'Ilegível'}
+    resposta, conn = invocar(candidatos, 'PUT', caminho, corpo, [('PENDENTE',)])
+
+    assert conn.comandos == 1
+    assert conn.commits == 1
+    assert resposta['statusCode'] == 200
+    body = json.loads(resposta['body'])
+    data = body.pop('data_aprovacao' if acao == 'aprovado' else 'data_reprovacao')
+    assert data
+    esperado = {
+        'message': f"Documento 'rg.pdf' {acao} com sucesso.",
+        'nome_documento': 'rg.pdf',
+        'email_candidato': 'ana@exemplo.com',
+        'status_anterior': 'PENDENTE',
+        'status_atual': status_atual,
+    }
+    if acao == 'reprovado':
+        esperado['motivo_reprovacao'] = 'Ilegível'
+    assert body == esperado
+
+
+@pytest.mark.parametrize('caminho', ['/candidatos/documentos/aprovar', '/candidatos/documentos/reprovar'])
+def test_atualizar_documento_inexistente_um_comando(invocar, caminho):
+    corpo = {'nome_documento': 'rg.pdf', 'email_candidato': 'ana@exemplo.com'}
+    resposta, conn = invocar(candidatos, 'PUT', caminho, corpo, [])
+
+    assert conn.comandos == 1
+    assert conn.commits == 0
+    assert resposta['statusCode'] == 404
+    assert json.loads(resposta['body']) == {
+        'error': "Documento 'rg.pdf' não encontrado para o candidato 'ana@exemplo.com'."
+    }
+
+
+def test_roteador_registra_comandos_da_rota(invocar):
+    invocar(candidatos, 'PUT', '/candidatos/documentos/aprovar',
+            {'nome_documento': 'rg.pdf', 'email_candidato': 'ana@exemplo.com'}, [('PENDENTE',)])
+
+    metrica = candidatos.roteador.metricas()['PUT /candidatos/documentos/aprovar']
+    assert metrica['comandos_total'] == metrica['chamadas']
+
+
+def documento(id_, nome='Ana'):
+    return ('rg.pdf', 'rg', 'PENDENTE', 'ana@exemplo.com', nome, 'acme', None, None, None, id_)
+
+
+def test_listar_todos_documentos_uma_pagina_informa_total(invocar):
+    resposta, conn = invocar(candidatos, 'GET', '/candidatos/documentos/todos', {}, [documento(1), documento(2)])
+
+    corpo = json.loads(resposta['body'])
+    assert corpo['total'] == 2
+    assert corpo['proximo_cursor'] is None
+    assert resposta['headers']['X-Total-Count'] == '2'
+    assert conn.comandos == 1
+
+
+def test_listar_todos_documentos_total_real_com_incluir_total(invocar):
+    resposta, conn = invocar(
+        candidatos, 'GET', '/candidatos/documentos/todos', {},
+        [(250,)], [documento(1), documento(2), documento(3)],
+        query={'limit': '2', 'incluir_total': 'true'}
+    )
+
+    corpo = json.loads(resposta['body'])
+    assert len(corpo['documentos']) == 2
+    assert corpo['total'] == 250
+    assert corpo['proximo_cursor']
+    assert 'COUNT(*)' in conn.executados[0][0]
+
+
+def test_listar_todos_documentos_varias_paginas_sem_total(invocar):
+    resposta, conn = invocar(
+        candidatos, 'GET', '/candidatos/documentos/todos', {},
+        [documento(1), documento(2), documento(3)], query={'limit': '2'}
+    )
+
+    corpo = json.loads(resposta['body'])
+    assert 'total' not in corpo
+    assert 'X-Total-Count' not in resposta['headers']
+    assert conn.comandos == 1
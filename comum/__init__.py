@@ -0,0 +1,6 @@
+"""
+Código compartilhado entre as Lambdas do DocFlow.
+
+Este pacote é publicado como uma Lambda Layer (python/comum) e importado
+pelos handlers de cada pasta.
+"""
@@ -0,0 +1,171 @@
+"""
+Tokens JWT (HS256) emitidos pelo /login e verificados localmente pelos handlers.
+
+A verificação é feita em processo, sem consultar o banco: o token já carrega
+id, e-mail, role e empresa do usuário. As chaves são lidas uma vez por
+container (variável de ambiente ou AWS Secrets Manager) e ficam em memória.
+
+Chaves:
+- JWT_CHAVES: JSON {"kid": "segredo", ...} para permitir rotação, com
+  JWT_KID_ATUAL indicando a chave usada para assinar; ou
+- JWT_SEGREDO: uma única chave (kid "padrao"); ou
+- JWT_SEGREDO_ARN: ARN de um segredo do Secrets Manager com o mesmo JSON de JWT_CHAVES.
+"""
+
+import os
+import json
+import hmac
+import time
+import base64
+import hashlib
+import threading
+
+JWT_EXPIRACAO_SEGUNDOS = int(os.environ.get('JWT_EXPIRACAO_SEGUNDOS', '3600'))
+JWT_EMISSOR = os.environ.get('JWT_EMISSOR', 'docflow')
+JWT_KID_ATUAL = os.environ.get('JWT_KID_ATUAL', 'padrao')
+# Tolerância de relógio entre Lambdas, em segundos
+JWT_TOLERANCIA_SEGUNDOS = int(os.environ.get('JWT_TOLERANCIA_SEGUNDOS', '30'))
+# Quando 'true', rotas protegidas recusam requisições sem token. O padrão
+# 'false' existe para a migração gradual do front-end: enquanto isso, uma
+# requisição SEM token não tem escopo e enxerga todas as empresas
+AUTH_OBRIGATORIA = os.environ.get('AUTH_OBRIGATORIA', 'false').lower() == 'true'
+# Roles que enxergam todas as empresas; as demais ficam presas à empresa do token
+ROLES_GLOBAIS = set(os.environ.get('JWT_ROLES_GLOBAIS', 'admin').split(','))
+
+
+class NaoAutorizado(Exception):
+    """
+    Token ausente, inválido ou expirado (401), ou token válido sem permissão
+    para a consulta (403); `status` é o código HTTP da resposta.
+    """
+
+    def __init__(self, mensagem, status=401):
+        super().__init__(mensagem)
+        self.status = status
+
+
+_chaves = None
+_lock_chaves = threading.Lock()
+
+
+def _b64url(dados):
+    return base64.urlsafe_b64encode(dados).rstrip(b'=').decode('ascii')
+
+
+def _b64url_decode(texto):
+    return base64.urlsafe_b64decode(texto + '=' * (-len(texto) % 4))
+
+
+def _carregar_chaves():
+    if os.environ.get('JWT_CHAVES'):
+        chaves = json.loads(os.environ['JWT_CHAVES'])
+    elif os.environ.get('JWT_SEGREDO'):
+        chaves = {'padrao': os.environ['JWT_SEGREDO']}
+    elif os.environ.get('JWT_SEGREDO_ARN'):
+        import boto3  # disponível no runtime da Lambda; só é importado se usado
+        segredo = boto3.client('secretsmanager').get_secret_value(SecretId=os.environ['JWT_SEGREDO_ARN'])
+        chaves = json.loads(segredo['SecretString'])
+    else:
+        raise RuntimeError('Nenhuma chave JWT configurada (JWT_CHAVES, JWT_SEGREDO ou JWT_SEGREDO_ARN).')
+    return {kid: segredo.encode('utf-8') for kid, segredo in chaves.items()}
+
+
+def chaves():
+    """Chaves de assinatura, carregadas uma única vez por container."""
+    global _chaves
+    if _chaves is None:
+        with _lock_chaves:
+            if _chaves is None:
+                _chaves = _carregar_chaves()
+    return _chaves
+
+
+def emitir_token(usuario_id, email, role, empresa, expiracao=JWT_EXPIRACAO_SEGUNDOS):
+    agora = int(time.time())
+    cabecalho = {'alg': 'HS256', 'typ': 'JWT', 'kid': JWT_KID_ATUAL}
+    claims = {
+        'iss': JWT_EMISSOR,
+        'sub': str(usuario_id),
+        'email': email,
+        'role': role,
+        'empresa': empresa,
+        'iat': agora,
+        'exp': agora + expiracao,
+    }
+    assinado = '.'.join((
+        _b64url(json.dumps(cabecalho, separators=(',', ':')).encode('utf-8')),
+        _b64url(json.dumps(claims, separators=(',', ':')).encode('utf-8')),
+    ))
+    assinatura = hmac.new(chaves()[JWT_KID_ATUAL], assinado.encode('ascii'), hashlib.sha256).digest()
+    return f'{assinado}.{_b64url(assinatura)}'
+
+
+def verificar_token(token):
+    """Valida assinatura, emissor e expiração. Retorna as claims."""
+    try:
+        cabecalho_b64, claims_b64, assinatura_b64 = token.split('.')
+        cabecalho = json.loads(_b64url_decode(cabecalho_b64))
+        assinatura = _b64url_decode(assinatura_b64)
+    except (ValueError, TypeError):
+        raise NaoAutorizado('Token malformado')
+    if not isinstance(cabecalho, dict):
+        raise NaoAutorizado('Token malformado')
+
+    if cabecalho.get('alg') != 'HS256':
+        raise NaoAutorizado('Algoritmo de token não suportado')
+    chave = chaves().get(cabecalho.get('kid', 'padrao'))
+    if chave is None:
+        raise NaoAutorizado('Chave do token desconhecida')
+
+    esperada = hmac.new(chave, f'{cabecalho_b64}.{claims_b64}'.encode('ascii'), hashlib.sha256).digest()
+    if not hmac.compare_digest(esperada, assinatura):
+        raise NaoAutorizado('Assinatura do token inválida')
+
+    try:
+        claims = json.loads(_b64url_decode(claims_b64))
+    except ValueError:
+        raise NaoAutorizado('Token malformado')
+    exp = claims.get('exp', 0) if isinstance(claims, dict) else None
+    if not isinstance(exp, (int, float)) or isinstance(exp, bool):
+        raise NaoAutorizado('Token malformado')
+    if claims.get('iss') != JWT_EMISSOR:
+        raise NaoAutorizado('Emissor do token inválido')
+    if exp + JWT_TOLERANCIA_SEGUNDOS < time.time():
+        raise NaoAutorizado('Token expirado')
+    return claims
+
+
+def autenticar(event, obrigatorio=None):
+    """
+    Lê o header Authorization: Bearer <token> do evento.
+
+    Retorna as claims, ou None se não houver token e a autenticação não for
+    obrigatória. Levanta NaoAutorizado se o token for inválido.
+    """
+    obrigatorio = AUTH_OBRIGATORIA if obrigatorio is None else obrigatorio
+    headers = event.get('headers') or {}
+    valor = headers.get('authorization') or headers.get('Authorization') or ''
+
+    if not valor.startswith('Bearer '):
+        if obrigatorio:
+            raise NaoAutorizado('Token de acesso não informado')
+        return None
+    return verificar_token(valor[len('Bearer '):].strip())
+
+
+def escopo_empresa(event, empresa_solicitada):
+    """
+    Empresa que a requisição pode consultar.
+
+    Usuários com role global usam o filtro pedido; os demais ficam restritos
+    à empresa gravada no token, sem consulta ao banco. Um token de role não
+    global sem empresa é recusado (403): None significaria "sem filtro".
+    Sem token (só com AUTH_OBRIGATORIA=false) vale o filtro pedido.
+    """
+    claims = autenticar(event)
+    if claims is None or claims.get('role') in ROLES_GLOBAIS:
+        return empresa_solicitada
+    empresa = claims.get('empresa')
+    if not empresa:
+        raise NaoAutorizado('Token sem empresa para o escopo da consulta', status=403)
+    return empresa
@@ -0,0 +1,73 @@
+"""
+Cache em memória (LRU + TTL) que vive enquanto o container estiver quente.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+
+
+class CacheTTL:
+    """
+    Dicionário com tamanho máximo (descarta o menos usado) e validade por item.
+
+    `relogio` pode ser trocado em testes; por padrão usa time.monotonic.
+    """
+
+    def __init__(self, maximo=1024, ttl=60.0, relogio=time.monotonic):
+        self.maximo = maximo
+        self.ttl = ttl
+        self._relogio = relogio
+        self._itens = OrderedDict()  # chave -> (expira_em, valor)
+        self._lock = threading.Lock()
+        self._stats = {'acertos': 0, 'faltas': 0, 'expirados': 0, 'invalidados': 0}
+
+    def obter(self, chave, padrao=None):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                self._stats['faltas'] += 1
+                return padrao
+            expira_em, valor = item
+            if expira_em <= self._relogio():
+                del self._itens[chave]
+                self._stats['expirados'] += 1
+                self._stats['faltas'] += 1
+                return padrao
+            self._itens.move_to_end(chave)
+            self._stats['acertos'] += 1
+            return valor
+
+    def definir(self, chave, valor, ttl=None):
+        expira_em = self._relogio() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._itens[chave] = (expira_em, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.maximo:
+                self._itens.popitem(last=False)
+
+    def remover(self, chave):
+        with self._lock:
+            if self._itens.pop(chave, None) is not None:
+                self._stats['invalidados'] += 1
+
+    def remover_onde(self, predicado):
+        """Remove os itens para os quais predicado(chave, valor) é verdadeiro."""
+        with self._lock:
+            chaves = [c for c, (_, v) in self._itens.items() if predicado(c, v)]
+            for chave in chaves:
+                del self._itens[chave]
+            self._stats['invalidados'] += len(chaves)
+        return len(chaves)
+
+    def limpar(self):
+        with self._lock:
+            self._stats['invalidados'] += len(self._itens)
+            self._itens.clear()
+
+    def __len__(self):
+        return len(self._itens)
+
+    def estatisticas(self):
+        with self._lock:
+            return {**self._stats, 'itens': len(self._itens)}
@@ -0,0 +1,271 @@
+"""
+Pool de conexões PostgreSQL compartilhado entre invocações da Lambda.
+
+O pool vive no escopo do módulo, então sobrevive enquanto o container estiver
+quente: invocações seguintes reaproveitam a conexão já autenticada em vez de
+pagar TCP + TLS + autenticação no RDS a cada requisição.
+
+As conexões do pool contam os comandos enviados (ConexaoContadora), e o
+Roteador registra quantos cada requisição usou: cada comando é um round trip
+até o RDS.
+"""
+
+import os
+import time
+import select
+import logging
+import threading
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extensions
+
+logger = logging.getLogger()
+
+DB_HOST = os.environ.get('DB_HOST', 'localhost')
+DB_NAME = os.environ.get('DB_NAME', 'onboarding')
+DB_USER = os.environ.get('DB_USER', 'postgres')
+DB_PASS = os.environ.get('DB_PASS', 'postgres')
+DB_PORT = os.environ.get('DB_PORT', '5432')
+
+# Quantidade máxima de conexões ociosas guardadas por container
+DB_POOL_MAX = int(os.environ.get('DB_POOL_MAX', '2'))
+# Conexões ociosas há mais tempo que isso passam por um SELECT 1 antes de reusar
+DB_VALIDAR_APOS_SEGUNDOS = float(os.environ.get('DB_VALIDAR_APOS_SEGUNDOS', '30'))
+DB_CONNECT_TIMEOUT = int(os.environ.get('DB_CONNECT_TIMEOUT', '5'))
+
+
+class ConexaoContadora(psycopg2.extensions.connection):
+    """Conexão que conta os comandos executados pelos seus cursores."""
+
+    comandos = 0
+
+
+class CursorContador(psycopg2.extensions.cursor):
+    """Cursor que soma cada execute/executemany em connection.comandos."""
+
+    def _contar(self):
+        if isinstance(self.connection, ConexaoContadora):
+            self.connection.comandos += 1
+
+    def execute(self, query, vars=None):
+        self._contar()
+        return super().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        self._contar()
+        return super().executemany(query, vars_list)
+
+
+def _socket_com_dados(conn):
+    """
+    Verifica, sem round trip, se o servidor escreveu numa conexão ociosa
+    (mensagem FATAL ou fim da conexão TCP).
+    """
+    try:
+        return bool(select.select([conn], [], [], 0)[0])
+    except (OSError, ValueError):
+        return True
+
+
+class PoolConexoes:
+    """
+    Pool simples de conexões psycopg2 com validação barata antes do reuso.
+
+    - Conexões fechadas (conn.closed != 0) são descartadas sem round trip.
+    - Conexões ociosas há mais de DB_VALIDAR_APOS_SEGUNDOS, ou cujo socket tem
+      dados pendentes (uma conexão ociosa só recebe algo quando o servidor a
+      encerra, ex.: failover ou restart do RDS), recebem um SELECT 1; se falhar
+      (OperationalError/InterfaceError) são descartadas e uma nova é aberta.
+    - Na devolução, transações pendentes sofrem rollback para que a próxima
+      invocação receba a conexão limpa.
+    """
+
+    def __init__(self, maximo_ociosas=DB_POOL_MAX, validar_apos=DB_VALIDAR_APOS_SEGUNDOS):
+        self.maximo_ociosas = maximo_ociosas
+        self.validar_apos = validar_apos
+        self._ociosas = []  # lista de (conexao, instante_da_devolucao)
+        self._em_uso = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            'criadas': 0,
+            'reutilizadas': 0,
+            'validacoes': 0,
+            'descartadas': 0,
+            'falhas_validacao': 0,
+        }
+
+    def _nova_conexao(self):
+        conn = psycopg2.connect(
+            host=DB_HOST, dbname=DB_NAME, user=DB_USER, password=DB_PASS, port=DB_PORT,
+            connect_timeout=DB_CONNECT_TIMEOUT,
+            connection_factory=ConexaoContadora, cursor_factory=CursorContador,
+            # Keepalives ajudam a detectar conexões mortas após failover
+            keepalives=1, keepalives_idle=30, keepalives_interval=10, keepalives_count=3,
+        )
+        self._stats['criadas'] += 1
+        return conn
+
+    def _conexao_valida(self, conn, ociosa_desde):
+        if conn.closed:
+            return False
+        if time.monotonic() - ociosa_desde < self.validar_apos and not _socket_com_dados(conn):
+            return True
+
+        self._stats['validacoes'] += 1
+        try:
+            with conn.cursor() as cur:
+                cur.execute('SELECT 1')
+            conn.rollback()
+            return True
+        except psycopg2.Error as e:
+            logger.warning(f"Conexão do pool inválida, será reaberta: {e}")
+            self._stats['falhas_validacao'] += 1
+            return False
+
+    def _descartar(self, conn):
+        self._stats['descartadas'] += 1
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def obter(self):
+        """Retorna uma conexão pronta para uso, reaproveitando uma ociosa se possível."""
+        while True:
+            with self._lock:
+                if not self._ociosas:
+                    break
+                conn, ociosa_desde = self._ociosas.pop()
+
+            if self._conexao_valida(conn, ociosa_desde):
+                with self._lock:
+                    self._stats['reutilizadas'] += 1
+                    self._em_uso += 1
+                return conn
+            self._descartar(conn)
+
+        conn = self._nova_conexao()
+        with self._lock:
+            self._em_uso += 1
+        return conn
+
+    def devolver(self, conn, descartar=False):
+        """Devolve a conexão ao pool (ou a fecha se estiver quebrada ou sobrando)."""
+        with self._lock:
+            self._em_uso -= 1
+
+        if not descartar and not conn.closed:
+            try:
+                status = conn.info.transaction_status
+                if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                    descartar = True
+                elif status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                descartar = True
+
+        if descartar or conn.closed:
+            self._descartar(conn)
+            return
+
+        with self._lock:
+            if len(self._ociosas) < self.maximo_ociosas:
+                self._ociosas.append((conn, time.monotonic()))
+                return
+        self._descartar(conn)
+
+    def fechar_todas(self):
+        """Fecha todas as conexões ociosas (útil em testes e scripts)."""
+        with self._lock:
+            ociosas, self._ociosas = self._ociosas, []
+        for conn, _ in ociosas:
+            self._descartar(conn)
+
+    def estatisticas(self):
+        with self._lock:
+            return {**self._stats, 'ociosas': len(self._ociosas), 'em_uso': self._em_uso}
+
+
+# Pool único por container
+pool = PoolConexoes()
+
+
+def obter_conexao():
+    return pool.obter()
+
+
+def liberar_conexao(conn):
+    pool.devolver(conn)
+
+
+@contextmanager
+def conexao():
+    """
+    Context manager que empresta uma conexão do pool.
+
+    Erros de conexão (OperationalError/InterfaceError) fazem a conexão ser
+    descartada em vez de voltar ao pool.
+    """
+    conn = pool.obter()
+    descartar = False
+    try:
+        yield conn
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        descartar = True
+        raise
+    finally:
+        pool.devolver(conn, descartar=descartar)
+
+
+def estatisticas_pool():
+    return pool.estatisticas()
+
+
+class OuvinteNotificacoes:
+    """
+    Conexão dedicada em LISTEN num canal do Postgres (LISTEN/NOTIFY).
+
+    consumir() lê do socket as notificações já recebidas sem fazer round trip
+    ao banco. Quando a conexão precisou ser (re)aberta, notificações podem ter
+    sido perdidas, e isso é sinalizado para o chamador descartar o que tiver
+    em cache.
+    """
+
+    def __init__(self, canal):
+        self.canal = canal
+        self._conn = None
+
+    def _conectar(self):
+        self.fechar()
+        self._conn = pool._nova_conexao()
+        self._conn.set_session(autocommit=True)
+        with self._conn.cursor() as cur:
+            cur.execute(f'LISTEN {self.canal}')
+
+    def fechar(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except psycopg2.Error:
+                pass
+            self._conn = None
+
+    def consumir(self):
+        """Retorna (payloads, reiniciado)."""
+        reiniciado = False
+        if self._conn is None or self._conn.closed:
+            self._conectar()
+            reiniciado = True
+
+        try:
+            self._conn.poll()
+        except psycopg2.Error as e:
+            logger.warning(f"Conexão de LISTEN {self.canal} perdida, reconectando: {e}")
+            self._conectar()
+            reiniciado = True
+            self._conn.poll()
+
+        payloads = [n.payload for n in self._conn.notifies]
+        del self._conn.notifies[:]
+        return payloads, reiniciado
@@ -0,0 +1,126 @@
+"""
+Templates dos e-mails enviados pelo DocFlow.
+
+Os templates ficam em comum/templates (<tipo>.html e <tipo>.txt) e são lidos e
+compilados uma única vez por container: cada arquivo vira uma lista de trechos
+literais intercalados com os nomes das variáveis ({{ nome }}), e renderizar é só
+substituir as variáveis e juntar os trechos.
+
+O esqueleto MIME (cabeçalhos, boundary e cabeçalhos das partes) também é
+montado uma vez por tipo; por mensagem só entram o destinatário e os corpos
+codificados em base64.
+"""
+
+import os
+import re
+import html
+import base64
+import secrets
+from datetime import datetime
+from email.header import Header
+from email.utils import formataddr
+
+DIRETORIO_TEMPLATES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+
+_MARCADOR = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+
+# Assunto de cada tipo de e-mail; o tipo também é o nome dos arquivos de template
+ASSUNTOS = {
+    'boas_vindas_candidato': 'Seu Acesso à Plataforma DocFlow Foi Criado!',
+    'criacao_senha': 'Bem-vindo ao DocFlow! Crie sua senha de acesso.',
+}
+
+
+class TemplateCompilado:
+    """Template já dividido em trechos literais e variáveis."""
+
+    def __init__(self, texto, escapar_html=False):
+        partes = _MARCADOR.split(texto)
+        self.literais = partes[0::2]
+        self.variaveis = partes[1::2]
+        self.escapar_html = escapar_html
+
+    def renderizar(self, contexto):
+        saida = [None] * (len(self.literais) + len(self.variaveis))
+        saida[0::2] = self.literais
+        if self.escapar_html:
+            saida[1::2] = [html.escape(str(contexto[nome])) for nome in self.variaveis]
+        else:
+            saida[1::2] = [str(contexto[nome]) for nome in self.variaveis]
+        return ''.join(saida)
+
+
+def _carregar(tipo, extensao, escapar_html):
+    caminho = os.path.join(DIRETORIO_TEMPLATES, f'{tipo}.{extensao}')
+    with open(caminho, encoding='utf-8') as f:
+        return TemplateCompilado(f.read(), escapar_html=escapar_html)
+
+
+class ModeloEmail:
+    """Par de templates (texto e HTML) de um tipo de e-mail, com o esqueleto MIME em cache."""
+
+    # Base64 nunca contém '-' nem '_', então o boundary não colide com os corpos
+    BOUNDARY = f'===============DocFlow_{secrets.token_hex(8)}=='
+
+    def __init__(self, tipo):
+        self.tipo = tipo
+        self.assunto = ASSUNTOS[tipo]
+        self.texto = _carregar(tipo, 'txt', escapar_html=False)
+        self.html = _carregar(tipo, 'html', escapar_html=True)
+
+        b = self.BOUNDARY
+        self._cabecalho = (
+            f'Content-Type: multipart/alternative; boundary="{b}"\n'
+            'MIME-Version: 1.0\n'
+            f'Subject: {Header(self.assunto, "utf-8").encode()}\n'
+        )
+        self._parte_texto = (
+            f'--{b}\n'
+            'Content-Type: text/plain; charset="utf-8"\n'
+            'MIME-Version: 1.0\n'
+            'Content-Transfer-Encoding: base64\n\n'
+        )
+        self._parte_html = (
+            f'--{b}\n'
+            'Content-Type: text/html; charset="utf-8"\n'
+            'MIME-Version: 1.0\n'
+            'Content-Transfer-Encoding: base64\n\n'
+        )
+        self._fim = f'--{b}--\n'
+
+    def renderizar(self, contexto):
+        """Retorna (assunto, corpo_texto, corpo_html)."""
+        contexto = {'ano': datetime.now().year, **contexto}
+        return self.assunto, self.texto.renderizar(contexto), self.html.renderizar(contexto)
+
+    def montar_mensagem(self, remetente, destinatario, contexto):
+        """Mensagem multipart/alternative pronta para o sendmail."""
+        if '\r' in destinatario or '\n' in destinatario:
+            raise ValueError('Destinatário inválido')
+
+        _, corpo_texto, corpo_html = self.renderizar(contexto)
+        return ''.join((
+            self._cabecalho,
+            f'From: {formataddr(("DocFlow", remetente))}\n',
+            f'To: {destinatario}\n\n',
+            self._parte_texto,
+            base64.encodebytes(corpo_texto.encode('utf-8')).decode('ascii'),
+            '\n',
+            self._parte_html,
+            base64.encodebytes(corpo_html.encode('utf-8')).decode('ascii'),
+            '\n',
+            self._fim,
+        ))
+
+
+# Compilados no carregamento do módulo (uma vez por container)
+MODELOS = {tipo: ModeloEmail(tipo) for tipo in ASSUNTOS}
+
+
+def renderizar(tipo, contexto):
+    return MODELOS[tipo].renderizar(contexto)
+
+
+def montar_mensagem(tipo, remetente, destinatario, contexto):
+    """Monta a mensagem MIME (texto + HTML) pronta para o sendmail."""
+    return MODELOS[tipo].montar_mensagem(remetente, destinatario, contexto)
@@ -0,0 +1,212 @@
+"""
+Outbox de e-mails.
+
+Os handlers gravam o e-mail na tabela email_outbox na mesma transação do
+INSERT que o originou (enfileirar_email, ou enfileirar_emails para cadastros
+em lote) e respondem sem falar com o SMTP.
+A Lambda envio-emails drena o outbox em lotes (drenar_outbox), reaproveitando
+uma única sessão SMTP para o lote inteiro.
+
+Estados: PENDENTE -> ENVIADO, ou PENDENTE -> MORTO após OUTBOX_MAX_TENTATIVAS
+falhas (dead letter, para análise manual).
+"""
+
+import os
+import ssl
+import smtplib
+import logging
+
+from psycopg2.extras import Json, execute_values
+
+from comum.emails import montar_mensagem
+
+logger = logging.getLogger()
+
+SMTP_HOST = os.environ.get('SMTP_HOST', 'smtp.gmail.com')
+SMTP_PORT = int(os.environ.get('SMTP_PORT', '587'))
+# starttls | ssl | nenhuma (esta última para servidores locais como o aiosmtpd)
+SMTP_SEGURANCA = os.environ.get('SMTP_SEGURANCA', 'starttls')
+SMTP_TIMEOUT = int(os.environ.get('SMTP_TIMEOUT', '10'))
+EMAIL_USER = os.environ.get('EMAIL_USER')
+EMAIL_PASS = os.environ.get('EMAIL_PASS')
+
+OUTBOX_LOTE = int(os.environ.get('OUTBOX_LOTE', '50'))
+OUTBOX_MAX_TENTATIVAS = int(os.environ.get('OUTBOX_MAX_TENTATIVAS', '5'))
+# Espera antes da próxima tentativa: base * 2^(tentativas - 1)
+OUTBOX_ESPERA_BASE_SEGUNDOS = int(os.environ.get('OUTBOX_ESPERA_BASE_SEGUNDOS', '60'))
+
+
+# INSERT de um e-mail, também usado como CTE em comandos que gravam o
+# registro e o e-mail num único round trip (ver parametros_email)
+SQL_ENFILEIRAR_EMAIL = 'INSERT INTO email_outbox (destinatario, tipo, contexto) VALUES (%s, %s, %s)'
+
+
+def parametros_email(destinatario, tipo, contexto):
+    return (destinatario, tipo, Json(contexto))
+
+
+def enfileirar_email(cur, destinatario, tipo, contexto):
+    """Grava um e-mail no outbox. Deve ser chamada antes do commit da transação."""
+    cur.execute(SQL_ENFILEIRAR_EMAIL, parametros_email(destinatario, tipo, contexto))
+
+
+def enfileirar_emails(cur, emails, page_size=1000):
+    """
+    Grava vários e-mails no outbox com um INSERT por página. `emails` é uma
+    lista de (destinatario, tipo, contexto). Deve ser chamada antes do commit.
+    """
+    execute_values(
+        cur,
+        'INSERT INTO email_outbox (destinatario, tipo, contexto) VALUES %s',
+        [(destinatario, tipo, Json(contexto)) for destinatario, tipo, contexto in emails],
+        page_size=page_size
+    )
+
+
+def abrir_conexao_smtp():
+    """Abre e autentica uma sessão SMTP conforme SMTP_SEGURANCA."""
+    if SMTP_SEGURANCA == 'ssl':
+        servidor = smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT,
+                                    context=ssl.create_default_context())
+    else:
+        servidor = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+        if SMTP_SEGURANCA == 'starttls':
+            servidor.starttls(context=ssl.create_default_context())
+
+    if EMAIL_USER and EMAIL_PASS:
+        servidor.login(EMAIL_USER, EMAIL_PASS)
+    return servidor
+
+
+def _fechar_smtp(servidor):
+    try:
+        servidor.quit()
+    except (smtplib.SMTPException, OSError):
+        servidor.close()
+
+
+class SessaoSMTPPerdida(Exception):
+    """A sessão do lote caiu depois da reconexão, ou não pôde ser reaberta."""
+
+
+class _SessaoLote:
+    """
+    Sessão SMTP de um lote. Se o servidor encerrar a sessão no meio do lote,
+    ela é fechada, reaberta uma única vez e a mensagem atual é reenviada; uma
+    segunda queda levanta SessaoSMTPPerdida.
+    """
+
+    def __init__(self, abrir_smtp):
+        self.abrir_smtp = abrir_smtp
+        self.servidor = abrir_smtp()
+        self.reconectada = False
+
+    def enviar(self, remetente, destinatario, mensagem):
+        try:
+            self.servidor.sendmail(remetente, destinatario, mensagem)
+        except smtplib.SMTPServerDisconnected as e:
+            if self.reconectada:
+                raise SessaoSMTPPerdida(f"Sessão SMTP encerrada de novo após reconectar: {e}")
+            logger.warning(f"Sessão SMTP encerrada, reconectando: {e}")
+            self.reconectada = True
+            self.fechar()
+            try:
+                self.servidor = self.abrir_smtp()
+            except (smtplib.SMTPException, OSError) as erro:
+                raise SessaoSMTPPerdida(f"Falha ao reconectar no SMTP: {erro}")
+            self.enviar(remetente, destinatario, mensagem)
+
+    def fechar(self):
+        if self.servidor is not None:
+            _fechar_smtp(self.servidor)
+            self.servidor = None
+
+
+def drenar_outbox(conn, lote=OUTBOX_LOTE, abrir_smtp=abrir_conexao_smtp, remetente=None):
+    """
+    Envia até `lote` e-mails pendentes usando uma única sessão SMTP.
+
+    As linhas são travadas com FOR UPDATE SKIP LOCKED, então execuções
+    concorrentes da Lambda não enviam o mesmo e-mail duas vezes.
+    Retorna um resumo {'enviados': n, 'falhas': n, 'mortos': n}.
+    """
+    remetente = remetente or EMAIL_USER
+    resumo = {'enviados': 0, 'falhas': 0, 'mortos': 0}
+
+    with conn.cursor() as cur:
+        cur.execute(
+            '''
+            SELECT id, destinatario, tipo, contexto, tentativas
+            FROM email_outbox
+            WHERE status = 'PENDENTE' AND proxima_tentativa <= now()
+            ORDER BY id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+            ''',
+            (lote,)
+        )
+        itens = cur.fetchall()
+        if not itens:
+            conn.commit()
+            return resumo
+
+        logger.info(f"Drenando {len(itens)} e-mail(s) do outbox")
+        enviados = []
+        falhas = []  # (id, tentativas, erro)
+
+        sessao = None
+        try:
+            sessao = _SessaoLote(abrir_smtp)
+        except (smtplib.SMTPException, OSError) as e:
+            logger.error(f"Falha ao conectar no SMTP {SMTP_HOST}:{SMTP_PORT}: {e}", exc_info=True)
+            falhas = [(item[0], item[4], str(e)) for item in itens]
+
+        if sessao is not None:
+            try:
+                for id_email, destinatario, tipo, contexto, tentativas in itens:
+                    try:
+                        mensagem = montar_mensagem(tipo, remetente, destinatario, contexto)
+                        sessao.enviar(remetente, destinatario, mensagem)
+                        enviados.append(id_email)
+                    except SessaoSMTPPerdida:
+                        raise
+                    except Exception as e:
+                        logger.error(f"Falha ao enviar e-mail {id_email} para {destinatario}: {e}")
+                        falhas.append((id_email, tentativas, str(e)))
+            except SessaoSMTPPerdida as e:
+                # O e-mail atual e o restante do lote contam uma tentativa e
+                # voltam na próxima execução
+                logger.error(f"{e}; encerrando o lote")
+                processados = set(enviados) | {f[0] for f in falhas}
+                falhas.extend((item[0], item[4], str(e)) for item in itens if item[0] not in processados)
+            finally:
+                sessao.fechar()
+
+        if enviados:
+            cur.execute(
+                "UPDATE email_outbox SET status = 'ENVIADO', enviado_em = now(), "
+                "tentativas = tentativas + 1, ultimo_erro = NULL WHERE id = ANY(%s)",
+                (enviados,)
+            )
+            resumo['enviados'] = len(enviados)
+
+        for id_email, tentativas, erro in falhas:
+            tentativas += 1
+            if tentativas >= OUTBOX_MAX_TENTATIVAS:
+                cur.execute(
+                    "UPDATE email_outbox SET status = 'MORTO', tentativas = %s, ultimo_erro = %s WHERE id = %s",
+                    (tentativas, erro[:1000], id_email)
+                )
+                resumo['mortos'] += 1
+            else:
+                espera = OUTBOX_ESPERA_BASE_SEGUNDOS * 2 ** (tentativas - 1)
+                cur.execute(
+                    "UPDATE email_outbox SET tentativas = %s, ultimo_erro = %s, "
+                    "proxima_tentativa = now() + %s * interval '1 second' WHERE id = %s",
+                    (tentativas, erro[:1000], espera, id_email)
+                )
+                resumo['falhas'] += 1
+
+    conn.commit()
+    logger.info(f"Outbox drenado: {resumo}")
+    return resumo
@@ -0,0 +1,112 @@
+"""
+Paginação por chave (keyset) para os endpoints de listagem.
+
+Em vez de OFFSET, cada página continua a partir da última chave de ordenação
+retornada, codificada num cursor opaco (base64 de um JSON). As linhas são lidas
+por um cursor nomeado (server-side), então o Postgres entrega no máximo
+limite + 1 linhas e a Lambda nunca materializa a tabela inteira.
+"""
+
+import os
+import json
+import uuid
+import base64
+import binascii
+
+LIMITE_PADRAO = int(os.environ.get('PAGINACAO_LIMITE_PADRAO', '100'))
+LIMITE_MAXIMO = int(os.environ.get('PAGINACAO_LIMITE_MAXIMO', '1000'))
+
+
+class CursorInvalido(ValueError):
+    """Cursor ou limite de paginação malformado."""
+
+
+def codificar_cursor(chave):
+    texto = json.dumps(list(chave), separators=(',', ':'))
+    return base64.urlsafe_b64encode(texto.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _do_tipo(valor, tipo):
+    # bool é subclasse de int, mas true/false não é um id válido
+    return isinstance(valor, tipo) and not isinstance(valor, bool)
+
+
+def decodificar_cursor(cursor, tipos_chave):
+    """
+    Decodifica o cursor e confere cada elemento contra `tipos_chave` (uma
+    tupla de tipos, na ordem da chave), para que um cursor forjado não chegue
+    ao SQL com um tipo que o Postgres recusaria.
+    """
+    try:
+        preenchimento = '=' * (-len(cursor) % 4)
+        chave = json.loads(base64.urlsafe_b64decode(cursor + preenchimento))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        raise CursorInvalido('Cursor de paginação inválido.')
+    if not isinstance(chave, list) or len(chave) != len(tipos_chave):
+        raise CursorInvalido('Cursor de paginação inválido.')
+    if not all(_do_tipo(valor, tipo) for valor, tipo in zip(chave, tipos_chave)):
+        raise CursorInvalido('Cursor de paginação inválido.')
+    return chave
+
+
+def ler_parametros(query_params, tipos_chave):
+    """
+    Lê limit, cursor e incluir_total da query string. `tipos_chave` são os
+    tipos da chave de ordenação, ex.: (int,) para "ORDER BY id".
+
+    Retorna (limite, chave_ou_None, incluir_total).
+    """
+    query_params = query_params or {}
+
+    limite = query_params.get('limit')
+    if limite is None:
+        limite = LIMITE_PADRAO
+    else:
+        try:
+            limite = int(limite)
+        except (TypeError, ValueError):
+            raise CursorInvalido("O parâmetro 'limit' deve ser um número inteiro.")
+        if limite < 1:
+            raise CursorInvalido("O parâmetro 'limit' deve ser maior que zero.")
+        limite = min(limite, LIMITE_MAXIMO)
+
+    cursor = query_params.get('cursor')
+    chave = decodificar_cursor(cursor, tipos_chave) if cursor else None
+
+    incluir_total = str(query_params.get('incluir_total', '')).lower() in ('1', 'true', 'sim')
+    return limite, chave, incluir_total
+
+
+def buscar_pagina(conn, sql, params, limite, chave_da_linha):
+    """
+    Executa `sql` num cursor server-side e retorna (linhas, proximo_cursor).
+
+    A consulta deve terminar em "ORDER BY <chave> LIMIT %s"; o limite é
+    acrescentado aos params como limite + 1 para saber se existe próxima página.
+    `chave_da_linha` extrai da linha a tupla de ordenação usada no cursor.
+    """
+    with conn.cursor(name=f'pagina_{uuid.uuid4().hex}') as cur:
+        cur.itersize = limite + 1
+        cur.execute(sql, list(params) + [limite + 1])
+        linhas = cur.fetchmany(limite + 1)
+
+    proximo_cursor = None
+    if len(linhas) > limite:
+        linhas = linhas[:limite]
+        proximo_cursor = codificar_cursor(chave_da_linha(linhas[-1]))
+    return linhas, proximo_cursor
+
+
+def contar_total(cur, sql_contagem, params):
+    cur.execute(sql_contagem, params)
+    return cur.fetchone()[0]
+
+
+def cabecalhos_paginacao(proximo_cursor, total=None):
+    """Cabeçalhos usados pelos endpoints que continuam devolvendo uma lista JSON."""
+    cabecalhos = {'Access-Control-Expose-Headers': 'X-Proximo-Cursor, X-Total-Count'}
+    if proximo_cursor:
+        cabecalhos['X-Proximo-Cursor'] = proximo_cursor
+    if total is not None:
+        cabecalhos['X-Total-Count'] = str(total)
+    return cabecalhos
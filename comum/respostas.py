@@ -0,0 +1,117 @@
+"""
+Cache de respostas GET com ETag, para indicadores que mudam devagar.
+
+A resposta fica em memória (CacheTTL) por rota + empresa, com um ETag forte
+(SHA-256 do corpo). Requisições com If-None-Match igual ao ETag em cache
+recebem 304 sem consultar o Postgres.
+
+Quando um canal é informado, o cache escuta (LISTEN) as notificações do
+trigger de documentos_candidatos (migrations/0004_resumo_documentos.sql), que trazem a
+empresa afetada como payload, e descarta as respostas dessa empresa e as sem
+filtro. O TTL é a rede de segurança caso alguma notificação se perca.
+"""
+
+import os
+import json
+import hashlib
+import logging
+
+import psycopg2
+
+from comum.cache import CacheTTL
+from comum.db import OuvinteNotificacoes
+
+logger = logging.getLogger()
+
+RESPOSTAS_CACHE_TTL_SEGUNDOS = float(os.environ.get('RESPOSTAS_CACHE_TTL_SEGUNDOS', '60'))
+RESPOSTAS_CACHE_MAX = int(os.environ.get('RESPOSTAS_CACHE_MAX', '256'))
+
+# Canal em que o trigger do resumo de documentos avisa as mudanças
+CANAL_DOCUMENTOS = 'documentos_resumo'
+
+
+def calcular_etag(corpo):
+    return '"' + hashlib.sha256(corpo.encode('utf-8')).hexdigest() + '"'
+
+
+def _etags_pedidas(event):
+    headers = event.get('headers') or {}
+    valor = next((v for k, v in headers.items() if k.lower() == 'if-none-match'), None)
+    if not valor:
+        return set()
+    # If-None-Match usa comparação fraca: W/"x" casa com "x"
+    etags = set()
+    for parte in valor.split(','):
+        parte = parte.strip()
+        etags.add(parte[2:] if parte.startswith('W/') else parte)
+    return etags
+
+
+class CacheRespostas:
+    """
+    Respostas JSON em cache por chave (ex.: (rota, empresa)).
+
+    Uso típico no handler:
+
+        resposta = cache.responder_do_cache(event, chave)
+        if resposta is not None:
+            return resposta
+        ...consulta o banco...
+        return cache.responder(event, chave, dados)
+    """
+
+    def __init__(self, canal=None, ttl=RESPOSTAS_CACHE_TTL_SEGUNDOS, maximo=RESPOSTAS_CACHE_MAX,
+                 cabecalhos=None):
+        self.cache = CacheTTL(maximo=maximo, ttl=ttl)
+        self.ouvinte = OuvinteNotificacoes(canal) if canal else None
+        self.cabecalhos = {'Content-Type': 'application/json', **(cabecalhos or {})}
+
+    def aplicar_invalidacoes(self):
+        """Descarta as respostas das empresas notificadas desde a última chamada."""
+        if self.ouvinte is None:
+            return
+        try:
+            empresas, reiniciado = self.ouvinte.consumir()
+        except psycopg2.Error as e:
+            logger.warning(f"Falha ao ler notificações de {self.ouvinte.canal}, limpando o cache: {e}")
+            self.cache.limpar()
+            return
+
+        if reiniciado:
+            # Notificações anteriores à conexão atual podem ter sido perdidas
+            self.cache.limpar()
+        elif empresas:
+            empresas = set(empresas)
+            # Respostas sem filtro de empresa agregam todas, então também caem
+            self.cache.remover_onde(lambda chave, _: chave[-1] is None or chave[-1] in empresas)
+
+    def _montar(self, event, corpo, etag):
+        headers = {
+            **self.cabecalhos,
+            'ETag': etag,
+            # O navegador guarda, mas revalida sempre com If-None-Match
+            'Cache-Control': 'no-cache',
+        }
+        if 'Access-Control-Allow-Origin' in headers:
+            headers['Access-Control-Expose-Headers'] = 'ETag'
+
+        pedidas = _etags_pedidas(event)
+        if etag in pedidas or '*' in pedidas:
+            return {'statusCode': 304, 'body': '', 'headers': headers}
+        return {'statusCode': 200, 'body': corpo, 'headers': headers}
+
+    def responder_do_cache(self, event, chave):
+        """Resposta (200 ou 304) a partir do cache, ou None se for preciso consultar o banco."""
+        self.aplicar_invalidacoes()
+        item = self.cache.obter(chave)
+        if item is None:
+            return None
+        corpo, etag = item
+        return self._montar(event, corpo, etag)
+
+    def responder(self, event, chave, dados):
+        """Serializa os dados, guarda no cache e monta a resposta (200 ou 304)."""
+        corpo = json.dumps(dados)
+        etag = calcular_etag(corpo)
+        self.cache.definir(chave, (corpo, etag))
+        return self._montar(event, corpo, etag)
@@ -0,0 +1,136 @@
+"""
+Roteamento por tabela para os handlers HTTP das Lambdas.
+
+Rotas estáticas ficam num dicionário (lookup O(1) por método + caminho) e
+rotas com parâmetros, como /usuarios/{id}/senha, são compiladas uma única vez
+em expressões regulares. Cada despacho registra duração, status, tamanho da
+resposta e, quando a conexão conta comandos (comum.db.ConexaoContadora),
+quantos comandos SQL a rota executou.
+"""
+
+import re
+import json
+import time
+import logging
+
+logger = logging.getLogger()
+
+_PARAMETRO = re.compile(r'\{(\w+)\}')
+
+
+class Roteador:
+    """
+    Tabela de rotas de uma Lambda.
+
+    Uso:
+        roteador = Roteador('candidatos')
+
+        @roteador.rota('POST', '/candidatos')
+        def criar_candidato(event, data, conn, cur):
+            ...
+
+        resposta = roteador.despachar(event, data, conn, cur)
+
+    Os argumentos extras de despachar() são repassados para a função da rota,
+    seguidos dos parâmetros do caminho como argumentos nomeados.
+    """
+
+    def __init__(self, nome):
+        self.nome = nome
+        self._estaticas = {}  # (metodo, caminho) -> funcao
+        self._dinamicas = []  # (metodo, regex, template, funcao)
+        self._metricas = {}
+
+    def rota(self, metodo, caminho):
+        metodo = metodo.upper()
+
+        def registrar(funcao):
+            if '{' in caminho:
+                padrao = '^' + _PARAMETRO.sub(r'(?P<\1>[^/]+)', caminho) + '$'
+                self._dinamicas.append((metodo, re.compile(padrao), caminho, funcao))
+            else:
+                self._estaticas[(metodo, caminho)] = (caminho, funcao)
+            return funcao
+
+        return registrar
+
+    def resolver(self, metodo, caminho):
+        """Retorna (template, funcao, parametros) ou None se nenhuma rota casar."""
+        encontrada = self._estaticas.get((metodo, caminho))
+        if encontrada:
+            return encontrada[0], encontrada[1], {}
+
+        for metodo_rota, regex, template, funcao in self._dinamicas:
+            if metodo_rota != metodo:
+                continue
+            match = regex.match(caminho)
+            if match:
+                return template, funcao, match.groupdict()
+        return None
+
+    def despachar(self, event, *args):
+        """
+        Executa a rota correspondente ao evento e devolve a resposta.
+
+        Retorna None quando nenhuma rota casa, para que cada Lambda mantenha
+        sua própria resposta 404.
+        """
+        metodo = event.get('requestContext', {}).get('http', {}).get('method', '')
+        caminho = event.get('rawPath', '')
+
+        resolvida = self.resolver(metodo, caminho)
+        if resolvida is None:
+            return None
+        template, funcao, parametros = resolvida
+
+        # Conexão entre os argumentos, se ela contar os comandos executados
+        conexao = next((a for a in args if isinstance(getattr(a, 'comandos', None), int)), None)
+        comandos_inicio = conexao.comandos if conexao is not None else None
+
+        inicio = time.perf_counter()
+        status = 500
+        tamanho = 0
+        try:
+            resposta = funcao(event, *args, **parametros)
+            status = resposta.get('statusCode', 200)
+            corpo = resposta.get('body')
+            tamanho = len(corpo.encode('utf-8')) if isinstance(corpo, str) else 0
+            return resposta
+        finally:
+            duracao_ms = (time.perf_counter() - inicio) * 1000
+            comandos = conexao.comandos - comandos_inicio if conexao is not None else None
+            self._registrar(f'{metodo} {template}', status, duracao_ms, tamanho, comandos)
+
+    def _registrar(self, rota, status, duracao_ms, tamanho, comandos=None):
+        metrica = self._metricas.setdefault(rota, {
+            'chamadas': 0,
+            'duracao_total_ms': 0.0,
+            'duracao_max_ms': 0.0,
+            'bytes_total': 0,
+            'comandos_total': 0,
+            'status': {},
+        })
+        metrica['chamadas'] += 1
+        metrica['duracao_total_ms'] += duracao_ms
+        metrica['duracao_max_ms'] = max(metrica['duracao_max_ms'], duracao_ms)
+        metrica['bytes_total'] += tamanho
+        metrica['comandos_total'] += comandos or 0
+        metrica['status'][status] = metrica['status'].get(status, 0) + 1
+
+        # Uma linha JSON por requisição facilita consultas no CloudWatch Logs Insights
+        logger.info(json.dumps({
+            'metrica': 'rota',
+            'lambda': self.nome,
+            'rota': rota,
+            'status': status,
+            'duracao_ms': round(duracao_ms, 2),
+            'bytes': tamanho,
+            'comandos_sql': comandos,
+        }))
+
+    def metricas(self):
+        """Métricas acumuladas por rota desde o início do container."""
+        return {
+            rota: {**m, 'duracao_media_ms': m['duracao_total_ms'] / m['chamadas'], 'status': dict(m['status'])}
+            for rota, m in self._metricas.items()
+        }
@@ -0,0 +1,86 @@
+"""
+Escopo por empresa e validação dos tokens: roles não globais sem empresa são
+recusadas (403) e tokens com JSON fora do formato esperado voltam 401, não 500.
+"""
+
+import hmac
+import json
+import time
+import hashlib
+
+import pytest
+
+from comum import autenticacao
+from comum.autenticacao import NaoAutorizado, _b64url, emitir_token, escopo_empresa, verificar_token
+
+
+@pytest.fixture(autouse=True)
+def chave_de_teste(monkeypatch):
+    monkeypatch.setattr(autenticacao, '_chaves', {'padrao': b'segredo-de-teste'})
+    monkeypatch.setattr(autenticacao, 'JWT_KID_ATUAL', 'padrao')
+    monkeypatch.setattr(autenticacao, 'AUTH_OBRIGATORIA', False)
+
+
+def evento(token=None):
+    return {'headers': {'authorization': f'Bearer {token}'} if token else {}}
+
+
+def assinar(cabecalho, claims):
+    """Token assinado com a chave de teste a partir de JSON arbitrário."""
+    assinado = '.'.join(_b64url(json.dumps(parte).encode('utf-8')) for parte in (cabecalho, claims))
+    assinatura = hmac.new(b'segredo-de-teste', assinado.encode('ascii'), hashlib.sha256).digest()
+    return f'{assinado}.{_b64url(assinatura)}'
+
+
+def test_role_global_usa_empresa_pedida():
+    token = emitir_token(1, 'admin@exemplo.com', 'admin', 'acme')
+    assert escopo_empresa(evento(token), 'outra') == 'outra'
+    assert escopo_empresa(evento(token), None) is None
+
+
+def test_role_restrita_usa_empresa_do_token():
+    token = emitir_token(2, 'rh@exemplo.com', 'rh', 'acme')
+    assert escopo_empresa(evento(token), 'outra') == 'acme'
+    assert escopo_empresa(evento(token), None) == 'acme'
+
+
+@pytest.mark.parametrize('empresa', [None, ''])
+def test_role_restrita_sem_empresa_recusada(empresa):
+    token = emitir_token(3, 'rh@exemplo.com', 'rh', empresa)
+    with pytest.raises(NaoAutorizado) as erro:
+        escopo_empresa(evento(token), None)
+    assert erro.value.status == 403
+
+
+def test_sem_token(monkeypatch):
+    assert escopo_empresa(evento(), 'acme') == 'acme'
+    assert escopo_empresa(evento(), None) is None
+
+    monkeypatch.setattr(autenticacao, 'AUTH_OBRIGATORIA', True)
+    with pytest.raises(NaoAutorizado) as erro:
+        escopo_empresa(evento(), 'acme')
+    assert erro.value.status == 401
+
+
+CLAIMS = {'iss': autenticacao.JWT_EMISSOR, 'role': 'rh', 'empresa': 'acme'}
+
+
+@pytest.mark.parametrize('cabecalho, claims', [
+    ([], CLAIMS),
+    ('x', CLAIMS),
+    ({'alg': 'HS256'}, []),
+    ({'alg': 'HS256'}, 'x'),
+    ({'alg': 'HS256'}, {**CLAIMS, 'exp': 'amanhã'}),
+    ({'alg': 'HS256'}, {**CLAIMS, 'exp': None}),
+    ({'alg': 'HS256'}, {**CLAIMS, 'exp': True}),
+])
+def test_token_malformado(cabecalho, claims):
+    with pytest.raises(NaoAutorizado) as erro:
+        verificar_token(assinar(cabecalho, claims))
+    assert str(erro.value) == 'Token malformado'
+    assert erro.value.status == 401
+
+
+def test_token_valido():
+    claims = verificar_token(assinar({'alg': 'HS256'}, {**CLAIMS, 'exp': time.time() + 60}))
+    assert claims['empresa'] == 'acme'
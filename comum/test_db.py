@@ -0,0 +1,114 @@
+"""
+Pool de conexões: uma conexão ociosa derrubada pelo servidor (failover ou
+restart do RDS) é descartada e trocada por uma nova antes de chegar ao handler,
+mesmo dentro da janela em que o SELECT 1 não é feito.
+"""
+
+import socket
+from types import SimpleNamespace
+
+import psycopg2
+import psycopg2.extensions
+import pytest
+
+from comum.db import PoolConexoes
+
+
+class ConexaoSocket:
+    """Conexão falsa com um socket de verdade; `servidor` é a outra ponta."""
+
+    def __init__(self):
+        self.sock, self.servidor = socket.socketpair()
+        self.closed = 0
+        self.comandos = []
+        self.info = SimpleNamespace(transaction_status=psycopg2.extensions.TRANSACTION_STATUS_IDLE)
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def derrubar(self):
+        """Como o servidor ao encerrar a sessão: manda o FATAL e fecha o TCP."""
+        self.servidor.sendall(b'E...FATAL')
+        self.servidor.close()
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql):
+        self.comandos.append(sql)
+        if self.servidor.fileno() == -1:
+            raise psycopg2.OperationalError('server closed the connection unexpectedly')
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+        self.sock.close()
+        if self.servidor.fileno() != -1:
+            self.servidor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = PoolConexoes(maximo_ociosas=2, validar_apos=30)
+    novas = []
+
+    def nova_conexao():
+        conn = ConexaoSocket()
+        novas.append(conn)
+        pool._stats['criadas'] += 1
+        return conn
+
+    monkeypatch.setattr(pool, '_nova_conexao', nova_conexao)
+    pool.novas = novas
+    yield pool
+    for conn in novas:
+        if not conn.closed:
+            conn.close()
+
+
+def test_conexao_ociosa_viva_e_reaproveitada_sem_round_trip(pool):
+    conn = pool.obter()
+    pool.devolver(conn)
+
+    assert pool.obter() is conn
+    assert conn.comandos == []
+    assert pool.estatisticas()['reutilizadas'] == 1
+
+
+def test_conexao_derrubada_e_trocada_por_uma_nova(pool):
+    conn = pool.obter()
+    pool.devolver(conn)
+    conn.derrubar()
+
+    nova = pool.obter()
+
+    assert nova is not conn
+    assert conn.closed
+    assert conn.comandos == ['SELECT 1']
+    stats = pool.estatisticas()
+    assert stats['criadas'] == 2
+    assert stats['falhas_validacao'] == 1
+    assert stats['descartadas'] == 1
+    assert stats['em_uso'] == 1
+
+
+def test_todas_as_ociosas_derrubadas(pool):
+    a, b = pool.obter(), pool.obter()
+    pool.devolver(a)
+    pool.devolver(b)
+    a.derrubar()
+    b.derrubar()
+
+    nova = pool.obter()
+
+    assert nova not in (a, b)
+    assert a.closed and b.closed
+    assert pool.estatisticas()['ociosas'] == 0
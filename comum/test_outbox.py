@@ -0,0 +1,151 @@
+"""
+drenar_outbox com um servidor SMTP falso: lote numa única sessão, queda no
+meio do lote (reconecta uma vez e reenvia o e-mail atual; uma segunda queda
+encerra o lote) e contagem de tentativas das falhas.
+"""
+
+import smtplib
+
+import pytest
+
+from conftest import ConexaoFalsa
+from comum import outbox
+
+
+class ServidorFalso:
+    """smtplib.SMTP falso; `quedas` são os números dos envios que derrubam a sessão."""
+
+    def __init__(self, smtp, quedas=()):
+        self.smtp = smtp
+        self.quedas = set(quedas)
+        self.tentativas = 0
+        self.fechado = False
+
+    def sendmail(self, remetente, destinatario, mensagem):
+        self.tentativas += 1
+        if self.fechado:
+            raise smtplib.SMTPServerDisconnected('please run connect() first')
+        if self.tentativas in self.quedas:
+            self.fechado = True
+            raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+        if destinatario in self.smtp.recusados:
+            raise smtplib.SMTPRecipientsRefused({destinatario: (550, b'no such user')})
+        self.smtp.entregues.append(destinatario)
+
+    def quit(self):
+        if self.fechado:
+            raise smtplib.SMTPServerDisconnected('please run connect() first')
+        self.fechado = True
+
+    def close(self):
+        self.fechado = True
+
+
+class SMTPFalso:
+    """Fábrica passada como abrir_smtp; cada sessão recebe as quedas da vez."""
+
+    def __init__(self, *quedas_por_sessao, recusados=()):
+        self.quedas_por_sessao = list(quedas_por_sessao)
+        self.recusados = set(recusados)
+        self.sessoes = []
+        self.entregues = []
+
+    def __call__(self):
+        quedas = self.quedas_por_sessao.pop(0) if self.quedas_por_sessao else ()
+        if quedas is None:
+            raise ConnectionRefusedError('conexão recusada')
+        servidor = ServidorFalso(self, quedas)
+        self.sessoes.append(servidor)
+        return servidor
+
+
+CONTEXTO = {'nome_usuario': 'Ana', 'link_criar_senha': 'https://x/', 'ano': 2026}
+
+
+def pendentes(*itens):
+    """Linhas do SELECT do outbox: (id, destinatário, tentativas)."""
+    return [
+        (id_email, destinatario, 'criacao_senha', CONTEXTO, tentativas)
+        for id_email, destinatario, tentativas in itens
+    ]
+
+
+def drenar(smtp, itens):
+    conn = ConexaoFalsa(itens)
+    resumo = outbox.drenar_outbox(conn, abrir_smtp=smtp, remetente='docflow@exemplo.com')
+    falhas = {
+        vars_[-1]: vars_[0]
+        for query, vars_ in conn.executados
+        if 'tentativas = %s' in query
+    }
+    return resumo, falhas, conn
+
+
+LOTE = pendentes((1, 'a@x.com', 0), (2, 'b@x.com', 0), (3, 'c@x.com', 0), (4, 'd@x.com', 0))
+
+
+def test_lote_numa_unica_sessao():
+    smtp = SMTPFalso()
+    resumo, falhas, conn = drenar(smtp, LOTE)
+
+    assert resumo == {'enviados': 4, 'falhas': 0, 'mortos': 0}
+    assert smtp.entregues == ['a@x.com', 'b@x.com', 'c@x.com', 'd@x.com']
+    assert len(smtp.sessoes) == 1 and smtp.sessoes[0].fechado
+    assert conn.commits == 1
+
+
+def test_queda_no_meio_do_lote_reenvia_o_email_atual():
+    smtp = SMTPFalso({2})
+    resumo, falhas, _ = drenar(smtp, LOTE)
+
+    assert resumo == {'enviados': 4, 'falhas': 0, 'mortos': 0}
+    assert smtp.entregues == ['a@x.com', 'b@x.com', 'c@x.com', 'd@x.com']
+    assert len(smtp.sessoes) == 2
+    assert all(servidor.fechado for servidor in smtp.sessoes)
+
+
+def test_segunda_queda_encerra_o_lote():
+    smtp = SMTPFalso({2}, {2})
+    resumo, falhas, _ = drenar(smtp, LOTE)
+
+    # a e b (reenviado) saem; c derruba a sessão nova e fica com d para depois
+    assert smtp.entregues == ['a@x.com', 'b@x.com']
+    assert resumo == {'enviados': 2, 'falhas': 2, 'mortos': 0}
+    assert falhas == {3: 1, 4: 1}
+    assert len(smtp.sessoes) == 2
+
+
+def test_reconexao_recusada_encerra_o_lote():
+    smtp = SMTPFalso({3}, None)
+    resumo, falhas, _ = drenar(smtp, LOTE)
+
+    assert smtp.entregues == ['a@x.com', 'b@x.com']
+    assert falhas == {3: 1, 4: 1}
+    assert smtp.sessoes[0].fechado
+
+
+def test_falha_de_um_destinatario_nao_derruba_o_lote():
+    smtp = SMTPFalso(recusados={'b@x.com'})
+    resumo, falhas, _ = drenar(smtp, LOTE)
+
+    assert resumo == {'enviados': 3, 'falhas': 1, 'mortos': 0}
+    assert falhas == {2: 1}
+    assert len(smtp.sessoes) == 1
+
+
+def test_contagem_de_tentativas(monkeypatch):
+    monkeypatch.setattr(outbox, 'OUTBOX_MAX_TENTATIVAS', 3)
+    itens = pendentes((1, 'a@x.com', 0), (2, 'b@x.com', 1), (3, 'c@x.com', 2))
+    resumo, falhas, conn = drenar(SMTPFalso(None), itens)
+
+    assert resumo == {'enviados': 0, 'falhas': 2, 'mortos': 1}
+    assert falhas == {1: 1, 2: 2, 3: 3}
+    mortos = [vars_ for query, vars_ in conn.executados if "status = 'MORTO'" in query]
+    assert [vars_[-1] for vars_ in mortos] == [3]
+
+
+@pytest.mark.parametrize('quedas', [set(), {1}, {4}])
+def test_sessoes_sempre_fechadas(quedas):
+    smtp = SMTPFalso(quedas)
+    drenar(smtp, LOTE)
+    assert all(servidor.fechado for servidor in smtp.sessoes)
@@ -0,0 +1,118 @@
+"""
+Cursor de paginação: ida e volta, cursores adulterados (400 nos handlers via
+CursorInvalido) e os limites de página de buscar_pagina.
+"""
+
+import json
+import base64
+
+import pytest
+
+from comum.paginacao import (
+    CursorInvalido, codificar_cursor, decodificar_cursor, ler_parametros, buscar_pagina
+)
+
+
+def forjar(valor):
+    return base64.urlsafe_b64encode(json.dumps(valor).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+@pytest.mark.parametrize('chave, tipos', [
+    ((42,), (int,)),
+    (('Ana Souza', 'rg.pdf', 7), (str, str, int)),
+    (('documentos/ção ü.pdf',), (str,)),
+])
+def test_ida_e_volta(chave, tipos):
+    assert decodificar_cursor(codificar_cursor(chave), tipos) == list(chave)
+
+
+@pytest.mark.parametrize('cursor', [
+    forjar([{'a': 1}]),
+    forjar(['x']),
+    forjar([True]),
+    forjar([1.5]),
+    forjar([None]),
+    forjar([1, 2]),
+    forjar({'id': 1}),
+    forjar(1),
+    'não é base64!',
+    base64.urlsafe_b64encode(b'\xff\xfe').decode('ascii'),
+    codificar_cursor((42,))[:-2],
+])
+def test_cursor_adulterado(cursor):
+    with pytest.raises(CursorInvalido):
+        decodificar_cursor(cursor, (int,))
+
+
+def test_cursor_composto_confere_cada_tipo():
+    with pytest.raises(CursorInvalido):
+        decodificar_cursor(forjar(['Ana', 'rg.pdf', 'x']), (str, str, int))
+    with pytest.raises(CursorInvalido):
+        decodificar_cursor(forjar([1, 'rg.pdf', 7]), (str, str, int))
+
+
+@pytest.mark.parametrize('limit', ['abc', '0', '-1'])
+def test_limite_invalido(limit):
+    with pytest.raises(CursorInvalido):
+        ler_parametros({'limit': limit}, (int,))
+
+
+def test_ler_parametros():
+    cursor = codificar_cursor((10,))
+    assert ler_parametros({'limit': '5', 'cursor': cursor, 'incluir_total': 'sim'}, (int,)) == (5, [10], True)
+    assert ler_parametros(None, (int,))[1:] == (None, False)
+
+
+class CursorNomeado:
+    def __init__(self, linhas):
+        self.linhas = linhas
+        self.parametros = None
+
+    def execute(self, sql, parametros):
+        self.parametros = parametros
+
+    def fetchmany(self, quantidade):
+        return self.linhas[:quantidade]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class ConexaoNomeada:
+    """Só as linhas depois da chave pedida, como o WHERE id > %s faria."""
+
+    def __init__(self, ids):
+        self.ids = ids
+        self.cur = None
+
+    def cursor(self, name=None):
+        self.cur = CursorNomeado([(i,) for i in self.ids])
+        return self.cur
+
+
+def paginas(ids, limite):
+    """Percorre todas as páginas seguindo o cursor devolvido."""
+    vistas, chave = [], None
+    while True:
+        restantes = [i for i in ids if chave is None or i > chave[0]]
+        conn = ConexaoNomeada(restantes)
+        linhas, proximo = buscar_pagina(conn, 'SELECT id ... LIMIT %s', [], limite, lambda r: (r[0],))
+        assert conn.cur.parametros == [limite + 1]
+        vistas.append([r[0] for r in linhas])
+        if proximo is None:
+            return vistas
+        chave = decodificar_cursor(proximo, (int,))
+
+
+@pytest.mark.parametrize('quantidade, limite, esperado', [
+    (0, 3, [[]]),
+    (2, 3, [[1, 2]]),
+    (3, 3, [[1, 2, 3]]),
+    (4, 3, [[1, 2, 3], [4]]),
+    (6, 3, [[1, 2, 3], [4, 5, 6]]),
+])
+def test_limites_de_pagina(quantidade, limite, esperado):
+    assert paginas(list(range(1, quantidade + 1)), limite) == esperado
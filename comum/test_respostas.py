@@ -0,0 +1,119 @@
+"""
+CacheRespostas: ETag forte com If-None-Match (304), expiração pelo TTL e
+invalidação pelas notificações do trigger do resumo de documentos, que
+derrubam a empresa notificada e as respostas sem filtro.
+"""
+
+import json
+
+import psycopg2
+import pytest
+
+from comum.respostas import CacheRespostas, calcular_etag
+
+
+class OuvinteFalso:
+    canal = 'documentos_resumo'
+
+    def __init__(self):
+        self.notificacoes = []
+        self.reiniciado = False
+        self.erro = None
+
+    def consumir(self):
+        if self.erro:
+            raise self.erro
+        empresas, self.notificacoes = self.notificacoes, []
+        reiniciado, self.reiniciado = self.reiniciado, False
+        return empresas, reiniciado
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+@pytest.fixture
+def cache():
+    cache = CacheRespostas(ttl=60, cabecalhos={'Access-Control-Allow-Origin': '*'})
+    cache.ouvinte = OuvinteFalso()
+    cache.relogio = cache.cache._relogio = Relogio()
+    return cache
+
+
+def evento(etag=None):
+    return {'headers': {'If-None-Match': etag} if etag else {}}
+
+
+def preencher(cache, *chaves):
+    for chave in chaves:
+        cache.responder(evento(), chave, {'chave': list(chave)})
+
+
+def em_cache(cache, *chaves):
+    return [chave for chave in chaves if cache.responder_do_cache(evento(), chave) is not None]
+
+
+def test_etag_e_cabecalhos(cache):
+    resposta = cache.responder(evento(), ('/resumo', 'acme'), {'total': 1})
+
+    assert resposta['statusCode'] == 200
+    assert resposta['headers']['ETag'] == calcular_etag(json.dumps({'total': 1}))
+    assert resposta['headers']['Cache-Control'] == 'no-cache'
+    assert resposta['headers']['Access-Control-Expose-Headers'] == 'ETag'
+    assert resposta['headers']['Content-Type'] == 'application/json'
+
+
+@pytest.mark.parametrize('if_none_match, status', [
+    ('{etag}', 304),
+    ('W/{etag}', 304),
+    ('"outro", {etag}', 304),
+    ('*', 304),
+    ('"outro"', 200),
+])
+def test_if_none_match(cache, if_none_match, status):
+    etag = cache.responder(evento(), ('/resumo', None), {'total': 1})['headers']['ETag']
+    resposta = cache.responder_do_cache(evento(if_none_match.format(etag=etag)), ('/resumo', None))
+
+    assert resposta['statusCode'] == status
+    assert resposta['headers']['ETag'] == etag
+    assert resposta['body'] == ('' if status == 304 else json.dumps({'total': 1}))
+
+
+def test_sem_cache_devolve_none(cache):
+    assert cache.responder_do_cache(evento('*'), ('/resumo', 'acme')) is None
+
+
+def test_expira_pelo_ttl(cache):
+    preencher(cache, ('/resumo', 'acme'))
+    cache.relogio.agora = 59.9
+    assert em_cache(cache, ('/resumo', 'acme'))
+    cache.relogio.agora = 60.0
+    assert not em_cache(cache, ('/resumo', 'acme'))
+
+
+def test_notificacao_derruba_a_empresa_e_as_sem_filtro(cache):
+    chaves = [('/resumo', 'acme'), ('/resumo', 'beta'), ('/resumo', None), ('/contratacoes', 'acme')]
+    preencher(cache, *chaves)
+
+    cache.ouvinte.notificacoes = ['acme']
+
+    assert em_cache(cache, *chaves) == [('/resumo', 'beta')]
+
+
+@pytest.mark.parametrize('falha', ['reiniciado', 'erro'])
+def test_notificacoes_perdidas_limpam_o_cache(cache, falha):
+    chaves = [('/resumo', 'acme'), ('/resumo', 'beta')]
+    preencher(cache, *chaves)
+
+    if falha == 'reiniciado':
+        cache.ouvinte.reiniciado = True
+    else:
+        cache.ouvinte.erro = psycopg2.OperationalError('conexão perdida')
+
+    assert cache.responder_do_cache(evento(), chaves[0]) is None
+    cache.ouvinte.erro = None
+    assert em_cache(cache, *chaves) == []
@@ -0,0 +1,108 @@
+"""
+Roteador: rotas estáticas antes das com parâmetros, parâmetros do caminho
+repassados como argumentos nomeados e None para caminho ou método sem rota
+(cada Lambda responde o seu 404).
+"""
+
+import pytest
+
+from conftest import ConexaoFalsa, carregar_lambda
+from comum.roteador import Roteador
+
+
+def evento(metodo, caminho):
+    return {'rawPath': caminho, 'requestContext': {'http': {'method': metodo}}}
+
+
+@pytest.fixture
+def roteador():
+    roteador = Roteador('teste')
+
+    @roteador.rota('GET', '/usuarios/{id_usuario}')
+    def obter(event, *args, id_usuario):
+        return {'statusCode': 200, 'body': f'obter {id_usuario}'}
+
+    @roteador.rota('GET', '/usuarios/todos')
+    def todos(event, *args):
+        return {'statusCode': 200, 'body': 'todos'}
+
+    @roteador.rota('post', '/usuarios/{id_usuario}/senha')
+    def senha(event, *args, id_usuario):
+        return {'statusCode': 201, 'body': f'senha {id_usuario}'}
+
+    @roteador.rota('DELETE', '/usuarios')
+    def deletar(event, *args):
+        return {'statusCode': 200, 'body': 'deletar'}
+
+    return roteador
+
+
+def test_estatica_tem_prioridade_sobre_template(roteador):
+    assert roteador.despachar(evento('GET', '/usuarios/todos'))['body'] == 'todos'
+    assert roteador.despachar(evento('GET', '/usuarios/42'))['body'] == 'obter 42'
+
+
+def test_parametros_do_caminho(roteador):
+    template, _, parametros = roteador.resolver('POST', '/usuarios/7/senha')
+    assert template == '/usuarios/{id_usuario}/senha'
+    assert parametros == {'id_usuario': '7'}
+    assert roteador.despachar(evento('POST', '/usuarios/7/senha'))['statusCode'] == 201
+
+
+@pytest.mark.parametrize('caminho', [
+    '/usuarios/7/senha/extra',
+    '/usuarios//senha',
+    '/usuarios/7/',
+    '/empresas',
+    '',
+])
+def test_caminho_sem_rota(roteador, caminho):
+    assert roteador.resolver('GET', caminho) is None
+    assert roteador.resolver('POST', caminho) is None
+
+
+@pytest.mark.parametrize('metodo, caminho', [
+    ('PUT', '/usuarios'),
+    ('GET', '/usuarios'),
+    ('POST', '/usuarios/todos'),
+    ('DELETE', '/usuarios/42'),
+    ('get', '/usuarios/todos'),
+])
+def test_metodo_sem_rota(roteador, metodo, caminho):
+    # O Roteador não distingue 404 de 405: nos dois casos a Lambda decide
+    assert roteador.despachar(evento(metodo, caminho)) is None
+    assert roteador.metricas() == {}
+
+
+def test_metricas_por_template(roteador):
+    conn = ConexaoFalsa()
+    roteador.despachar(evento('GET', '/usuarios/1'), conn)
+    roteador.despachar(evento('GET', '/usuarios/2'), conn)
+
+    metricas = roteador.metricas()
+    assert list(metricas) == ['GET /usuarios/{id_usuario}']
+    assert metricas['GET /usuarios/{id_usuario}']['chamadas'] == 2
+    assert metricas['GET /usuarios/{id_usuario}']['status'] == {200: 2}
+    assert metricas['GET /usuarios/{id_usuario}']['comandos_total'] == 0
+
+
+def test_excecao_na_rota_conta_como_500(roteador):
+    @roteador.rota('GET', '/falha')
+    def falha(event):
+        raise RuntimeError('erro')
+
+    with pytest.raises(RuntimeError):
+        roteador.despachar(evento('GET', '/falha'))
+    assert roteador.metricas()['GET /falha']['status'] == {500: 1}
+
+
+@pytest.mark.parametrize('metodo, caminho', [
+    ('GET', '/usuarios/7/senha'),
+    ('PATCH', '/usuarios'),
+    ('POST', '/usuarios/7/senha/extra'),
+])
+def test_lambda_responde_404_sem_rota(invocar, metodo, caminho):
+    # Não há 405 nas Lambdas: método sem rota também é 404
+    resposta, conn = invocar(carregar_lambda('usuarios'), metodo, caminho, {})
+    assert resposta['statusCode'] == 404
+    assert conn.comandos == 0
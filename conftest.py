@@ -0,0 +1,103 @@
+"""
+Utilitários compartilhados pelos testes das Lambdas.
+
+Cada Lambda tem o seu app.py, então os testes carregam o módulo pelo caminho
+(carregar_lambda) em vez de "import app". O banco é substituído por
+ConexaoFalsa, que conta os comandos como comum.db.ConexaoContadora e devolve
+as linhas programadas pelo teste, na ordem.
+"""
+
+import os
+import json
+import importlib.util
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+
+def carregar_lambda(pasta):
+    """Importa <pasta>/app.py como módulo próprio (lambda_<pasta>)."""
+    nome = 'lambda_' + pasta.replace('-', '_')
+    spec = importlib.util.spec_from_file_location(nome, os.path.join(RAIZ, pasta, 'app.py'))
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+class CursorFalso:
+    """Cursor que registra cada execute e responde com as linhas programadas."""
+
+    def __init__(self, conexao):
+        self.connection = conexao
+        self._linhas = []
+
+    def execute(self, query, vars=None):
+        self.connection.comandos += 1
+        self.connection.executados.append((query, vars))
+        self._linhas = self.connection.respostas.pop(0) if self.connection.respostas else []
+
+    def fetchone(self):
+        return self._linhas.pop(0) if self._linhas else None
+
+    def fetchall(self):
+        linhas, self._linhas = self._linhas, []
+        return linhas
+
+    def fetchmany(self, quantidade):
+        linhas, self._linhas = self._linhas[:quantidade], self._linhas[quantidade:]
+        return linhas
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ConexaoFalsa:
+    """
+    Conexão falsa: `respostas` é uma lista com as linhas devolvidas por cada
+    comando, em ordem ([] para comandos sem resultado).
+    """
+
+    def __init__(self, *respostas):
+        self.respostas = [list(r) for r in respostas]
+        self.comandos = 0
+        self.executados = []
+        self.commits = 0
+
+    def cursor(self, name=None):
+        # name: cursores nomeados (server-side) da paginação se comportam igual
+        return CursorFalso(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+@pytest.fixture
+def invocar(monkeypatch):
+    """
+    invocar(modulo, metodo, caminho, corpo, *respostas, query=None) -> (resposta, conexão):
+    chama o lambda_handler com uma ConexaoFalsa no lugar do pool; `query` vira
+    o queryStringParameters do evento.
+    """
+    def _invocar(modulo, metodo, caminho, corpo, *respostas, query=None):
+        conexao = ConexaoFalsa(*respostas)
+        monkeypatch.setattr(modulo, 'obter_conexao', lambda: conexao)
+        monkeypatch.setattr(modulo, 'liberar_conexao', lambda conn: None)
+        event = {
+            'rawPath': caminho,
+            'requestContext': {'http': {'method': metodo}},
+            'body': json.dumps(corpo),
+            'queryStringParameters': query,
+        }
+        return modulo.lambda_handler(event, None), conexao
+
+    return _invocar
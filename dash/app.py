@@ -1,17 +1,21 @@
-import psycopg2
-import os
 import json
 import logging
+from comum.db import obter_conexao, liberar_conexao
+from comum.autenticacao import NaoAutorizado, escopo_empresa
+from comum.respostas import CacheRespostas, CANAL_DOCUMENTOS
 
 # Configuração do Logger
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-DB_HOST = os.environ.get('DB_HOST', 'localhost')
-DB_NAME = os.environ.get('DB_NAME', 'onboarding')
-DB_USER = os.environ.get('DB_USER', 'postgres')
-DB_PASS = os.environ.get('DB_PASS', 'postgres')
-DB_PORT = '5432'
+CORS_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*'
+}
+
+# Respostas em cache por (rota, empresa), invalidadas pelo trigger do resumo de
+# documentos (aprovação/reprovação em candidatos/app.py) e expiradas pelo TTL
+cache_respostas = CacheRespostas(canal=CANAL_DOCUMENTOS, cabecalhos=CORS_HEADERS)
 
 def get_taxa_aprovacao(cur, empresa_filter=None):
     """
@@ -19,28 +23,37 @@ def get_taxa_aprovacao(cur, empresa_filter=None):
     """
     logger.info(f"Calculando taxa de aprovação. Filtro empresa: {empresa_filter}")
     
-    # Base WHERE clause para filtro por empresa
+    # Lê o resumo mantido por trigger (documentos_resumo_empresa) em vez de
+    # varrer documentos_candidatos
     empresa_where = ""
     empresa_params = []
     
     if empresa_filter:
-        empresa_where = "JOIN candidatos c ON dc.email_candidato = c.email WHERE c.empresa = %s"
+        empresa_where = "WHERE r.empresa = %s"
         empresa_params = [empresa_filter]
     
+    # Os handlers gravam 'APROVADO' e 'Reprovado' (ver 0001_esquema_base.sql):
+    # os status são comparados sem diferenciar maiúsculas
     # Query para calcular taxa de aprovação
     query_aprovacao = f"""
         SELECT 
-            COUNT(CASE WHEN dc.status = 'APROVADO' THEN 1 END) as aprovados,
-            COUNT(*) as total
-        FROM documentos_candidatos dc
+            COALESCE(SUM(r.quantidade) FILTER (WHERE upper(r.status) = 'APROVADO'), 0)::bigint as aprovados,
+            COALESCE(SUM(r.quantidade), 0)::bigint as total
+        FROM documentos_resumo_empresa r
         {empresa_where}
     """
     
     cur.execute(query_aprovacao, empresa_params)
     result = cur.fetchone()
     
-    aprovados = result[0] or 0
-    total = result[1] or 1
+    return montar_taxa_aprovacao(result[0], result[1], empresa_filter)
+
+def montar_taxa_aprovacao(aprovados, total, empresa_filter=None):
+    """
+    Formata a resposta da taxa de aprovação a partir das contagens
+    """
+    aprovados = aprovados or 0
+    total = total or 1
     
     # Calcular taxa de aprovação
     taxa_aprovacao = round((aprovados / total) * 100, 1) if total > 0 else 0.0
@@ -94,30 +107,35 @@ def get_documentos_por_tipo(cur, empresa_filter=None):
     """
     logger.info(f"Calculando documentos por tipo. Filtro empresa: {empresa_filter}")
     
-    # Base WHERE clause para filtro por empresa
+    # Lê o resumo mantido por trigger: uma linha por (tipo, status)
     empresa_where = ""
     empresa_params = []
     
     if empresa_filter:
-        empresa_where = "JOIN candidatos c ON dc.email_candidato = c.email WHERE c.empresa = %s"
+        empresa_where = "WHERE r.empresa = %s"
         empresa_params = [empresa_filter]
     
     # Query para documentos por tipo
     query_docs = f"""
         SELECT 
-            dc.tipo_documento,
-            COUNT(*) as total,
-            COUNT(CASE WHEN dc.status = 'APROVADO' THEN 1 END) as aprovados,
-            COUNT(CASE WHEN dc.status = 'REPROVADO' THEN 1 END) as reprovados,
-            COUNT(CASE WHEN dc.status = 'PENDENTE' THEN 1 END) as pendentes
-        FROM documentos_candidatos dc
+            NULLIF(r.tipo_documento, '') as tipo_documento,
+            SUM(r.quantidade)::bigint as total,
+            COALESCE(SUM(r.quantidade) FILTER (WHERE upper(r.status) = 'APROVADO'), 0)::bigint as aprovados,
+            COALESCE(SUM(r.quantidade) FILTER (WHERE upper(r.status) = 'REPROVADO'), 0)::bigint as reprovados,
+            COALESCE(SUM(r.quantidade) FILTER (WHERE upper(r.status) = 'PENDENTE'), 0)::bigint as pendentes
+        FROM documentos_resumo_empresa r
         {empresa_where}
-        GROUP BY dc.tipo_documento
+        GROUP BY r.tipo_documento
+        HAVING SUM(r.quantidade) > 0
     """
     
     cur.execute(query_docs, empresa_params)
-    results = cur.fetchall()
-    
+    return montar_documentos_por_tipo(cur.fetchall())
+
+def montar_documentos_por_tipo(results):
+    """
+    Formata as linhas (tipo, total, aprovados, reprovados, pendentes) por tipo de documento
+    """
     # Montar o formato solicitado
     documentos_por_tipo = {}
     
@@ -139,6 +157,70 @@ def get_documentos_por_tipo(cur, empresa_filter=None):
     
     return documentos_por_tipo
 
+def get_resumo(cur, empresa_filter=None):
+    """
+    Calcula taxa de aprovação, contratações e documentos por tipo numa única
+    consulta: o resumo de documentos é agregado por tipo e no total
+    (GROUPING SETS) e as contratações vêm de uma subconsulta escalar
+    """
+    logger.info(f"Calculando resumo do dashboard. Filtro empresa: {empresa_filter}")
+
+    empresa_where = ""
+    contratacoes_where = ""
+    params = []
+
+    if empresa_filter:
+        empresa_where = "WHERE r.empresa = %s"
+        contratacoes_where = "AND c.empresa = %s"
+        params = [empresa_filter, empresa_filter]
+
+    query_resumo = f"""
+        SELECT
+            GROUPING(r.tipo_documento) = 1 as linha_total,
+            NULLIF(r.tipo_documento, '') as tipo_documento,
+            COALESCE(SUM(r.quantidade), 0)::bigint as total,
+            COALESCE(SUM(r.quantidade) FILTER (WHERE upper(r.status) = 'APROVADO'), 0)::bigint as aprovados,
+            COALESCE(SUM(r.quantidade) FILTER (WHERE upper(r.status) = 'REPROVADO'), 0)::bigint as reprovados,
+            COALESCE(SUM(r.quantidade) FILTER (WHERE upper(r.status) = 'PENDENTE'), 0)::bigint as pendentes,
+            (
+                SELECT COUNT(*)
+                FROM candidatos c
+                WHERE c.situacao = 'Processo Finalizado' {contratacoes_where}
+            ) as contratacoes
+        FROM documentos_resumo_empresa r
+        {empresa_where}
+        GROUP BY GROUPING SETS ((r.tipo_documento), ())
+        HAVING GROUPING(r.tipo_documento) = 1 OR SUM(r.quantidade) > 0
+    """
+    # A subconsulta de contratações aparece antes do WHERE no SQL, então o
+    # parâmetro dela vem primeiro; os dois valores são a mesma empresa.
+    cur.execute(query_resumo, params)
+    results = cur.fetchall()
+
+    linha_total = next(row for row in results if row[0])
+    por_tipo = [row[1:6] for row in results if not row[0]]
+
+    return {
+        'taxa_aprovacao': montar_taxa_aprovacao(linha_total[3], linha_total[2], empresa_filter),
+        'contratacoes': {
+            'contratacoes': linha_total[6] or 0,
+            'empresa': empresa_filter
+        },
+        'documentos_por_tipo': montar_documentos_por_tipo(por_tipo)
+    }
+
+# Rotas GET do dashboard: caminho -> (descrição para o log, função de cálculo)
+INDICADORES = {
+    # Taxa de aprovação específica
+    '/observability/taxa-aprovacao': ('taxa de aprovação', get_taxa_aprovacao),
+    # Número de contratações
+    '/observability/contratacoes': ('número de contratações', get_contratacoes),
+    # Documentos agrupados por tipo
+    '/observability/documentos-por-tipo': ('documentos por tipo', get_documentos_por_tipo),
+    # Os três indicadores acima numa única consulta
+    '/observability/resumo': ('resumo do dashboard', get_resumo),
+}
+
 def lambda_handler(event, context):
     http_method = event.get('requestContext', {}).get('http', {}).get('method', '')
     path = event.get('rawPath', '')
@@ -149,86 +231,51 @@ def lambda_handler(event, context):
     cur = None
     
     try:
-        # Conexão com banco
-        conn = psycopg2.connect(host=DB_HOST, dbname=DB_NAME, user=DB_USER, password=DB_PASS, port=DB_PORT)
-        cur = conn.cursor()
+        indicador = INDICADORES.get(path) if http_method == 'GET' else None
         
-        # GET /observability/taxa-aprovacao - Taxa de aprovação específica
-        if path == '/observability/taxa-aprovacao' and http_method == 'GET':
-            query_params = event.get('queryStringParameters') or {}
-            empresa_filter = query_params.get('empresa')
-            
-            logger.info(f"Obtendo taxa de aprovação. Empresa: {empresa_filter}")
-            
-            taxa_data = get_taxa_aprovacao(cur, empresa_filter)
-            
+        # Rota não encontrada
+        if indicador is None:
             return {
-                'statusCode': 200,
-                'body': json.dumps(taxa_data),
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                }
+                'statusCode': 404,
+                'body': json.dumps({'error': 'Rota não encontrada'}),
+                'headers': CORS_HEADERS
             }
         
-        # GET /observability/contratacoes - Número de contratações
-        elif path == '/observability/contratacoes' and http_method == 'GET':
-            query_params = event.get('queryStringParameters') or {}
-            empresa_filter = query_params.get('empresa')
-            
-            logger.info(f"Obtendo número de contratações. Empresa: {empresa_filter}")
-            
-            contratacoes_data = get_contratacoes(cur, empresa_filter)
-            
-            return {
-                'statusCode': 200,
-                'body': json.dumps(contratacoes_data),
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                }
-            }
+        descricao, calcular = indicador
+        query_params = event.get('queryStringParameters') or {}
+        empresa_filter = escopo_empresa(event, query_params.get('empresa'))
         
-        # GET /observability/documentos-por-tipo - Documentos agrupados por tipo
-        elif path == '/observability/documentos-por-tipo' and http_method == 'GET':
-            query_params = event.get('queryStringParameters') or {}
-            empresa_filter = query_params.get('empresa')
-            
-            logger.info(f"Obtendo documentos por tipo. Empresa: {empresa_filter}")
-            
-            docs_por_tipo = get_documentos_por_tipo(cur, empresa_filter)
-            
-            return {
-                'statusCode': 200,
-                'body': json.dumps(docs_por_tipo),
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                }
-            }
+        logger.info(f"Obtendo {descricao}. Empresa: {empresa_filter}")
         
-        # Rota não encontrada
+        # Cache quente: responde (200 ou 304) sem abrir conexão com o banco
+        resposta = cache_respostas.responder_do_cache(event, (path, empresa_filter))
+        if resposta is not None:
+            return resposta
+        
+        # Conexão reaproveitada do pool do container
+        conn = obter_conexao()
+        cur = conn.cursor()
+        
+        dados = calcular(cur, empresa_filter)
+        
+        return cache_respostas.responder(event, (path, empresa_filter), dados)
+        
+    except NaoAutorizado as e:
         return {
-            'statusCode': 404,
-            'body': json.dumps({'error': 'Rota não encontrada'}),
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            }
+            'statusCode': e.status,
+            'body': json.dumps({'error': str(e)}),
+            'headers': CORS_HEADERS
         }
-        
+
     except Exception as e:
         logger.error(f"Erro na API taxa aprovação: {e}", exc_info=True)
         return {
             'statusCode': 500,
             'body': json.dumps({'error': 'Erro interno do servidor', 'details': str(e)}),
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            }
+            'headers': CORS_HEADERS
         }
     finally:
         if cur:
             cur.close()
         if conn:
-            conn.close()
\ No newline at end of file
+            liberar_conexao(conn)
\ No newline at end of file
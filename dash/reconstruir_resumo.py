@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Reconstrói o resumo de documentos do dashboard (documentos_resumo_empresa).
+
+O resumo é mantido por trigger, mas pode divergir quando um candidato muda de
+empresa depois de enviar documentos. Uso:
+
+    python dash/reconstruir_resumo.py             # mostra a divergência e reconstrói
+    python dash/reconstruir_resumo.py --verificar # só mostra a divergência
+
+Também pode rodar como Lambda agendada (lambda_handler).
+
+A contagem usa documentos_candidatos.candidato_id: enquanto o backfill
+(migrations/preencher_candidato_id.py) não terminar, a reconstrução é recusada,
+aqui e em reconstruir_resumo_documentos() (migrations/0010).
+"""
+
+import os
+import sys
+import json
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from comum.db import conexao
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+QUERY_DIVERGENCIAS = """
+    WITH real AS (
+        SELECT COALESCE(c.empresa, '') as empresa, COALESCE(dc.tipo_documento, '') as tipo_documento,
+               COALESCE(dc.status, '') as status, COUNT(*) as quantidade
+        FROM documentos_candidatos dc
+        LEFT JOIN candidatos c ON c.id = dc.candidato_id
+        GROUP BY 1, 2, 3
+    )
+    SELECT COALESCE(real.empresa, r.empresa), COALESCE(real.tipo_documento, r.tipo_documento),
+           COALESCE(real.status, r.status), COALESCE(r.quantidade, 0), COALESCE(real.quantidade, 0)
+    FROM real
+    FULL JOIN documentos_resumo_empresa r
+        ON r.empresa = real.empresa AND r.tipo_documento = real.tipo_documento AND r.status = real.status
+    WHERE COALESCE(r.quantidade, 0) <> COALESCE(real.quantidade, 0)
+"""
+
+
+# Documentos anteriores à 0007 que o backfill ainda não ligou ao candidato
+QUERY_BACKFILL_PENDENTE = """
+    SELECT EXISTS (
+        SELECT 1
+        FROM documentos_candidatos dc
+        JOIN candidatos c ON c.email = dc.email_candidato
+        WHERE dc.candidato_id IS NULL
+    )
+"""
+
+AVISO_BACKFILL = 'Backfill de candidato_id pendente: rode migrations/preencher_candidato_id.py antes de reconstruir.'
+
+
+def backfill_pendente(conn):
+    with conn.cursor() as cur:
+        cur.execute(QUERY_BACKFILL_PENDENTE)
+        pendente = cur.fetchone()[0]
+    conn.rollback()
+    return pendente
+
+
+def verificar(conn):
+    """Lista as chaves (empresa, tipo, status) em que o resumo difere da contagem real."""
+    with conn.cursor() as cur:
+        cur.execute(QUERY_DIVERGENCIAS)
+        divergencias = [
+            {'empresa': r[0], 'tipo_documento': r[1], 'status': r[2], 'resumo': r[3], 'real': r[4]}
+            for r in cur.fetchall()
+        ]
+    conn.rollback()
+    return divergencias
+
+
+def reconstruir(conn):
+    with conn.cursor() as cur:
+        cur.execute('SELECT reconstruir_resumo_documentos()')
+        linhas = cur.fetchone()[0]
+    conn.commit()
+    return linhas
+
+
+def lambda_handler(event, context):
+    with conexao() as conn:
+        if backfill_pendente(conn):
+            logger.warning(AVISO_BACKFILL)
+            return {'statusCode': 409, 'body': json.dumps({'error': AVISO_BACKFILL})}
+        divergencias = verificar(conn)
+        linhas = reconstruir(conn) if divergencias else None
+    logger.info(f"Resumo de documentos: {len(divergencias)} divergência(s), reconstruído: {linhas is not None}")
+    return {'statusCode': 200, 'body': json.dumps({'divergencias': len(divergencias), 'linhas': linhas})}
+
+
+if __name__ == '__main__':
+    so_verificar = '--verificar' in sys.argv[1:]
+    with conexao() as conn:
+        pendente = backfill_pendente(conn)
+        if pendente:
+            print(f"⚠️  {AVISO_BACKFILL}")
+        divergencias = verificar(conn)
+        for d in divergencias:
+            print(f"⚠️  {d['empresa'] or '(sem empresa)'} / {d['tipo_documento'] or '(sem tipo)'} / "
+                  f"{d['status'] or '(sem status)'}: resumo={d['resumo']} real={d['real']}")
+        print(f"{len(divergencias)} divergência(s) encontrada(s)")
+
+        if pendente and not so_verificar:
+            sys.exit(1)
+        if not so_verificar:
+            linhas = reconstruir(conn)
+            print(f"✅ Resumo reconstruído com {linhas} linha(s)")
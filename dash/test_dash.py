@@ -0,0 +1,110 @@
+"""
+GET /observability/resumo: os três indicadores numa única consulta, com a
+resposta em cache por (rota, empresa do escopo) e 304 para If-None-Match igual
+ao ETag, sem abrir conexão.
+"""
+
+import json
+
+import pytest
+
+from conftest import ConexaoFalsa, carregar_lambda
+from comum import autenticacao
+from comum.autenticacao import emitir_token
+from comum.respostas import CacheRespostas
+
+dash = carregar_lambda('dash')
+
+# (linha_total, tipo, total, aprovados, reprovados, pendentes, contratações)
+RESUMO = [
+    (False, 'CPF', 4, 2, 1, 1, 3),
+    (False, 'RG', 6, 4, 0, 2, 3),
+    (True, None, 10, 6, 1, 3, 3),
+]
+
+
+@pytest.fixture
+def resumo(monkeypatch):
+    """resumo(token=None, empresa=None, etag=None) -> resposta; `.conexoes` guarda as abertas."""
+    monkeypatch.setattr(autenticacao, '_chaves', {'padrao': b'segredo-de-teste'})
+    monkeypatch.setattr(autenticacao, 'JWT_KID_ATUAL', 'padrao')
+    monkeypatch.setattr(autenticacao, 'AUTH_OBRIGATORIA', False)
+    monkeypatch.setattr(dash, 'cache_respostas', CacheRespostas(cabecalhos=dash.CORS_HEADERS))
+    conexoes = []
+
+    def obter_conexao():
+        conexoes.append(ConexaoFalsa(RESUMO))
+        return conexoes[-1]
+
+    monkeypatch.setattr(dash, 'obter_conexao', obter_conexao)
+    monkeypatch.setattr(dash, 'liberar_conexao', lambda conn: None)
+
+    def _resumo(token=None, empresa=None, etag=None):
+        headers = {}
+        if token:
+            headers['authorization'] = f'Bearer {token}'
+        if etag:
+            headers['if-none-match'] = etag
+        event = {
+            'rawPath': '/observability/resumo',
+            'requestContext': {'http': {'method': 'GET'}},
+            'headers': headers,
+            'queryStringParameters': {'empresa': empresa} if empresa else None,
+        }
+        return dash.lambda_handler(event, None)
+
+    _resumo.conexoes = conexoes
+    return _resumo
+
+
+def test_resumo_numa_unica_consulta(resumo):
+    resposta = resumo(empresa='acme')
+
+    assert resposta['statusCode'] == 200
+    conn, = resumo.conexoes
+    assert conn.comandos == 1
+    assert conn.executados[0][1] == ['acme', 'acme']
+    assert json.loads(resposta['body']) == {
+        'taxa_aprovacao': {'taxa_aprovacao': 60.0, 'documentos_aprovados': 6, 'total_documentos': 10, 'empresa': 'acme'},
+        'contratacoes': {'contratacoes': 3, 'empresa': 'acme'},
+        'documentos_por_tipo': {
+            'cpf': {'total': 4, 'aprovado': 2, 'reprovado': 1, 'pendente': 1},
+            'rg': {'total': 6, 'aprovado': 4, 'reprovado': 0, 'pendente': 2},
+        },
+    }
+
+
+def test_etag_igual_responde_304_sem_conexao(resumo):
+    primeira = resumo()
+    etag = primeira['headers']['ETag']
+
+    assert resumo(etag=etag)['statusCode'] == 304
+    assert resumo(etag='W/' + etag)['statusCode'] == 304
+    sem_etag = resumo()
+    assert sem_etag['statusCode'] == 200
+    assert sem_etag['body'] == primeira['body']
+    assert resumo(etag='"outro"')['statusCode'] == 200
+    assert len(resumo.conexoes) == 1
+
+
+def test_cache_separado_por_empresa_do_escopo(resumo):
+    acme = emitir_token(1, 'rh@acme.com', 'rh', 'acme')
+    beta = emitir_token(2, 'rh@beta.com', 'rh', 'beta')
+
+    etag_acme = resumo(acme)['headers']['ETag']
+    # Mesmo pedindo outra empresa, o escopo é a do token: sai do cache da acme
+    assert resumo(acme, empresa='beta', etag=etag_acme)['statusCode'] == 304
+    assert len(resumo.conexoes) == 1
+
+    # A beta não recebe a resposta da acme, nem um 304 com o ETag dela
+    resposta_beta = resumo(beta, etag=etag_acme)
+    assert resposta_beta['statusCode'] == 200
+    assert json.loads(resposta_beta['body'])['contratacoes']['empresa'] == 'beta'
+    assert len(resumo.conexoes) == 2
+    assert resumo.conexoes[1].executados[0][1] == ['beta', 'beta']
+
+
+def test_role_restrita_sem_empresa_recebe_403(resumo):
+    token = emitir_token(3, 'rh@exemplo.com', 'rh', None)
+    assert resumo(token)['statusCode'] == 403
+    assert resumo.conexoes == []
@@ -0,0 +1,40 @@
+import json
+import logging
+from comum.db import conexao
+from comum.outbox import drenar_outbox, OUTBOX_LOTE
+
+# Configuração do Logger
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Margem para não começar um lote novo perto do timeout da Lambda
+MARGEM_TIMEOUT_MS = 15000
+
+def lambda_handler(event, context):
+    """
+    Drena o outbox de e-mails (tabela email_outbox).
+
+    Disparada por agendamento (EventBridge, ex.: rate(1 minute)). Processa lotes
+    de OUTBOX_LOTE e-mails enquanto houver pendentes e tempo disponível.
+    """
+    total = {'enviados': 0, 'falhas': 0, 'mortos': 0}
+
+    try:
+        with conexao() as conn:
+            while True:
+                resumo = drenar_outbox(conn)
+                for chave in total:
+                    total[chave] += resumo[chave]
+
+                processados = sum(resumo.values())
+                if processados < OUTBOX_LOTE:
+                    break
+                if context and context.get_remaining_time_in_millis() < MARGEM_TIMEOUT_MS:
+                    logger.info("Tempo da Lambda quase esgotado, o restante fica para a próxima execução.")
+                    break
+
+        return {'statusCode': 200, 'body': json.dumps(total)}
+
+    except Exception as e:
+        logger.error(f"Erro ao drenar o outbox de e-mails: {e}", exc_info=True)
+        return {'statusCode': 500, 'body': json.dumps({'error': str(e), **total})}
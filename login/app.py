@@ -1,22 +1,81 @@
-import json
-import psycopg2
 import os
+import json
 import hashlib
+import logging
+import psycopg2
+from comum.db import conexao, OuvinteNotificacoes
+from comum.cache import CacheTTL
+from comum.autenticacao import emitir_token, JWT_EXPIRACAO_SEGUNDOS
+
+# Logger
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Cache das credenciais por e-mail, válido enquanto o container estiver quente.
+# A invalidação vem do trigger em usuarios (migrations/0003_notificacao_credenciais.sql) via
+# LISTEN/NOTIFY; o TTL é só uma rede de segurança caso alguma notificação se perca.
+LOGIN_CACHE_TTL_SEGUNDOS = float(os.environ.get('LOGIN_CACHE_TTL_SEGUNDOS', '60'))
+LOGIN_CACHE_MAX = int(os.environ.get('LOGIN_CACHE_MAX', '1024'))
+# E-mails sem usuário também ficam em cache, por menos tempo: tentativas
+# repetidas com e-mail inexistente ou digitado errado não vão ao banco
+LOGIN_CACHE_NEGATIVO_TTL_SEGUNDOS = float(os.environ.get('LOGIN_CACHE_NEGATIVO_TTL_SEGUNDOS', '10'))
+# Marca no cache de um e-mail que não existe em usuarios
+USUARIO_INEXISTENTE = ()
+# Payload do trigger para um e-mail que passou a existir (INSERT ou troca de e-mail)
+PREFIXO_EMAIL = 'email:'
+
+cache_credenciais = CacheTTL(maximo=LOGIN_CACHE_MAX, ttl=LOGIN_CACHE_TTL_SEGUNDOS)
+ouvinte_credenciais = OuvinteNotificacoes('usuarios_credenciais')
+
+def aplicar_invalidacoes():
+    """
+    Remove do cache os usuários alterados em PUT/DELETE /usuarios e
+    POST /usuarios/{id}/senha (payload = id) e os e-mails marcados como
+    inexistentes que passaram a ter usuário (payload = 'email:<e-mail>').
+    """
+    try:
+        payloads, reiniciado = ouvinte_credenciais.consumir()
+    except psycopg2.Error as e:
+        logger.warning(f"Falha ao ler notificações de credenciais, limpando o cache: {e}")
+        cache_credenciais.limpar()
+        return
 
-DB_HOST = os.environ.get('DB_HOST', 'localhost')
-DB_NAME = os.environ.get('DB_NAME', 'onboarding')
-DB_USER = os.environ.get('DB_USER', 'postgres')
-DB_PASS = os.environ.get('DB_PASS', 'postgres')
-DB_PORT = '5432'
+    if reiniciado:
+        # Notificações anteriores à conexão atual podem ter sido perdidas
+        cache_credenciais.limpar()
+    ids_alterados = set()
+    for payload in payloads:
+        if payload.startswith(PREFIXO_EMAIL):
+            cache_credenciais.remover(payload[len(PREFIXO_EMAIL):])
+        else:
+            ids_alterados.add(payload)
+    if ids_alterados:
+        cache_credenciais.remover_onde(lambda _email, user: user and str(user[0]) in ids_alterados)
+
+def buscar_credenciais(email):
+    aplicar_invalidacoes()
+
+    user = cache_credenciais.obter(email)
+    if user is not None:
+        return user or None
+
+    with conexao() as conn:
+        with conn.cursor() as cur:
+            cur.execute('SELECT id, email, senha, role, empresa FROM usuarios WHERE email = %s', (email,))
+            user = cur.fetchone()
+    if user:
+        cache_credenciais.definir(email, user)
+    else:
+        cache_credenciais.definir(email, USUARIO_INEXISTENTE, ttl=LOGIN_CACHE_NEGATIVO_TTL_SEGUNDOS)
+    return user
 
 def hash_password(password: str) -> str:
     # Hash SHA256 simples
     return hashlib.sha256(password.encode()).hexdigest()
 
 def lambda_handler(event, context):
-    print("EVENT RAW PATH:", event.get('rawPath'))
     http_method = event.get('requestContext', {}).get('http', {}).get('method', '')
-    print("HTTP METHOD:", http_method)
+    logger.info(f"Execução iniciada. Path: {event.get('rawPath')}, Método: {http_method}")
 
     # Tratamento do corpo da requisição (JSON string ou dict)
     if 'body' in event and isinstance(event['body'], str):
@@ -44,26 +103,18 @@ def lambda_handler(event, context):
             }
 
         try:
-            conn = psycopg2.connect(
-                host=DB_HOST, dbname=DB_NAME, user=DB_USER, password=DB_PASS, port=DB_PORT)
-            cur = conn.cursor()
-            cur.execute('SELECT id, email, senha, role, empresa FROM usuarios WHERE email = %s', (email,))
-            user = cur.fetchone()
-            print("Resultado da consulta:", user) # Adicione esta linha
-            cur.close()
-            conn.close()
+            user = buscar_credenciais(email)
 
             if user:
                 id_, email_db, senha_hash_db, role_db, empresa = user
                 senha_calculada = hash_password(password)
-                print(f"Senha calculada: {senha_calculada}")
-                print(f"Senha no banco: {senha_hash_db}")
 
                 if senha_calculada == senha_hash_db:
                     return {
                         'statusCode': 200,
                         'body': json.dumps({
-                            'token': 'jwt-token',
+                            'token': emitir_token(id_, email_db, role_db, empresa),
+                            'expires_in': JWT_EXPIRACAO_SEGUNDOS,
                             'user': {
                                 'id': id_,
                                 'email': email_db,
@@ -81,7 +132,7 @@ def lambda_handler(event, context):
             }
 
         except Exception as e:
-            print(f"Erro na conexão ou consulta: {e}")
+            logger.error(f"Erro na conexão ou consulta: {e}", exc_info=True)
             return {
                 'statusCode': 500,
                 'body': json.dumps({'error': str(e)}),
@@ -0,0 +1,94 @@
+"""
+Cache de credenciais do login: e-mails inexistentes também ficam em cache, e
+a notificação 'email:<e-mail>' (usuário criado) descarta a entrada.
+"""
+
+import json
+from contextlib import contextmanager
+
+import pytest
+
+from conftest import ConexaoFalsa, carregar_lambda
+
+login = carregar_lambda('login')
+
+USUARIO = (7, 'ana@exemplo.com', login.hash_password('segredo'), 'user', 'acme')
+
+
+class OuvinteFalso:
+    def __init__(self):
+        self.payloads = []
+
+    def consumir(self):
+        payloads, self.payloads = self.payloads, []
+        return payloads, False
+
+
+class BancoFalso:
+    """Abre uma ConexaoFalsa por consulta; o SELECT devolve `linhas`."""
+
+    def __init__(self):
+        self.linhas = []
+        self.conexoes = []
+
+    @contextmanager
+    def conexao(self):
+        conn = ConexaoFalsa(list(self.linhas))
+        self.conexoes.append(conn)
+        yield conn
+
+    def consultas(self):
+        return sum(conn.comandos for conn in self.conexoes)
+
+
+@pytest.fixture
+def banco(monkeypatch):
+    banco = BancoFalso()
+    monkeypatch.setenv('JWT_SEGREDO', 'segredo-de-teste')
+    login.cache_credenciais.limpar()
+    monkeypatch.setattr(login, 'conexao', banco.conexao)
+    monkeypatch.setattr(login, 'ouvinte_credenciais', OuvinteFalso())
+    return banco
+
+
+def entrar(email, senha='segredo'):
+    event = {
+        'rawPath': '/login',
+        'requestContext': {'http': {'method': 'POST'}},
+        'body': json.dumps({'email': email, 'password': senha}),
+    }
+    return login.lambda_handler(event, None)['statusCode']
+
+
+def test_email_inexistente_consulta_uma_vez(banco):
+    assert [entrar('errado@exemplo.com') for _ in range(5)] == [401] * 5
+    assert banco.consultas() == 1
+
+
+def test_email_inexistente_expira(banco, monkeypatch):
+    monkeypatch.setattr(login, 'LOGIN_CACHE_NEGATIVO_TTL_SEGUNDOS', 0)
+    entrar('errado@exemplo.com')
+    entrar('errado@exemplo.com')
+    assert banco.consultas() == 2
+
+
+def test_usuario_criado_invalida_email_inexistente(banco):
+    assert entrar('ana@exemplo.com') == 401
+
+    banco.linhas = [USUARIO]
+    login.ouvinte_credenciais.payloads = ['email:ana@exemplo.com']
+    assert entrar('ana@exemplo.com') == 200
+    assert entrar('ana@exemplo.com') == 200
+    assert banco.consultas() == 2
+
+
+def test_notificacao_por_id_convive_com_email_inexistente(banco):
+    entrar('errado@exemplo.com')
+    banco.linhas = [USUARIO]
+    entrar('ana@exemplo.com')
+
+    login.ouvinte_credenciais.payloads = ['7']
+    assert entrar('ana@exemplo.com') == 200
+    assert entrar('errado@exemplo.com') == 401
+    # ana foi consultada de novo; o e-mail inexistente continua em cache
+    assert banco.consultas() == 3
@@ -0,0 +1,65 @@
+-- Tabelas principais, como usadas pelas Lambdas. IF NOT EXISTS para que
+-- bancos criados antes das migrações adotem esta versão sem alterações.
+
+CREATE TABLE IF NOT EXISTS empresas (
+    id SERIAL PRIMARY KEY,
+    nome VARCHAR(255) NOT NULL,
+    cnpj VARCHAR(18) UNIQUE NOT NULL,
+    telefone_responsavel VARCHAR(50),
+    email_responsavel VARCHAR(255),
+    planos VARCHAR(100)
+);
+
+CREATE TABLE IF NOT EXISTS usuarios (
+    id SERIAL PRIMARY KEY,
+    nome VARCHAR(255) NOT NULL,
+    email VARCHAR(255) UNIQUE NOT NULL, -- login; o índice da UNIQUE atende o WHERE email = %s
+    senha VARCHAR(255), -- SHA-256 em hex; nula até o usuário criar a senha
+    role VARCHAR(50) DEFAULT 'user', -- user | admin | candidato ...
+    empresa VARCHAR(255)
+);
+
+CREATE TABLE IF NOT EXISTS reset_tokens (
+    id SERIAL PRIMARY KEY,
+    usuario_id INTEGER NOT NULL REFERENCES usuarios(id),
+    token VARCHAR(64) NOT NULL, -- uuid4
+    expiracao TIMESTAMP NOT NULL -- UTC
+);
+
+CREATE TABLE IF NOT EXISTS candidatos (
+    id SERIAL PRIMARY KEY,
+    nome VARCHAR(255) NOT NULL,
+    email VARCHAR(255) UNIQUE NOT NULL,
+    cpf VARCHAR(18) UNIQUE NOT NULL,
+    senha VARCHAR(255),
+    telefone VARCHAR(50),
+    estado VARCHAR(50),
+    vaga VARCHAR(255),
+    sexo VARCHAR(20),
+    situacao VARCHAR(50) DEFAULT 'Pendente', -- ... | Processo Finalizado (contratado)
+    empresa VARCHAR(255)
+);
+
+-- Documentos enviados pelos candidatos e avaliados pelo RH
+CREATE TABLE IF NOT EXISTS documentos_candidatos (
+    id SERIAL PRIMARY KEY,
+    email_candidato VARCHAR(255) NOT NULL,
+    nome_documento VARCHAR(255),
+    tipo_documento VARCHAR(100),
+    status VARCHAR(50) DEFAULT 'PENDENTE', -- PENDENTE | APROVADO | Reprovado
+    motivo_reprovacao TEXT,
+    data_aprovacao TIMESTAMP,
+    data_reprovacao TIMESTAMP
+);
+
+-- Documentos com rótulo e acurácia (observability, acompanhamento-documentos)
+CREATE TABLE IF NOT EXISTS documentos (
+    id SERIAL PRIMARY KEY,
+    candidato_id INTEGER REFERENCES candidatos(id),
+    nome VARCHAR(255) NOT NULL,
+    status VARCHAR(50) DEFAULT 'pending',
+    data_upload TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    url TEXT,
+    label VARCHAR(100),
+    acuracia DECIMAL(5,2)
+);
@@ -0,0 +1,19 @@
+-- Outbox de e-mails: gravado na mesma transação do cadastro e
+-- drenado pela Lambda envio-emails.
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    destinatario VARCHAR(255) NOT NULL,
+    tipo VARCHAR(50) NOT NULL,
+    contexto JSONB NOT NULL DEFAULT '{}',
+    status VARCHAR(20) NOT NULL DEFAULT 'PENDENTE', -- PENDENTE | ENVIADO | MORTO
+    tentativas INTEGER NOT NULL DEFAULT 0,
+    proxima_tentativa TIMESTAMPTZ NOT NULL DEFAULT now(),
+    ultimo_erro TEXT,
+    criado_em TIMESTAMPTZ NOT NULL DEFAULT now(),
+    enviado_em TIMESTAMPTZ
+);
+
+-- Só as linhas pendentes interessam ao drenador
+CREATE INDEX IF NOT EXISTS idx_email_outbox_pendentes
+    ON email_outbox (proxima_tentativa, id)
+    WHERE status = 'PENDENTE';
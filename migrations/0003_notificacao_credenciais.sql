@@ -0,0 +1,14 @@
+-- Avisa os containers da Lambda de login (LISTEN usuarios_credenciais) que as
+-- credenciais de um usuário mudaram, para invalidar o cache em memória.
+-- O payload é o id do usuário; a notificação só é entregue após o COMMIT.
+CREATE OR REPLACE FUNCTION notificar_credenciais_usuario() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('usuarios_credenciais', OLD.id::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_usuarios_credenciais ON usuarios;
+CREATE TRIGGER trg_usuarios_credenciais
+    AFTER UPDATE OF email, senha, role, empresa OR DELETE ON usuarios
+    FOR EACH ROW EXECUTE FUNCTION notificar_credenciais_usuario();
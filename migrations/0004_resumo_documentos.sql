@@ -0,0 +1,86 @@
+-- Resumo de documentos por (empresa, tipo_documento, status), mantido por
+-- trigger a cada INSERT/UPDATE/DELETE em documentos_candidatos. O dashboard lê
+-- este resumo em vez de varrer documentos_candidatos a cada acesso.
+--
+-- Valores nulos viram '' para que a chave primária funcione no ON CONFLICT;
+-- empresa '' agrupa documentos sem candidato correspondente.
+CREATE TABLE IF NOT EXISTS documentos_resumo_empresa (
+    empresa VARCHAR(255) NOT NULL DEFAULT '',
+    tipo_documento VARCHAR(100) NOT NULL DEFAULT '',
+    status VARCHAR(50) NOT NULL DEFAULT '',
+    quantidade BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (empresa, tipo_documento, status)
+);
+
+-- Também avisa (NOTIFY documentos_resumo, payload = empresa) os containers do
+-- dash e do observability, que guardam as respostas em cache (comum/respostas.py).
+-- A notificação só é entregue após o COMMIT e é deduplicada por transação.
+CREATE OR REPLACE FUNCTION ajustar_resumo_documentos(
+    p_email_candidato TEXT, p_tipo_documento TEXT, p_status TEXT, p_delta INTEGER
+) RETURNS VOID AS $$
+DECLARE
+    v_empresa TEXT;
+BEGIN
+    v_empresa := COALESCE((SELECT c.empresa FROM candidatos c WHERE c.email = p_email_candidato LIMIT 1), '');
+
+    INSERT INTO documentos_resumo_empresa (empresa, tipo_documento, status, quantidade)
+    VALUES (v_empresa, COALESCE(p_tipo_documento, ''), COALESCE(p_status, ''), p_delta)
+    ON CONFLICT (empresa, tipo_documento, status)
+    DO UPDATE SET quantidade = documentos_resumo_empresa.quantidade + EXCLUDED.quantidade;
+
+    PERFORM pg_notify('documentos_resumo', v_empresa);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION atualizar_resumo_documentos() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM ajustar_resumo_documentos(OLD.email_candidato, OLD.tipo_documento, OLD.status, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM ajustar_resumo_documentos(NEW.email_candidato, NEW.tipo_documento, NEW.status, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_resumo_documentos_ins_del ON documentos_candidatos;
+CREATE TRIGGER trg_resumo_documentos_ins_del
+    AFTER INSERT OR DELETE ON documentos_candidatos
+    FOR EACH ROW EXECUTE FUNCTION atualizar_resumo_documentos();
+
+-- Aprovações/reprovações só mexem no resumo quando a chave realmente muda
+DROP TRIGGER IF EXISTS trg_resumo_documentos_upd ON documentos_candidatos;
+CREATE TRIGGER trg_resumo_documentos_upd
+    AFTER UPDATE OF status, tipo_documento, email_candidato ON documentos_candidatos
+    FOR EACH ROW
+    WHEN (OLD.status IS DISTINCT FROM NEW.status
+          OR OLD.tipo_documento IS DISTINCT FROM NEW.tipo_documento
+          OR OLD.email_candidato IS DISTINCT FROM NEW.email_candidato)
+    EXECUTE FUNCTION atualizar_resumo_documentos();
+
+-- Recalcula o resumo do zero (corrige divergências, ex.: candidato que trocou
+-- de empresa ou de e-mail depois de enviar documentos). Bloqueia escritas em
+-- documentos_candidatos durante a reconstrução; leituras seguem liberadas.
+CREATE OR REPLACE FUNCTION reconstruir_resumo_documentos() RETURNS BIGINT AS $$
+DECLARE
+    linhas BIGINT;
+BEGIN
+    LOCK TABLE documentos_candidatos IN SHARE MODE;
+    LOCK TABLE documentos_resumo_empresa IN EXCLUSIVE MODE;
+
+    DELETE FROM documentos_resumo_empresa;
+
+    INSERT INTO documentos_resumo_empresa (empresa, tipo_documento, status, quantidade)
+    SELECT COALESCE(c.empresa, ''), COALESCE(dc.tipo_documento, ''), COALESCE(dc.status, ''), COUNT(*)
+    FROM documentos_candidatos dc
+    LEFT JOIN candidatos c ON c.email = dc.email_candidato
+    GROUP BY 1, 2, 3;
+
+    GET DIAGNOSTICS linhas = ROW_COUNT;
+    RETURN linhas;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Primeira carga
+SELECT reconstruir_resumo_documentos();
@@ -0,0 +1,27 @@
+-- Arquivos enviados ao S3 (upload direto, multipart ou pelo POST
+-- /upload-doc-plataforma), com o SHA-256 do conteúdo para deduplicação.
+CREATE TABLE IF NOT EXISTS documentos_arquivos (
+    id BIGSERIAL PRIMARY KEY,
+    chave VARCHAR(1024) NOT NULL UNIQUE, -- ex.: documentos/rg.pdf
+    email_candidato VARCHAR(255),
+    tipo_documento VARCHAR(100),
+    content_type VARCHAR(255),
+    tamanho BIGINT NOT NULL,
+    etag VARCHAR(255),
+    sha256 CHAR(64), -- hex; nulo em uploads diretos, em que a Lambda não vê os bytes
+    tamanho_original BIGINT, -- bytes recebidos pelo POST /upload-doc-plataforma, antes da normalização de imagens
+    enviado_em TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Bancos criados antes da deduplicação e da normalização de imagens
+ALTER TABLE documentos_arquivos ADD COLUMN IF NOT EXISTS sha256 CHAR(64);
+ALTER TABLE documentos_arquivos ADD COLUMN IF NOT EXISTS tamanho_original BIGINT;
+
+CREATE INDEX IF NOT EXISTS idx_documentos_arquivos_email
+    ON documentos_arquivos (email_candidato);
+
+-- Busca de duplicados: mesmo candidato, tipo de documento e conteúdo
+CREATE INDEX IF NOT EXISTS idx_documentos_arquivos_sha256
+    ON documentos_arquivos (email_candidato, tipo_documento, sha256)
+    WHERE sha256 IS NOT NULL;
+
@@ -0,0 +1,33 @@
+-- migrar: sem-transacao
+-- Índices das consultas quentes dos handlers. CONCURRENTLY não trava escritas
+-- na tabela durante a criação, mas não roda dentro de transação: o migrar.py
+-- executa este arquivo comando a comando e, se uma criação falhar no meio,
+-- remove o índice inválido que sobrou na próxima execução.
+--
+-- candidatos(email) e usuarios(email) já têm índice pelas constraints UNIQUE.
+
+-- GET /candidatos/documentos (WHERE email_candidato), aprovação/reprovação por
+-- (email_candidato, nome_documento) e o JOIN com candidatos pelo e-mail
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_documentos_candidatos_email_nome
+    ON documentos_candidatos (email_candidato, nome_documento);
+
+-- GET /candidatos/documentos/todos?status=
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_documentos_candidatos_status
+    ON documentos_candidatos (status);
+
+-- GET /candidatos por empresa, paginado por id (WHERE empresa = ? AND id > ? ORDER BY id)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_candidatos_empresa_id
+    ON candidatos (empresa, id);
+
+-- Contratações do dashboard (situacao = 'Processo Finalizado' por empresa)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_candidatos_contratados_empresa
+    ON candidatos (empresa)
+    WHERE situacao = 'Processo Finalizado';
+
+-- POST /usuarios/{id}/senha e limpeza no DELETE /usuarios
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_reset_tokens_usuario_token
+    ON reset_tokens (usuario_id, token);
+
+-- GET /acompanhamento-documentos/{candidato_id}
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_documentos_candidato_id
+    ON documentos (candidato_id);
@@ -0,0 +1,176 @@
+-- documentos_candidatos passa a apontar para candidatos pelo id, e os JOINs
+-- deixam de comparar e-mails (varchar). O e-mail continua na tabela para as
+-- buscas por e-mail dos handlers.
+--
+-- Ordem de implantação, sem travar escritas:
+--   1. esta migração: coluna nula (ADD COLUMN sem default não reescreve a
+--      tabela), FK NOT VALID e triggers que preenchem as linhas novas;
+--   2. 0008: índice CONCURRENTLY e VALIDATE CONSTRAINT;
+--   3. python migrations/preencher_candidato_id.py: preenche as linhas
+--      antigas em lotes pequenos;
+--   4. deploy das Lambdas com os JOINs por candidato_id.
+
+ALTER TABLE documentos_candidatos ADD COLUMN IF NOT EXISTS candidato_id INTEGER;
+
+-- ON DELETE SET NULL: apagar um candidato continua não apagando os
+-- documentos dele, como antes
+ALTER TABLE documentos_candidatos DROP CONSTRAINT IF EXISTS fk_documentos_candidatos_candidato;
+ALTER TABLE documentos_candidatos ADD CONSTRAINT fk_documentos_candidatos_candidato
+    FOREIGN KEY (candidato_id) REFERENCES candidatos(id) ON DELETE SET NULL NOT VALID;
+
+-- Os handlers gravam só email_candidato; o candidato_id é resolvido aqui,
+-- na inserção e quando o e-mail do documento muda
+CREATE OR REPLACE FUNCTION preencher_candidato_documento() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' AND NEW.candidato_id IS NOT NULL THEN
+        RETURN NEW;
+    END IF;
+    IF TG_OP = 'UPDATE' AND NEW.email_candidato IS NOT DISTINCT FROM OLD.email_candidato THEN
+        RETURN NEW;
+    END IF;
+    NEW.candidato_id := (SELECT c.id FROM candidatos c WHERE c.email = NEW.email_candidato);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_documentos_candidato_id ON documentos_candidatos;
+CREATE TRIGGER trg_documentos_candidato_id
+    BEFORE INSERT OR UPDATE OF email_candidato ON documentos_candidatos
+    FOR EACH ROW EXECUTE FUNCTION preencher_candidato_documento();
+
+-- Do lado de candidatos: PUT /candidatos que troca o e-mail leva o e-mail novo
+-- para os documentos (as buscas por e-mail continuam achando), e um candidato
+-- criado depois dos documentos com o mesmo e-mail passa a ser o dono deles.
+-- Documentos órfãos contam no resumo como empresa '' (a busca pelo e-mail não
+-- achou candidato quando foram inseridos); ao serem vinculados, a contagem
+-- passa para a empresa do candidato. A mudança de candidato_id de NULL para o
+-- id não dispara trg_resumo_documentos_upd, então o ajuste é feito aqui.
+CREATE OR REPLACE FUNCTION vincular_documentos_candidato() RETURNS trigger AS $$
+DECLARE
+    v_documento RECORD;
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        UPDATE documentos_candidatos SET email_candidato = NEW.email
+        WHERE candidato_id = NEW.id AND email_candidato IS DISTINCT FROM NEW.email;
+    END IF;
+    FOR v_documento IN
+        UPDATE documentos_candidatos SET candidato_id = NEW.id
+        WHERE candidato_id IS NULL AND email_candidato = NEW.email
+        RETURNING tipo_documento, status
+    LOOP
+        -- Sem candidato nem e-mail a empresa resolvida é ''
+        PERFORM ajustar_resumo_documentos(NULL, NULL, v_documento.tipo_documento, v_documento.status, -1);
+        PERFORM ajustar_resumo_documentos(NEW.id, NEW.email, v_documento.tipo_documento, v_documento.status, 1);
+    END LOOP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_candidatos_documentos_ins ON candidatos;
+CREATE TRIGGER trg_candidatos_documentos_ins
+    AFTER INSERT ON candidatos
+    FOR EACH ROW EXECUTE FUNCTION vincular_documentos_candidato();
+
+DROP TRIGGER IF EXISTS trg_candidatos_documentos_upd ON candidatos;
+CREATE TRIGGER trg_candidatos_documentos_upd
+    AFTER UPDATE OF email ON candidatos
+    FOR EACH ROW
+    WHEN (OLD.email IS DISTINCT FROM NEW.email)
+    EXECUTE FUNCTION vincular_documentos_candidato();
+
+-- O inverso ao apagar um candidato: os documentos ficam órfãos (ON DELETE SET
+-- NULL) e passam a contar como empresa ''. Roda antes do DELETE porque, quando
+-- a FK zera o candidato_id, o candidato já não existe para dizer a empresa.
+CREATE OR REPLACE FUNCTION desvincular_documentos_candidato() RETURNS trigger AS $$
+DECLARE
+    v_documento RECORD;
+BEGIN
+    FOR v_documento IN
+        SELECT tipo_documento, status FROM documentos_candidatos WHERE candidato_id = OLD.id
+    LOOP
+        PERFORM ajustar_resumo_documentos(OLD.id, OLD.email, v_documento.tipo_documento, v_documento.status, -1);
+        PERFORM ajustar_resumo_documentos(NULL, NULL, v_documento.tipo_documento, v_documento.status, 1);
+    END LOOP;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_candidatos_documentos_del ON candidatos;
+CREATE TRIGGER trg_candidatos_documentos_del
+    BEFORE DELETE ON candidatos
+    FOR EACH ROW EXECUTE FUNCTION desvincular_documentos_candidato();
+
+-- Resumo do dashboard: a empresa vem do candidato pelo id; linhas ainda não
+-- preenchidas pelo backfill caem no e-mail, o que dá a mesma empresa de antes
+CREATE OR REPLACE FUNCTION ajustar_resumo_documentos(
+    p_candidato_id INTEGER, p_email_candidato TEXT, p_tipo_documento TEXT, p_status TEXT, p_delta INTEGER
+) RETURNS VOID AS $$
+DECLARE
+    v_empresa TEXT;
+BEGIN
+    IF p_candidato_id IS NOT NULL THEN
+        v_empresa := (SELECT c.empresa FROM candidatos c WHERE c.id = p_candidato_id);
+    ELSE
+        v_empresa := (SELECT c.empresa FROM candidatos c WHERE c.email = p_email_candidato LIMIT 1);
+    END IF;
+    v_empresa := COALESCE(v_empresa, '');
+
+    INSERT INTO documentos_resumo_empresa (empresa, tipo_documento, status, quantidade)
+    VALUES (v_empresa, COALESCE(p_tipo_documento, ''), COALESCE(p_status, ''), p_delta)
+    ON CONFLICT (empresa, tipo_documento, status)
+    DO UPDATE SET quantidade = documentos_resumo_empresa.quantidade + EXCLUDED.quantidade;
+
+    PERFORM pg_notify('documentos_resumo', v_empresa);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION atualizar_resumo_documentos() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM ajustar_resumo_documentos(OLD.candidato_id, OLD.email_candidato, OLD.tipo_documento, OLD.status, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM ajustar_resumo_documentos(NEW.candidato_id, NEW.email_candidato, NEW.tipo_documento, NEW.status, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP FUNCTION IF EXISTS ajustar_resumo_documentos(TEXT, TEXT, TEXT, INTEGER);
+
+-- candidato_id de NULL para um id não dispara o trigger: no backfill a empresa
+-- (resolvida antes pelo e-mail) não muda, e os órfãos vinculados a um candidato
+-- novo são ajustados por vincular_documentos_candidato(). Trocas de um
+-- candidato para outro disparam; a de um candidato apagado para NULL (FK) não
+-- muda nada aqui, porque desvincular_documentos_candidato() já moveu a contagem
+DROP TRIGGER IF EXISTS trg_resumo_documentos_upd ON documentos_candidatos;
+CREATE TRIGGER trg_resumo_documentos_upd
+    AFTER UPDATE OF status, tipo_documento, email_candidato, candidato_id ON documentos_candidatos
+    FOR EACH ROW
+    WHEN (OLD.status IS DISTINCT FROM NEW.status
+          OR OLD.tipo_documento IS DISTINCT FROM NEW.tipo_documento
+          OR OLD.email_candidato IS DISTINCT FROM NEW.email_candidato
+          OR (OLD.candidato_id IS NOT NULL AND OLD.candidato_id IS DISTINCT FROM NEW.candidato_id))
+    EXECUTE FUNCTION atualizar_resumo_documentos();
+
+-- Recalcula o resumo do zero pelo JOIN inteiro. Rode depois do backfill:
+-- antes dele, documentos sem candidato_id contam como empresa ''.
+CREATE OR REPLACE FUNCTION reconstruir_resumo_documentos() RETURNS BIGINT AS $$
+DECLARE
+    linhas BIGINT;
+BEGIN
+    LOCK TABLE documentos_candidatos IN SHARE MODE;
+    LOCK TABLE documentos_resumo_empresa IN EXCLUSIVE MODE;
+
+    DELETE FROM documentos_resumo_empresa;
+
+    INSERT INTO documentos_resumo_empresa (empresa, tipo_documento, status, quantidade)
+    SELECT COALESCE(c.empresa, ''), COALESCE(dc.tipo_documento, ''), COALESCE(dc.status, ''), COUNT(*)
+    FROM documentos_candidatos dc
+    LEFT JOIN candidatos c ON c.id = dc.candidato_id
+    GROUP BY 1, 2, 3;
+
+    GET DIAGNOSTICS linhas = ROW_COUNT;
+    RETURN linhas;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,12 @@
+-- migrar: sem-transacao
+-- Índice do JOIN documentos_candidatos -> candidatos pelo id e validação da FK
+-- criada NOT VALID na 0007. O VALIDATE só pega SHARE UPDATE EXCLUSIVE: leituras
+-- e escritas seguem durante a varredura. Linhas ainda sem candidato_id (antes
+-- do backfill) passam na validação, e o backfill só grava ids existentes.
+
+-- GET /candidatos/documentos/todos?empresa (candidatos por empresa -> documentos)
+-- e a contagem do resumo do dashboard
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_documentos_candidatos_candidato_id
+    ON documentos_candidatos (candidato_id);
+
+ALTER TABLE documentos_candidatos VALIDATE CONSTRAINT fk_documentos_candidatos_candidato;
@@ -0,0 +1,21 @@
+-- O login também guarda em cache os e-mails que não existem (por poucos
+-- segundos), para que tentativas repetidas com e-mail errado não consultem o
+-- banco. Um usuário criado com esse e-mail (ou que passa a usá-lo) precisa
+-- entrar logo: INSERT e troca de e-mail avisam também o e-mail novo, com o
+-- payload 'email:<e-mail>'. As demais mudanças continuam avisando o id.
+CREATE OR REPLACE FUNCTION notificar_credenciais_usuario() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM pg_notify('usuarios_credenciais', OLD.id::text);
+    END IF;
+    IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.email IS DISTINCT FROM OLD.email) THEN
+        PERFORM pg_notify('usuarios_credenciais', 'email:' || NEW.email);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_usuarios_credenciais ON usuarios;
+CREATE TRIGGER trg_usuarios_credenciais
+    AFTER INSERT OR UPDATE OF email, senha, role, empresa OR DELETE ON usuarios
+    FOR EACH ROW EXECUTE FUNCTION notificar_credenciais_usuario();
@@ -0,0 +1,35 @@
+-- reconstruir_resumo_documentos() (0007) conta os documentos pelo candidato_id.
+-- Antes de migrations/preencher_candidato_id.py terminar, as linhas antigas
+-- ainda têm candidato_id nulo e iriam para a empresa vazia: o resumo do
+-- dashboard ficaria errado sem nenhum aviso. Enquanto houver documento sem
+-- candidato_id cujo e-mail tem candidato, a reconstrução é recusada.
+CREATE OR REPLACE FUNCTION reconstruir_resumo_documentos() RETURNS BIGINT AS $$
+DECLARE
+    linhas BIGINT;
+BEGIN
+    LOCK TABLE documentos_candidatos IN SHARE MODE;
+    LOCK TABLE documentos_resumo_empresa IN EXCLUSIVE MODE;
+
+    IF EXISTS (
+        SELECT 1
+        FROM documentos_candidatos dc
+        JOIN candidatos c ON c.email = dc.email_candidato
+        WHERE dc.candidato_id IS NULL
+    ) THEN
+        RAISE EXCEPTION 'documentos_candidatos ainda tem candidato_id a preencher'
+            USING ERRCODE = 'object_not_in_prerequisite_state',
+                  HINT = 'Rode migrations/preencher_candidato_id.py antes de reconstruir o resumo.';
+    END IF;
+
+    DELETE FROM documentos_resumo_empresa;
+
+    INSERT INTO documentos_resumo_empresa (empresa, tipo_documento, status, quantidade)
+    SELECT COALESCE(c.empresa, ''), COALESCE(dc.tipo_documento, ''), COALESCE(dc.status, ''), COUNT(*)
+    FROM documentos_candidatos dc
+    LEFT JOIN candidatos c ON c.id = dc.candidato_id
+    GROUP BY 1, 2, 3;
+
+    GET DIAGNOSTICS linhas = ROW_COUNT;
+    RETURN linhas;
+END;
+$$ LANGUAGE plpgsql;
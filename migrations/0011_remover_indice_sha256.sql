@@ -0,0 +1,6 @@
+-- migrar: sem-transacao
+-- A deduplicação do upload passou a procurar pela própria chave (índice único
+-- de documentos_arquivos.chave): conteúdo igual sob outro nome ou tipo de
+-- documento é um upload normal. O índice por (email, tipo, sha256) da 0005
+-- ficou sem consultas e só custava escrita.
+DROP INDEX CONCURRENTLY IF EXISTS idx_documentos_arquivos_sha256;
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Compara o JOIN documentos_candidatos -> candidatos por e-mail (antes da 0007)
+com o JOIN por candidato_id (depois), na base atual:
+
+- resultados: cada consulta roda nas duas formas, sem LIMIT, e as diferenças
+  são contadas com EXCEPT ALL nos dois sentidos;
+- custo: EXPLAIN ANALYZE das consultas paginadas dos handlers nas duas formas
+  (custo do planejador, tempo e buffers lidos);
+- tamanho: índices usados pelo JOIN em cada forma;
+- resumo: documentos_resumo_empresa contra a contagem pelo JOIN por id, e um
+  cenário (desfeito no fim) em que documentos órfãos são vinculados a um
+  candidato criado depois deles, que depois troca de e-mail e é apagado.
+
+Rode depois de migrar.py e preencher_candidato_id.py. Com --popular N gera
+dados sintéticos antes (ver verificar_indices.py; use um banco descartável):
+
+    python migrations/comparar_join_candidato.py --popular 1000000
+
+Sai com código 1 se algum resultado ou o resumo divergir.
+"""
+
+import os
+import sys
+import json
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from comum.db import conexao
+from verificar_indices import popular
+from dash.reconstruir_resumo import QUERY_DIVERGENCIAS
+
+JOIN_EMAIL = 'dc.email_candidato = c.email'
+JOIN_ID = 'c.id = dc.candidato_id'
+
+# (descrição, SQL com {join}, parâmetros, LIMIT da versão paginada ou None)
+CONSULTAS = [
+    (
+        'GET /candidatos/documentos/todos?empresa',
+        '''
+        SELECT dc.nome_documento, dc.tipo_documento, dc.status, dc.email_candidato,
+               c.nome as nome_candidato, c.empresa, dc.motivo_reprovacao,
+               dc.data_aprovacao, dc.data_reprovacao, dc.id
+        FROM documentos_candidatos dc
+        INNER JOIN candidatos c ON {join}
+        WHERE c.empresa = %s
+        ORDER BY c.nome, COALESCE(dc.nome_documento, ''), dc.id
+        ''',
+        ('empresa-7',),
+        301,
+    ),
+    (
+        'GET /candidatos/documentos/todos?status',
+        '''
+        SELECT dc.nome_documento, dc.tipo_documento, dc.status, dc.email_candidato,
+               c.nome as nome_candidato, c.empresa, dc.motivo_reprovacao,
+               dc.data_aprovacao, dc.data_reprovacao, dc.id
+        FROM documentos_candidatos dc
+        INNER JOIN candidatos c ON {join}
+        WHERE dc.status = %s
+        ORDER BY c.nome, COALESCE(dc.nome_documento, ''), dc.id
+        ''',
+        ('Reprovado',),
+        301,
+    ),
+    (
+        'GET /candidatos/documentos/todos (incluir_total)',
+        'SELECT COUNT(*) FROM documentos_candidatos dc INNER JOIN candidatos c ON {join}',
+        (),
+        None,
+    ),
+    (
+        'Resumo do dashboard (reconstruir_resumo)',
+        '''
+        SELECT COALESCE(c.empresa, ''), COALESCE(dc.tipo_documento, ''), COALESCE(dc.status, ''), COUNT(*)
+        FROM documentos_candidatos dc
+        LEFT JOIN candidatos c ON {join}
+        GROUP BY 1, 2, 3
+        ''',
+        (),
+        None,
+    ),
+]
+
+# Índices que atendem o JOIN em cada forma
+INDICES = {
+    'e-mail': ('idx_documentos_candidatos_email_nome', 'candidatos_email_key'),
+    'candidato_id': ('idx_documentos_candidatos_candidato_id', 'candidatos_pkey'),
+}
+
+
+def diferencas(cur, sql, parametros):
+    """Linhas presentes numa forma e não na outra (contando repetições)."""
+    antes, depois = sql.format(join=JOIN_EMAIL), sql.format(join=JOIN_ID)
+    cur.execute(
+        f'SELECT (SELECT COUNT(*) FROM (({antes}) EXCEPT ALL ({depois})) a), '
+        f'(SELECT COUNT(*) FROM (({depois}) EXCEPT ALL ({antes})) d)',
+        parametros * 4
+    )
+    return cur.fetchone()
+
+
+def medir(cur, sql, parametros):
+    """(custo do planejador, tempo de execução em ms, buffers lidos)."""
+    cur.execute('EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ' + sql, parametros)
+    plano = cur.fetchone()[0]
+    if isinstance(plano, str):
+        plano = json.loads(plano)
+    raiz = plano[0]['Plan']
+    buffers = raiz.get('Shared Hit Blocks', 0) + raiz.get('Shared Read Blocks', 0)
+    return raiz.get('Total Cost'), plano[0].get('Execution Time'), buffers
+
+
+def tamanho_indices(cur, nomes):
+    cur.execute(
+        'SELECT COALESCE(SUM(pg_relation_size(to_regclass(n))), 0) FROM unnest(%s::text[]) n',
+        (list(nomes),)
+    )
+    return cur.fetchone()[0]
+
+
+SQL_CONTAGEM_TIPO = '''
+    SELECT COALESCE(c.empresa, ''), COUNT(*)
+    FROM documentos_candidatos dc
+    LEFT JOIN candidatos c ON {join}
+    WHERE dc.tipo_documento = %s
+    GROUP BY 1
+'''
+
+
+def resumo_do_tipo(cur, tipo_documento):
+    """{empresa: quantidade} de documentos_resumo_empresa para um tipo."""
+    cur.execute(
+        'SELECT empresa, SUM(quantidade) FROM documentos_resumo_empresa '
+        'WHERE tipo_documento = %s GROUP BY 1 HAVING SUM(quantidade) <> 0',
+        (tipo_documento,)
+    )
+    return {empresa: int(quantidade) for empresa, quantidade in cur.fetchall()}
+
+
+def cenario_orfaos(cur):
+    """
+    Documentos enviados antes de existir o candidato contam como empresa '' e,
+    quando o candidato é criado, passam para a empresa dele. Cada passo confere
+    o resumo e que os JOINs por e-mail e por id devolvem o mesmo. Retorna
+    [(passo, ok)]; o rollback de comparar() desfaz tudo.
+    """
+    sufixo = uuid.uuid4().hex[:11]
+    tipo, empresa = f'tipo-orfao-{sufixo}', f'empresa-orfao-{sufixo}'
+    email, novo_email = f'orfao-{sufixo}@exemplo.com', f'orfao-novo-{sufixo}@exemplo.com'
+    passos = []
+
+    def conferir(passo, esperado):
+        so_antes, so_depois = diferencas(cur, SQL_CONTAGEM_TIPO, (tipo,))
+        passos.append((passo, resumo_do_tipo(cur, tipo) == esperado and not (so_antes or so_depois)))
+
+    cur.execute(
+        "INSERT INTO documentos_candidatos (email_candidato, nome_documento, tipo_documento) "
+        "VALUES (%s, 'a.pdf', %s), (%s, 'b.pdf', %s)",
+        (email, tipo, email, tipo)
+    )
+    conferir('documentos órfãos contam como empresa vazia', {'': 2})
+
+    cur.execute(
+        "INSERT INTO candidatos (nome, email, cpf, empresa) VALUES ('Candidato órfão', %s, %s, %s)",
+        (email, sufixo, empresa)
+    )
+    conferir('candidato criado depois recebe os documentos', {empresa: 2})
+
+    cur.execute('UPDATE candidatos SET email = %s WHERE email = %s', (novo_email, email))
+    conferir('troca de e-mail mantém os documentos no candidato', {empresa: 2})
+
+    cur.execute('DELETE FROM candidatos WHERE email = %s', (novo_email,))
+    conferir('candidato apagado devolve os documentos à empresa vazia', {'': 2})
+    return passos
+
+
+def comparar(conn):
+    """Retorna (resultados, custos, tamanhos, verificações do resumo, número de falhas)."""
+    resultados, custos, falhas = [], [], 0
+    with conn.cursor() as cur:
+        for descricao, sql, parametros, limite in CONSULTAS:
+            so_antes, so_depois = diferencas(cur, sql, parametros)
+            if so_antes or so_depois:
+                falhas += 1
+            resultados.append((descricao, so_antes, so_depois))
+
+            if limite is not None:
+                sql = sql + ' LIMIT %s'
+                parametros = parametros + (limite,)
+            custos.append((
+                descricao,
+                medir(cur, sql.format(join=JOIN_EMAIL), parametros),
+                medir(cur, sql.format(join=JOIN_ID), parametros),
+            ))
+        tamanhos = {forma: tamanho_indices(cur, nomes) for forma, nomes in INDICES.items()}
+
+        cur.execute(QUERY_DIVERGENCIAS)
+        verificacoes = [('resumo igual à contagem pelo JOIN por candidato_id', not cur.fetchall())]
+        verificacoes += cenario_orfaos(cur)
+        falhas += sum(1 for _, ok in verificacoes if not ok)
+    conn.rollback()
+    return resultados, custos, tamanhos, verificacoes, falhas
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    with conexao() as conn:
+        if '--popular' in args:
+            popular(conn, int(args[args.index('--popular') + 1]))
+        resultados, custos, tamanhos, verificacoes, falhas = comparar(conn)
+
+    print('Resultados (e-mail x candidato_id):')
+    for descricao, so_antes, so_depois in resultados:
+        marca = '✅' if not (so_antes or so_depois) else '❌'
+        print(f"  {marca} {descricao}: {so_antes} linha(s) só por e-mail, {so_depois} só por candidato_id")
+
+    print('Custo (e-mail -> candidato_id):')
+    for descricao, (custo_a, tempo_a, buf_a), (custo_d, tempo_d, buf_d) in custos:
+        print(f"  {descricao}: custo {custo_a} -> {custo_d}, "
+              f"{tempo_a:.1f}ms -> {tempo_d:.1f}ms, {buf_a} -> {buf_d} buffers")
+
+    print('Resumo do dashboard:')
+    for passo, ok in verificacoes:
+        print(f"  {'✅' if ok else '❌'} {passo}")
+
+    print('Índices do JOIN:')
+    for forma, nomes in INDICES.items():
+        print(f"  {forma} ({', '.join(nomes)}): {tamanhos[forma] / 1024 / 1024:.1f} MB")
+
+    sys.exit(1 if falhas else 0)
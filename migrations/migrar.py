@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Aplica as migrações versionadas (migrations/NNNN_nome.sql) em ordem.
+
+Cada migração aplicada fica registrada em schema_migrations com o SHA-256 do
+arquivo; se um arquivo já aplicado for alterado, a execução para (crie uma
+migração nova em vez de editar a antiga). Um advisory lock impede que duas
+execuções concorrentes apliquem a mesma migração.
+
+Por padrão cada arquivo roda numa transação própria, junto com o seu registro.
+Arquivos que começam com "-- migrar: sem-transacao" (ex.: CREATE INDEX
+CONCURRENTLY) rodam em autocommit, comando a comando; esses arquivos devem ter
+só comandos simples, terminados em ';' no fim da linha.
+
+Uso:
+
+    python migrations/migrar.py            # aplica as pendentes
+    python migrations/migrar.py --status   # só lista aplicadas e pendentes
+"""
+
+import os
+import re
+import sys
+import time
+import hashlib
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from comum.db import conexao
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+DIRETORIO_MIGRACOES = os.path.dirname(os.path.abspath(__file__))
+
+_ARQUIVO = re.compile(r'^(\d{4})_(\w+)\.sql$')
+_SEM_TRANSACAO = '-- migrar: sem-transacao'
+_INDICE_CONCORRENTE = re.compile(
+    r'CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+IF\s+NOT\s+EXISTS\s+(\w+)', re.IGNORECASE
+)
+# Chave arbitrária do advisory lock das migrações
+_LOCK_MIGRACOES = 73210524
+
+SQL_TABELA_MIGRACOES = '''
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        versao VARCHAR(4) PRIMARY KEY,
+        nome VARCHAR(255) NOT NULL,
+        checksum CHAR(64) NOT NULL,
+        aplicada_em TIMESTAMPTZ NOT NULL DEFAULT now(),
+        duracao_ms INTEGER
+    )
+'''
+
+
+class MigracaoInvalida(Exception):
+    """Arquivo de migração alterado depois de aplicado, ou versão duplicada."""
+
+
+class Migracao:
+    def __init__(self, caminho):
+        nome_arquivo = os.path.basename(caminho)
+        self.versao, self.nome = _ARQUIVO.match(nome_arquivo).groups()
+        self.caminho = caminho
+        with open(caminho, encoding='utf-8') as f:
+            self.sql = f.read()
+        self.checksum = hashlib.sha256(self.sql.encode('utf-8')).hexdigest()
+        self.sem_transacao = self.sql.lstrip().startswith(_SEM_TRANSACAO)
+
+    def comandos(self):
+        """Comandos do arquivo, um por ';' no fim de linha (só para sem-transacao)."""
+        comandos, atual = [], []
+        for linha in self.sql.splitlines():
+            if not atual and (not linha.strip() or linha.lstrip().startswith('--')):
+                continue
+            atual.append(linha)
+            if linha.rstrip().endswith(';'):
+                comandos.append('\n'.join(atual))
+                atual = []
+        if any(l.strip() and not l.lstrip().startswith('--') for l in atual):
+            comandos.append('\n'.join(atual))
+        return comandos
+
+
+def listar_migracoes(diretorio=DIRETORIO_MIGRACOES):
+    migracoes = [
+        Migracao(os.path.join(diretorio, nome))
+        for nome in sorted(os.listdir(diretorio)) if _ARQUIVO.match(nome)
+    ]
+    versoes = [m.versao for m in migracoes]
+    duplicadas = {v for v in versoes if versoes.count(v) > 1}
+    if duplicadas:
+        raise MigracaoInvalida(f"Versões duplicadas: {', '.join(sorted(duplicadas))}")
+    return migracoes
+
+
+def _aplicadas(cur):
+    cur.execute('SELECT versao, checksum FROM schema_migrations')
+    return dict(cur.fetchall())
+
+
+def _remover_indices_invalidos(conn, migracao):
+    """
+    CREATE INDEX CONCURRENTLY que falha deixa o índice INVALID, e o IF NOT
+    EXISTS da próxima tentativa o pularia: remove antes de reaplicar.
+    """
+    nomes = _INDICE_CONCORRENTE.findall(migracao.sql)
+    if not nomes:
+        return
+    with conn.cursor() as cur:
+        cur.execute(
+            '''
+            SELECT c.relname FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE NOT i.indisvalid AND c.relname = ANY(%s)
+            ''',
+            (nomes,)
+        )
+        for (nome,) in cur.fetchall():
+            logger.warning(f"Removendo índice inválido {nome} de uma execução anterior")
+            cur.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {nome}')
+
+
+def _aplicar(conn, migracao):
+    inicio = time.monotonic()
+    if migracao.sem_transacao:
+        conn.autocommit = True
+        try:
+            _remover_indices_invalidos(conn, migracao)
+            with conn.cursor() as cur:
+                for comando in migracao.comandos():
+                    cur.execute(comando)
+        finally:
+            conn.autocommit = False
+
+    with conn.cursor() as cur:
+        if not migracao.sem_transacao:
+            cur.execute(migracao.sql)
+        cur.execute(
+            'INSERT INTO schema_migrations (versao, nome, checksum, duracao_ms) VALUES (%s, %s, %s, %s)',
+            (migracao.versao, migracao.nome, migracao.checksum, int((time.monotonic() - inicio) * 1000))
+        )
+    conn.commit()
+    return time.monotonic() - inicio
+
+
+def migrar(conn, somente_status=False):
+    """Aplica as migrações pendentes; retorna a lista de versões aplicadas agora."""
+    migracoes = listar_migracoes()
+    conn.autocommit = False
+    with conn.cursor() as cur:
+        cur.execute(SQL_TABELA_MIGRACOES)
+        conn.commit()
+        # Lock de sessão: vale também durante os comandos em autocommit
+        cur.execute('SELECT pg_advisory_lock(%s)', (_LOCK_MIGRACOES,))
+        conn.commit()
+
+    try:
+        with conn.cursor() as cur:
+            aplicadas = _aplicadas(cur)
+        conn.commit()
+
+        for migracao in migracoes:
+            checksum = aplicadas.get(migracao.versao)
+            if checksum is not None and checksum != migracao.checksum:
+                raise MigracaoInvalida(
+                    f"{os.path.basename(migracao.caminho)} mudou depois de aplicada; crie uma migração nova"
+                )
+
+        pendentes = [m for m in migracoes if m.versao not in aplicadas]
+        for migracao in migracoes:
+            estado = 'pendente' if migracao in pendentes else 'aplicada'
+            print(f"{migracao.versao} {migracao.nome}: {estado}")
+        if somente_status:
+            return []
+
+        for migracao in pendentes:
+            print(f"Aplicando {migracao.versao} {migracao.nome}...")
+            duracao = _aplicar(conn, migracao)
+            print(f"  ok ({duracao:.1f}s)")
+        return [m.versao for m in pendentes]
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        with conn.cursor() as cur:
+            cur.execute('SELECT pg_advisory_unlock(%s)', (_LOCK_MIGRACOES,))
+        conn.commit()
+
+
+if __name__ == '__main__':
+    with conexao() as conn:
+        aplicadas = migrar(conn, somente_status='--status' in sys.argv[1:])
+    if '--status' not in sys.argv[1:]:
+        print(f"{len(aplicadas)} migração(ões) aplicada(s)")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Preenche documentos_candidatos.candidato_id nas linhas anteriores à migração
+0007 (as novas já são preenchidas por trigger).
+
+Roda online: percorre a tabela por faixas de id, cada faixa num UPDATE e num
+COMMIT próprios, então os locks de linha duram um lote e o autovacuum
+acompanha. Pode ser interrompido e rodado de novo; continua pelo que falta.
+Documentos cujo e-mail não tem candidato ficam com candidato_id nulo, como
+ficavam de fora do JOIN por e-mail.
+
+    python migrations/preencher_candidato_id.py                  # lotes de 5000
+    python migrations/preencher_candidato_id.py --lote 20000 --pausa 0.1
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from comum.db import conexao
+
+LOTE_PADRAO = 5000
+
+SQL_PREENCHER_FAIXA = '''
+    UPDATE documentos_candidatos dc
+    SET candidato_id = c.id
+    FROM candidatos c
+    WHERE dc.id >= %s AND dc.id < %s
+      AND dc.candidato_id IS NULL
+      AND c.email = dc.email_candidato
+'''
+
+
+def pendentes(cur):
+    cur.execute(
+        '''
+        SELECT COUNT(*) FROM documentos_candidatos dc
+        WHERE dc.candidato_id IS NULL
+          AND EXISTS (SELECT 1 FROM candidatos c WHERE c.email = dc.email_candidato)
+        '''
+    )
+    return cur.fetchone()[0]
+
+
+def preencher(conn, lote=LOTE_PADRAO, pausa=0.0):
+    """Preenche faixa a faixa; retorna o total de documentos atualizados."""
+    with conn.cursor() as cur:
+        cur.execute('SELECT MIN(id), MAX(id) FROM documentos_candidatos WHERE candidato_id IS NULL')
+        menor, maior = cur.fetchone()
+    conn.commit()
+    if menor is None:
+        return 0
+
+    atualizados = 0
+    inicio = time.monotonic()
+    for faixa in range(menor, maior + 1, lote):
+        with conn.cursor() as cur:
+            cur.execute(SQL_PREENCHER_FAIXA, (faixa, faixa + lote))
+            atualizados += cur.rowcount
+        conn.commit()
+        print(f"  ids {faixa}..{min(faixa + lote, maior + 1) - 1}: {atualizados} atualizados "
+              f"({time.monotonic() - inicio:.1f}s)")
+        if pausa:
+            time.sleep(pausa)
+    return atualizados
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    lote = int(args[args.index('--lote') + 1]) if '--lote' in args else LOTE_PADRAO
+    pausa = float(args[args.index('--pausa') + 1]) if '--pausa' in args else 0.0
+
+    with conexao() as conn:
+        atualizados = preencher(conn, lote, pausa)
+        with conn.cursor() as cur:
+            restantes = pendentes(cur)
+        conn.rollback()
+
+    print(f"{atualizados} documento(s) preenchido(s)")
+    if restantes:
+        # Ex.: documentos gravados enquanto a 0007 ainda não estava aplicada
+        print(f"⚠️  {restantes} documento(s) ainda sem candidato_id: rode de novo")
+    sys.exit(1 if restantes else 0)
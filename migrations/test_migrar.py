@@ -0,0 +1,175 @@
+"""
+Migrações: ordem pela versão do nome do arquivo, arquivo alterado depois de
+aplicado recusado, e arquivos "-- migrar: sem-transacao" executados em
+autocommit, comando a comando, com o registro gravado só depois.
+"""
+
+import hashlib
+
+import pytest
+
+import migrar
+from migrar import Migracao, MigracaoInvalida, listar_migracoes
+
+
+def escrever(diretorio, nome, sql):
+    caminho = diretorio / nome
+    caminho.write_text(sql, encoding='utf-8')
+    return str(caminho)
+
+
+SEM_TRANSACAO = '''-- migrar: sem-transacao
+-- comentário do arquivo
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_a
+    ON a (x);
+-- entre comandos
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_b ON b (y);
+DROP INDEX CONCURRENTLY IF EXISTS idx_c
+'''
+
+
+@pytest.fixture
+def diretorio(tmp_path):
+    escrever(tmp_path, '0002_indices.sql', SEM_TRANSACAO)
+    escrever(tmp_path, '0001_base.sql', 'CREATE TABLE a (x INT);\nCREATE TABLE b (y INT);\n')
+    escrever(tmp_path, '0010_depois.sql', 'ALTER TABLE a ADD COLUMN z INT;\n')
+    escrever(tmp_path, 'README.md', 'não é migração')
+    escrever(tmp_path, '3_sem_versao.sql', 'SELECT 1;')
+    return tmp_path
+
+
+def test_ordem_pela_versao(diretorio):
+    assert [(m.versao, m.nome) for m in listar_migracoes(str(diretorio))] == [
+        ('0001', 'base'), ('0002', 'indices'), ('0010', 'depois'),
+    ]
+
+
+def test_versao_duplicada(diretorio):
+    escrever(diretorio, '0002_outra.sql', 'SELECT 1;')
+    with pytest.raises(MigracaoInvalida, match='0002'):
+        listar_migracoes(str(diretorio))
+
+
+def test_comandos_sem_transacao(diretorio):
+    migracao = Migracao(str(diretorio / '0002_indices.sql'))
+
+    assert migracao.sem_transacao
+    assert migracao.comandos() == [
+        'CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_a\n    ON a (x);',
+        'CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_b ON b (y);',
+        'DROP INDEX CONCURRENTLY IF EXISTS idx_c',
+    ]
+    assert not Migracao(str(diretorio / '0001_base.sql')).sem_transacao
+
+
+class ConexaoMigracoes:
+    """Registra (sql, autocommit) de cada comando; `aplicadas` é o schema_migrations."""
+
+    def __init__(self, aplicadas=None, indices_invalidos=()):
+        self.aplicadas = dict(aplicadas or {})
+        self.indices_invalidos = list(indices_invalidos)
+        self.autocommit = False
+        self.comandos = []
+        self.commits = 0
+        self.rollbacks = 0
+        self._linhas = []
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, vars=None):
+        self.comandos.append((' '.join(sql.split()), self.autocommit))
+        if 'SELECT versao, checksum' in sql:
+            self._linhas = list(self.aplicadas.items())
+        elif 'FROM pg_index' in sql:
+            self._linhas = [(nome,) for nome in self.indices_invalidos if nome in vars[0]]
+        elif sql.startswith('INSERT INTO schema_migrations'):
+            self.aplicadas[vars[0]] = vars[2]
+            self._linhas = []
+
+    def fetchall(self):
+        linhas, self._linhas = self._linhas, []
+        return linhas
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def executados(self, *trechos):
+        """Comandos que contêm algum dos trechos, na ordem."""
+        return [(sql, auto) for sql, auto in self.comandos if any(t in sql for t in trechos)]
+
+
+@pytest.fixture
+def rodar(diretorio, monkeypatch):
+    original = migrar.listar_migracoes
+    monkeypatch.setattr(migrar, 'listar_migracoes', lambda: original(str(diretorio)))
+    return migrar.migrar
+
+
+def checksum(diretorio, nome):
+    return hashlib.sha256((diretorio / nome).read_text(encoding='utf-8').encode('utf-8')).hexdigest()
+
+
+def test_aplica_pendentes_em_ordem(diretorio, rodar):
+    conn = ConexaoMigracoes()
+
+    assert rodar(conn) == ['0001', '0002', '0010']
+    assert list(conn.aplicadas) == ['0001', '0002', '0010']
+    assert conn.executados('CREATE TABLE a', 'idx_', 'ADD COLUMN z', 'INSERT INTO schema_migrations') == [
+        ('CREATE TABLE a (x INT); CREATE TABLE b (y INT);', False),
+        ('INSERT INTO schema_migrations (versao, nome, checksum, duracao_ms) VALUES (%s, %s, %s, %s)', False),
+        ('CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_a ON a (x);', True),
+        ('CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_b ON b (y);', True),
+        ('DROP INDEX CONCURRENTLY IF EXISTS idx_c', True),
+        ('INSERT INTO schema_migrations (versao, nome, checksum, duracao_ms) VALUES (%s, %s, %s, %s)', False),
+        ('ALTER TABLE a ADD COLUMN z INT;', False),
+        ('INSERT INTO schema_migrations (versao, nome, checksum, duracao_ms) VALUES (%s, %s, %s, %s)', False),
+    ]
+    assert conn.autocommit is False
+    assert conn.executados('pg_advisory_unlock')
+
+
+def test_so_aplica_as_pendentes(diretorio, rodar):
+    conn = ConexaoMigracoes({'0001': checksum(diretorio, '0001_base.sql')})
+
+    assert rodar(conn) == ['0002', '0010']
+    assert not conn.executados('CREATE TABLE a')
+
+
+def test_status_nao_aplica(diretorio, rodar):
+    conn = ConexaoMigracoes()
+    assert rodar(conn, somente_status=True) == []
+    assert conn.aplicadas == {}
+
+
+def test_indice_invalido_de_execucao_anterior_e_removido(diretorio, rodar):
+    conn = ConexaoMigracoes(
+        {'0001': checksum(diretorio, '0001_base.sql')}, indices_invalidos=['idx_b']
+    )
+
+    rodar(conn)
+
+    comandos = conn.executados('idx_b')
+    assert comandos[0] == ('DROP INDEX CONCURRENTLY IF EXISTS idx_b', True)
+    assert comandos[1] == ('CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_b ON b (y);', True)
+
+
+def test_arquivo_alterado_depois_de_aplicado(diretorio, rodar):
+    conn = ConexaoMigracoes({'0001': '0' * 64})
+
+    with pytest.raises(MigracaoInvalida, match='0001_base.sql'):
+        rodar(conn)
+
+    assert conn.aplicadas == {'0001': '0' * 64}
+    assert conn.rollbacks == 1
+    assert conn.executados('pg_advisory_unlock')
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Confere com EXPLAIN que as consultas quentes dos handlers usam índice.
+
+Para cada consulta, o plano (EXPLAIN, sem executar) é percorrido e qualquer
+Seq Scan numa das tabelas grandes conta como falha. Numa base pequena o
+planejador prefere Seq Scan mesmo com índice, então a verificação só faz
+sentido com volume: --popular N gera N documentos (e N/5 candidatos) sintéticos
+antes de verificar. Use um banco descartável para isso.
+
+    python migrations/verificar_indices.py                   # banco atual
+    python migrations/verificar_indices.py --popular 1000000 # gera 1M documentos antes
+
+Sai com código 1 se alguma consulta não usar índice.
+"""
+
+import os
+import sys
+import json
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from comum.db import conexao
+
+TABELAS_GRANDES = {'candidatos', 'documentos_candidatos', 'usuarios', 'reset_tokens', 'documentos'}
+
+# (descrição, SQL, parâmetros) no formato usado pelos handlers
+CONSULTAS = [
+    (
+        'GET /candidatos?empresa (página seguinte)',
+        'SELECT id, nome, email, situacao, estado, vaga, telefone, sexo, empresa FROM candidatos '
+        'WHERE empresa = %s AND id > %s ORDER BY id LIMIT %s',
+        ('empresa-7', 1000, 101),
+    ),
+    (
+        'GET /candidatos/documentos',
+        'SELECT nome_documento, tipo_documento, status FROM documentos_candidatos WHERE email_candidato = %s',
+        ('candidato-42@exemplo.com',),
+    ),
+    (
+        'PUT /candidatos/documentos/aprovar',
+        'SELECT id, status FROM documentos_candidatos WHERE nome_documento = %s AND email_candidato = %s '
+        'LIMIT 1 FOR UPDATE',
+        ('documento-1.pdf', 'candidato-42@exemplo.com'),
+    ),
+    (
+        'GET /candidatos/documentos/todos?empresa',
+        '''
+        SELECT dc.nome_documento, dc.tipo_documento, dc.status, dc.email_candidato,
+               c.nome as nome_candidato, c.empresa, dc.motivo_reprovacao,
+               dc.data_aprovacao, dc.data_reprovacao, dc.id
+        FROM documentos_candidatos dc
+        INNER JOIN candidatos c ON c.id = dc.candidato_id
+        WHERE c.empresa = %s
+        ORDER BY c.nome, COALESCE(dc.nome_documento, ''), dc.id LIMIT %s
+        ''',
+        ('empresa-7', 301),
+    ),
+    (
+        'GET /candidatos/documentos/todos?status',
+        '''
+        SELECT dc.nome_documento, dc.tipo_documento, dc.status, dc.email_candidato,
+               c.nome as nome_candidato, c.empresa, dc.motivo_reprovacao,
+               dc.data_aprovacao, dc.data_reprovacao, dc.id
+        FROM documentos_candidatos dc
+        INNER JOIN candidatos c ON c.id = dc.candidato_id
+        WHERE dc.status = %s
+        ORDER BY c.nome, COALESCE(dc.nome_documento, ''), dc.id LIMIT %s
+        ''',
+        ('Reprovado', 301),
+    ),
+    (
+        'GET /observability/contratacoes?empresa',
+        "SELECT COUNT(*) FROM candidatos c WHERE c.situacao = 'Processo Finalizado' AND c.empresa = %s",
+        ('empresa-7',),
+    ),
+    (
+        'POST /login',
+        'SELECT id, email, senha, role, empresa FROM usuarios WHERE email = %s',
+        ('candidato-42@exemplo.com',),
+    ),
+    (
+        'POST /usuarios/{id}/senha',
+        'DELETE FROM reset_tokens WHERE usuario_id = %s AND token = %s RETURNING expiracao',
+        (42, '00000000-0000-0000-0000-000000000000'),
+    ),
+    (
+        'GET /acompanhamento-documentos/{candidato_id}',
+        'SELECT id, nome, status, data_upload, url FROM documentos WHERE candidato_id = %s',
+        (42,),
+    ),
+]
+
+# Dados sintéticos: 100 empresas, N/5 candidatos (e usuários), N documentos de
+# candidatos com status concentrado em PENDENTE, N/5 tokens e N/5 documentos.
+# '%%' é o operador de módulo escapado para o psycopg2
+SQL_POPULAR = '''
+    INSERT INTO candidatos (nome, email, cpf, senha, situacao, empresa)
+    SELECT 'Candidato ' || g, 'candidato-' || g || '@exemplo.com', lpad(g::text, 11, '0'), 'x',
+           CASE WHEN g %% 10 = 0 THEN 'Processo Finalizado' ELSE 'Pendente' END,
+           'empresa-' || (g %% 100)
+    FROM generate_series(1, %(candidatos)s) g
+    ON CONFLICT DO NOTHING;
+
+    INSERT INTO usuarios (nome, email, senha, role, empresa)
+    SELECT 'Candidato ' || g, 'candidato-' || g || '@exemplo.com', 'x', 'candidato', 'empresa-' || (g %% 100)
+    FROM generate_series(1, %(candidatos)s) g
+    ON CONFLICT DO NOTHING;
+
+    INSERT INTO documentos_candidatos (email_candidato, nome_documento, tipo_documento, status)
+    SELECT 'candidato-' || (g %% %(candidatos)s + 1) || '@exemplo.com', 'documento-' || (g / %(candidatos)s) || '.pdf',
+           'tipo-' || (g %% 8),
+           CASE WHEN g %% 50 = 0 THEN 'Reprovado' WHEN g %% 5 = 0 THEN 'APROVADO' ELSE 'PENDENTE' END
+    FROM generate_series(1, %(documentos)s) g;
+
+    INSERT INTO reset_tokens (usuario_id, token, expiracao)
+    SELECT u.id, md5(u.id::text), now() + interval '1 day'
+    FROM usuarios u ORDER BY u.id LIMIT %(candidatos)s;
+
+    INSERT INTO documentos (candidato_id, nome, status, label, acuracia)
+    SELECT c.id, 'documento.pdf', 'pending', 'tipo-' || (c.id %% 8), 90
+    FROM candidatos c ORDER BY c.id LIMIT %(candidatos)s;
+'''
+
+
+def popular(conn, documentos):
+    inicio = time.monotonic()
+    with conn.cursor() as cur:
+        cur.execute(SQL_POPULAR, {'documentos': documentos, 'candidatos': max(1, documentos // 5)})
+    conn.commit()
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute('ANALYZE')
+    finally:
+        conn.autocommit = False
+    print(f"Base populada com {documentos} documentos em {time.monotonic() - inicio:.1f}s")
+
+
+def varreduras_sequenciais(plano):
+    """Tabelas grandes lidas por Seq Scan em algum nó do plano."""
+    encontradas = []
+    if plano.get('Node Type') == 'Seq Scan' and plano.get('Relation Name') in TABELAS_GRANDES:
+        encontradas.append(plano['Relation Name'])
+    for filho in plano.get('Plans', []):
+        encontradas.extend(varreduras_sequenciais(filho))
+    return encontradas
+
+
+def verificar(conn):
+    """Retorna [(descricao, tabelas com Seq Scan, custo total)] de cada consulta."""
+    resultados = []
+    with conn.cursor() as cur:
+        for descricao, sql, parametros in CONSULTAS:
+            cur.execute('EXPLAIN (FORMAT JSON) ' + sql, parametros)
+            plano = cur.fetchone()[0]
+            if isinstance(plano, str):
+                plano = json.loads(plano)
+            raiz = plano[0]['Plan']
+            resultados.append((descricao, varreduras_sequenciais(raiz), raiz.get('Total Cost')))
+    conn.rollback()
+    return resultados
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    with conexao() as conn:
+        if '--popular' in args:
+            popular(conn, int(args[args.index('--popular') + 1]))
+
+        falhas = 0
+        for descricao, seq_scans, custo in verificar(conn):
+            if seq_scans:
+                falhas += 1
+                print(f"❌ {descricao}: Seq Scan em {', '.join(sorted(set(seq_scans)))} (custo {custo})")
+            else:
+                print(f"✅ {descricao}: usa índice (custo {custo})")
+
+    print(f"{len(CONSULTAS) - falhas}/{len(CONSULTAS)} consultas usando índice")
+    sys.exit(1 if falhas else 0)
@@ -1,29 +1,363 @@
 import os
 import json
 import base64
+import hashlib
 import urllib3
 
-S3_API_GATEWAY_URL = os.environ.get('S3_API_GATEWAY_URL', 'https://ktvl2lg1fh.execute-api.us-east-1.amazonaws.com/generation-uri')
+from assinador import criar_assinador, FalhaAssinatura
+from ingestao import (
+    resumo_evento, resumir, decodificar_base64, separar_arquivo_json, CorpoInvalido, MedidorMemoria
+)
+from imagens import chave_com_extensao, content_type_armazenado, normalizar_imagem
+from multipart import calcular_partes, MULTIPART_EXPIRACAO
+from validacao import ArquivoRecusado, validar, validar_base64, validar_tamanho, limite_para
+from comum.db import conexao
+from comum.paginacao import CursorInvalido, ler_parametros, buscar_pagina, cabecalhos_paginacao
+
 DOCUMENTS_FOLDER = 'documentos/'
+# Upload direto (navegador -> S3): validade da URL/POST. Os limites de tamanho
+# (geral e por tipo de documento) ficam em validacao.py
+UPLOAD_DIRETO_EXPIRACAO = int(os.environ.get('UPLOAD_DIRETO_EXPIRACAO_SEGUNDOS', '900'))
 http = urllib3.PoolManager()
+# URLs assinadas geradas no próprio processo (PRESIGN_MODO=local) ou pela
+# Lambda url_assinada via API Gateway (PRESIGN_MODO=remoto)
+assinador = criar_assinador()
+
+def content_type_por_extensao(filename, padrao=None):
+    """Content-Type correto baseado na extensão do arquivo"""
+    ext = filename.lower().split('.')[-1]
+    if ext == 'pdf':
+        return 'application/pdf'
+    elif ext in ['png']:
+        return 'image/png'
+    elif ext in ['jpg', 'jpeg']:
+        return 'image/jpeg'
+    elif ext in ['gif']:
+        return 'image/gif'
+    # Adicione outros tipos conforme necessário
+    return padrao
+
+def ler_body_json(event):
+    body = event.get('body') or '{}'
+    if event.get('isBase64Encoded', False):
+        body = base64.b64decode(body).decode('utf-8')
+    dados = json.loads(body)
+    if not isinstance(dados, dict):
+        raise ValueError('Corpo da requisição deve ser um objeto JSON.')
+    return dados
+
+def nome_arquivo_valido(filename):
+    return bool(filename) and '/' not in filename and '\\' not in filename and filename not in ('.', '..')
+
+def registrar_arquivo(key, metadados):
+    """Grava (ou atualiza) o arquivo confirmado em documentos_arquivos"""
+    with conexao() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                '''
+                INSERT INTO documentos_arquivos
+                    (chave, email_candidato, tipo_documento, content_type, tamanho, etag, sha256, tamanho_original)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT (chave) DO UPDATE SET
+                    email_candidato = EXCLUDED.email_candidato,
+                    tipo_documento = EXCLUDED.tipo_documento,
+                    content_type = EXCLUDED.content_type,
+                    tamanho = EXCLUDED.tamanho,
+                    etag = EXCLUDED.etag,
+                    sha256 = EXCLUDED.sha256,
+                    tamanho_original = EXCLUDED.tamanho_original,
+                    enviado_em = now()
+                ''',
+                (
+                    key,
+                    metadados['metadados'].get('email'),
+                    metadados['metadados'].get('document-type'),
+                    metadados['content_type'],
+                    metadados['tamanho'],
+                    metadados['etag'],
+                    metadados['metadados'].get('sha256'),
+                    metadados.get('tamanho_original'),
+                )
+            )
+        conn.commit()
+
+def buscar_duplicado(key, email, document_type, sha256):
+    """
+    True se `key` já guarda este mesmo conteúdo (SHA-256), enviado pelo
+    candidato para o mesmo tipo de documento. O conteúdo igual sob outro nome
+    não conta: a resposta precisa apontar para o arquivo pedido.
+    """
+    if not email or not document_type:
+        return False
+    with conexao() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                '''
+                SELECT 1 FROM documentos_arquivos
+                WHERE chave = %s AND email_candidato = %s AND tipo_documento = %s AND sha256 = %s
+                ''',
+                (key, email, document_type, sha256)
+            )
+            row = cur.fetchone()
+        conn.rollback()
+    return row is not None
+
+def registrar_upload_proxy(key, email, document_type, content_type, tamanho, etag, sha256, tamanho_original=None):
+    """Registra em documentos_arquivos um upload feito pelo POST /upload-doc-plataforma"""
+    try:
+        registrar_arquivo(key, {
+            'tamanho': tamanho,
+            'tamanho_original': tamanho_original,
+            'etag': etag.strip('"') if etag else None,
+            'content_type': content_type,
+            'metadados': {'email': email, 'document-type': document_type, 'sha256': sha256},
+        })
+    except Exception as e:
+        # O arquivo já está no S3; sem o registro, só a deduplicação deixa de valer para ele
+        print(f"Falha ao registrar {key} em documentos_arquivos: {e}")
+
+def listar_documentos_indexados(event):
+    """
+    Documentos enviados, lidos do índice documentos_arquivos (mantido pelos
+    uploads e pelo reconciliar.py) em vez de listar o S3. Filtros opcionais:
+    email, document_type; paginado por cursor.
+    """
+    query_params = event.get('queryStringParameters') or {}
+    try:
+        limite, chave, _ = ler_parametros(query_params, (str,))
+    except CursorInvalido as e:
+        return response_error(400, str(e))
+
+    condicoes = []
+    params = []
+    if query_params.get('email'):
+        condicoes.append('email_candidato = %s')
+        params.append(query_params['email'])
+    if query_params.get('document_type'):
+        condicoes.append('tipo_documento = %s')
+        params.append(query_params['document_type'])
+    if chave:
+        condicoes.append('chave > %s')
+        params.append(chave[0])
+    where = ('WHERE ' + ' AND '.join(condicoes)) if condicoes else ''
+
+    sql = f'''
+        SELECT chave, email_candidato, tipo_documento, content_type, tamanho, sha256, enviado_em
+        FROM documentos_arquivos
+        {where}
+        ORDER BY chave
+        LIMIT %s
+    '''
+    with conexao() as conn:
+        linhas, proximo_cursor = buscar_pagina(conn, sql, params, limite, lambda row: (row[0],))
+        conn.rollback()
+
+    documentos = [
+        {
+            'key': row[0],
+            'filename': row[0][len(DOCUMENTS_FOLDER):] if row[0].startswith(DOCUMENTS_FOLDER) else row[0],
+            'email': row[1],
+            'document_type': row[2],
+            'content_type': row[3],
+            'tamanho': row[4],
+            'sha256': row[5],
+            'enviado_em': row[6].isoformat() if row[6] else None,
+        }
+        for row in linhas
+    ]
+    return {
+        'statusCode': 200,
+        'body': json.dumps(documentos),
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            **cabecalhos_paginacao(proximo_cursor)
+        }
+    }
+
+def iniciar_upload_direto(event):
+    """
+    Fase 1 do upload direto: devolve um POST (padrão) ou PUT assinado para o
+    navegador enviar o arquivo ao S3 sem passar os bytes pela Lambda.
+    """
+    try:
+        dados = ler_body_json(event)
+    except ValueError as e:
+        return response_error(400, f'Corpo da requisição inválido: {e}')
+
+    filename = dados.get('filename')
+    email = dados.get('email')
+    document_type = dados.get('document_type')
+    metodo = (dados.get('metodo') or 'post').lower()
+
+    if not nome_arquivo_valido(filename):
+        return response_error(400, 'Nome do arquivo não informado ou inválido.')
+    if metodo not in ('post', 'put'):
+        return response_error(400, "metodo deve ser 'post' ou 'put'.")
+
+    key = DOCUMENTS_FOLDER + filename
+    content_type = content_type_por_extensao(filename, dados.get('content_type') or 'application/octet-stream')
+
+    try:
+        if metodo == 'post':
+            post = assinador.post_upload(
+                key, UPLOAD_DIRETO_EXPIRACAO, email=email, content_type=content_type,
+                document_type=document_type, tamanho_maximo=limite_para(document_type)
+            )
+            resposta = {'url': post['url'], 'fields': post['fields']}
+        else:
+            url = assinador.url_upload(
+                key, UPLOAD_DIRETO_EXPIRACAO, email=email, content_type=content_type, document_type=document_type
+            )
+            # Os metadados fazem parte da assinatura: o PUT precisa enviar os mesmos headers
+            put_headers = {'Content-Type': content_type}
+            if email:
+                put_headers['x-amz-meta-email'] = email
+            if document_type:
+                put_headers['x-amz-meta-document-type'] = document_type
+            resposta = {'url': url, 'headers': put_headers}
+    except FalhaAssinatura as e:
+        return response_error(502, str(e))
+
+    print(f"Upload direto iniciado: key={key}, metodo={metodo}")
+    return {
+        'statusCode': 200,
+        'body': json.dumps({
+            'metodo': metodo,
+            'key': key,
+            'filename': filename,
+            'expires_in': UPLOAD_DIRETO_EXPIRACAO,
+            **resposta
+        }),
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
+    }
+
+def confirmar_upload_direto(event):
+    """
+    Fase 2 do upload direto: confere no S3 (HEAD) que o arquivo chegou e
+    registra o envio em documentos_arquivos.
+    """
+    try:
+        dados = ler_body_json(event)
+    except ValueError as e:
+        return response_error(400, f'Corpo da requisição inválido: {e}')
+
+    filename = dados.get('filename')
+    if not nome_arquivo_valido(filename):
+        return response_error(400, 'Nome do arquivo não informado ou inválido.')
+
+    return registrar_upload_concluido(DOCUMENTS_FOLDER + filename)
+
+def registrar_upload_concluido(key):
+    """Confere o arquivo no S3 e o registra; usado pelo upload direto e pelo multipart."""
+    try:
+        metadados = assinador.metadados(key)
+    except FalhaAssinatura as e:
+        return response_error(502, str(e))
+    if metadados is None:
+        return response_error(404, 'Arquivo não encontrado no S3. Envie o arquivo antes de confirmar.')
+
+    registrar_arquivo(key, metadados)
+
+    print(f"Upload confirmado: key={key}, tamanho={metadados['tamanho']} bytes")
+    return {
+        'statusCode': 200,
+        'body': json.dumps({
+            'key': key,
+            'tamanho': metadados['tamanho'],
+            'etag': metadados['etag'],
+            'email': metadados['metadados'].get('email'),
+            'document_type': metadados['metadados'].get('document-type'),
+        }),
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
+    }
+
+def operar_multipart(event, etapa):
+    """
+    Upload multipart feito pelo cliente, com as partes enviadas em paralelo
+    direto ao S3:
+      iniciar   {filename, tamanho, email, document_type, content_type} -> upload_id + URLs das partes
+      partes    {filename, upload_id, partes: [n, ...]} -> novas URLs (para retomar um envio)
+      concluir  {filename, upload_id, partes: [{numero, etag}, ...]} -> registra o arquivo
+      abortar   {filename, upload_id}
+    """
+    try:
+        dados = ler_body_json(event)
+    except ValueError as e:
+        return response_error(400, f'Corpo da requisição inválido: {e}')
+
+    filename = dados.get('filename')
+    if not nome_arquivo_valido(filename):
+        return response_error(400, 'Nome do arquivo não informado ou inválido.')
+    key = DOCUMENTS_FOLDER + filename
+    upload_id = dados.get('upload_id')
+    if etapa != 'iniciar' and not upload_id:
+        return response_error(400, 'upload_id é obrigatório.')
+
+    try:
+        if etapa == 'iniciar':
+            try:
+                tamanho = int(dados.get('tamanho'))
+            except (TypeError, ValueError):
+                return response_error(400, 'tamanho (em bytes) é obrigatório.')
+            try:
+                validar_tamanho(tamanho, dados.get('document_type'))
+            except ArquivoRecusado as e:
+                return response_error(e.status, str(e))
+
+            tamanho_parte, quantidade = calcular_partes(tamanho)
+            content_type = content_type_por_extensao(filename, dados.get('content_type') or 'application/octet-stream')
+            upload_id, partes = assinador.iniciar_multipart(
+                key, range(1, quantidade + 1), MULTIPART_EXPIRACAO,
+                email=dados.get('email'), content_type=content_type, document_type=dados.get('document_type')
+            )
+            resposta = {'tamanho_parte': tamanho_parte, 'partes': partes, 'expires_in': MULTIPART_EXPIRACAO}
+
+        elif etapa == 'partes':
+            try:
+                numeros = [int(n) for n in dados.get('partes') or []]
+            except (TypeError, ValueError):
+                return response_error(400, 'partes inválidas')
+            partes = assinador.urls_partes(key, upload_id, numeros, MULTIPART_EXPIRACAO)
+            resposta = {'partes': partes, 'expires_in': MULTIPART_EXPIRACAO}
+
+        elif etapa == 'concluir':
+            try:
+                partes = [{'numero': int(p['numero']), 'etag': p['etag']} for p in dados.get('partes') or []]
+            except (TypeError, ValueError, KeyError):
+                partes = None
+            if not partes or any(not p['numero'] or not p['etag'] for p in partes):
+                return response_error(400, 'partes deve ser uma lista de {numero, etag}.')
+            assinador.concluir_multipart(key, upload_id, partes)
+            return registrar_upload_concluido(key)
+
+        else:
+            assinador.abortar_multipart(key, upload_id)
+            resposta = {}
+    except FalhaAssinatura as e:
+        return response_error(502, str(e))
+
+    return {
+        'statusCode': 200,
+        'body': json.dumps({'key': key, 'upload_id': upload_id, **resposta}),
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
+    }
+
 def lambda_handler(event, context):
-    print('Entrou na função Lambda')
-    print("Evento recebido:", json.dumps(event))
-    print(f"requestContext: {event.get('requestContext')}")
-    print(f"rawPath: {event.get('rawPath')}")
-    print(f"Headers recebidos: {event.get('headers')}")
+    # Só um resumo: o evento traz o arquivo inteiro em base64
+    print("Evento recebido:", json.dumps(resumo_evento(event)))
 
     http_method = event.get('requestContext', {}).get('http', {}).get('method', '')
     raw_path = event.get('rawPath', '')
 
     if raw_path == '/upload-doc-plataforma' and http_method == 'POST':
+        medidor = MedidorMemoria()
+        file_content = None
+        conteudo = None
         try:
             body = event.get('body')
             is_base64 = event.get('isBase64Encoded', False)
 
-            print(f"Body recebido: tipo={type(body)}, tamanho={len(body) if isinstance(body, str) else 'n/a'}")
-            print(f"isBase64Encoded: {is_base64}")
-
             if not body:
                 print("Body vazio!")
                 return response_error(400, 'Corpo da requisição está vazio.')
@@ -38,55 +372,57 @@ def lambda_handler(event, context):
 
             # Força o content_type correto baseado na extensão do arquivo
             if filename:
-                ext = filename.lower().split('.')[-1]
-                if ext == 'pdf':
-                    content_type = 'application/pdf'
-                elif ext in ['png']:
-                    content_type = 'image/png'
-                elif ext in ['jpg', 'jpeg']:
-                    content_type = 'image/jpeg'
-                elif ext in ['gif']:
-                    content_type = 'image/gif'
-                # Adicione outros tipos conforme necessário
-            file_content = None
-
-            body_json = None
-            if isinstance(body, str):
+                content_type = content_type_por_extensao(filename, content_type)
+
+            # Corpo JSON: o file_content é decodificado direto do texto do body,
+            # em blocos, para o buffer reaproveitado (sem cópia extra do base64)
+            body_json, texto_b64, inicio, fim = None, None, 0, 0
+            resumo_sha256 = hashlib.sha256()
+            if isinstance(body, str) and not is_base64:
                 try:
-                    body_json = json.loads(body)
-                    print(f"Body JSON decodificado: {body_json}")
+                    body_json, texto_b64, inicio, fim = separar_arquivo_json(body)
                 except json.JSONDecodeError:
                     print("Body não é um JSON válido!")
-                    body_json = None
 
             if isinstance(body_json, dict):
                 filename = filename or body_json.get('filename') or body_json.get('Filename')
                 email = email or body_json.get('email') or body_json.get('Email')
                 document_type = document_type or body_json.get('document_type') or body_json.get('Document_Type')
                 content_type = content_type or body_json.get('content_type') or body_json.get('Content_Type')
-                file_content_b64 = body_json.get('file_content')
-                print(f"filename extraído do JSON: {filename}")
-                print(f"email extraído: {email}")
-                print(f"content_type extraído: {content_type}")
-                print(f"document_type extraído: {document_type}")
-                print(f"file_content_b64 presente? {'Sim' if file_content_b64 else 'Não'}")
-                if file_content_b64:
+                print(f"Campos do JSON: filename={resumir(filename)}, content_type={resumir(content_type)}, "
+                      f"document_type={resumir(document_type)}, file_content={fim - inicio} caracteres")
+                if texto_b64:
+                    # Tipo pela assinatura e tamanho pelo base64, antes de decodificar
                     try:
-                        file_content = base64.b64decode(file_content_b64)
+                        content_type = validar_base64(
+                            texto_b64, inicio, fim, content_type_por_extensao(filename or '', content_type), document_type
+                        )
+                    except ArquivoRecusado as e:
+                        print(f"Arquivo recusado: {e}")
+                        return response_error(e.status, str(e))
+                    try:
+                        file_content = decodificar_base64(texto_b64, inicio, fim, resumo=resumo_sha256)
                         print(f"file_content decodificado: tamanho={len(file_content)} bytes")
-                    except Exception as e:
-                        print(f"Erro ao decodificar file_content: {e}")
-                        return response_error(400, f"Erro ao decodificar file_content: {e}")
+                    except CorpoInvalido as e:
+                        print(str(e))
+                        return response_error(400, str(e))
 
             if file_content is None:
                 print("file_content não veio no JSON, tentando modo antigo...")
-                if is_base64:
-                    file_content = base64.b64decode(body)
-                elif isinstance(body, bytes):
-                    file_content = body
-                else:
-                    file_content = body.encode('utf-8')
-                print(f"file_content modo antigo: tamanho={len(file_content) if file_content else 'n/a'} bytes")
+                extensao = content_type_por_extensao(filename or '', content_type)
+                try:
+                    if is_base64:
+                        content_type = validar_base64(body, content_type_declarado=extensao, document_type=document_type)
+                        file_content = decodificar_base64(body, resumo=resumo_sha256)
+                    else:
+                        file_content = body if isinstance(body, bytes) else body.encode('utf-8')
+                        content_type = validar(file_content, len(file_content), extensao, document_type)
+                        resumo_sha256.update(file_content)
+                except ArquivoRecusado as e:
+                    print(f"Arquivo recusado: {e}")
+                    return response_error(e.status, str(e))
+                print(f"file_content modo antigo: tamanho={len(file_content)} bytes")
+            sha256 = resumo_sha256.hexdigest()
 
             if not filename:
                 print("filename não informado!")
@@ -95,65 +431,133 @@ def lambda_handler(event, context):
             print(f"Chave do S3: {DOCUMENTS_FOLDER + filename}")
 
             key = DOCUMENTS_FOLDER + filename
-
-            payload = {
-                "operation": "upload",
-                "key": key,
-                "expiration": 3600,
-                "email": email,  # Adicionado para garantir metadado na URL assinada
-                "content_type": content_type,  # Garante que o Content-Type da URL assinada será igual ao do PUT
-                "document_type": document_type
+            # Com IMAGEM_FORMATO a imagem é gravada com a extensão do formato
+            # convertido (foto.png -> foto.jpg); a deduplicação procura por ela
+            content_type_final = content_type_armazenado(content_type)
+            chave_prevista = chave_com_extensao(key, content_type_final) if content_type_final != content_type else key
+
+            # Este mesmo arquivo já está no S3 com o mesmo conteúdo: não reenvia
+            try:
+                duplicado = buscar_duplicado(chave_prevista, email, document_type, sha256)
+            except Exception as e:
+                print(f"Falha ao consultar duplicados, seguindo com o upload: {e}")
+                duplicado = False
+            if duplicado:
+                try:
+                    presigned_url, _ = assinador.url_download(chave_prevista, 3600)
+                except FalhaAssinatura as e:
+                    return response_error(502, str(e))
+                print(f"Arquivo idêntico já enviado ({chave_prevista}), upload ignorado")
+                return {
+                    'statusCode': 200,
+                    'body': json.dumps({'url': presigned_url.split('?')[0], 'duplicado': True, 'sha256': sha256,
+                                        'content_type': content_type_final,
+                                        'filename': chave_prevista[len(DOCUMENTS_FOLDER):]}),
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
+                }
+
+            # Imagens podem ser reduzidas/regravadas antes de ir para o S3
+            # (IMAGEM_NORMALIZAR); o sha256 continua sendo o do arquivo recebido
+            content_type_recebido = content_type
+            conteudo, content_type = normalizar_imagem(file_content, content_type)
+            if len(conteudo) != len(file_content):
+                print(f"Imagem normalizada: {len(file_content)} -> {len(conteudo)} bytes ({content_type})")
+            # Convertida de formato: a extensão da chave acompanha o Content-Type
+            if content_type != content_type_recebido:
+                key = chave_com_extensao(key, content_type)
+                print(f"Chave do S3 ajustada ao formato convertido: {key}")
+
+            try:
+                presigned_url = assinador.url_upload(
+                    key, 3600, email=email, content_type=content_type, document_type=document_type, sha256=sha256
+                )
+            except FalhaAssinatura as e:
+                return response_error(502, str(e))
+            print(f"URL assinada recebida: {presigned_url.split('?')[0]}")
+
+            # Define o Content-Type dinamicamente; com Content-Length explícito o
+            # buffer vai inteiro para o socket, sem transfer-encoding chunked
+            put_headers = {
+                'Content-Type': content_type or 'application/octet-stream',
+                'Content-Length': str(len(conteudo))
             }
-
-            print(f"Payload para API Gateway: {payload}")
-
-            api_response = http.request(
-                'POST',
-                S3_API_GATEWAY_URL,
-                body=json.dumps(payload),
-                headers={'Content-Type': 'application/json'}
-            )
-
-            print(f"Resposta da API Gateway: status={api_response.status}")
-            if api_response.status != 200:
-                print("Erro ao obter URL assinada:", api_response.status, api_response.data.decode())
-                return response_error(502, 'Falha ao obter URL assinada.')
-
-            presigned_data = json.loads(api_response.data.decode())
-            presigned_url = presigned_data.get('url')
-            print(f"URL assinada recebida: {presigned_url}")
-
-            # Define o Content-Type dinamicamente
-            put_headers = {'Content-Type': content_type or 'application/octet-stream'}
             if email:
                 put_headers['x-amz-meta-email'] = email
                 print(f"Adicionando metadado x-amz-meta-email: {email}")
             if document_type:
                 put_headers['x-amz-meta-document-type'] = document_type
                 print(f"Adicionando metadado x-amz-meta-document-type: {document_type}")
+            put_headers['x-amz-meta-sha256'] = sha256
             print(f"Content-Type usado no upload: {put_headers['Content-Type']}")
 
             put_response = http.request(
                 'PUT',
                 presigned_url,
-                body=file_content,
+                body=conteudo,
                 headers=put_headers
             )
 
             print(f"Resposta do PUT no S3: status={put_response.status}")
             if put_response.status not in [200, 201]:
-                print("Erro ao enviar arquivo para o S3:", put_response.status, put_response.data.decode())
+                print("Erro ao enviar arquivo para o S3:", put_response.status, resumir(put_response.data.decode()))
                 return response_error(502, 'Falha ao enviar o arquivo para o S3.')
 
             print(f"Upload realizado com sucesso! URL: {presigned_url.split('?')[0]}")
+            registrar_upload_proxy(
+                key, email, document_type, content_type, len(conteudo), put_response.headers.get('ETag'), sha256,
+                len(file_content)
+            )
             return {
                 'statusCode': 200,
-                'body': json.dumps({'url': presigned_url.split('?')[0]}),
+                'body': json.dumps({
+                    'url': presigned_url.split('?')[0], 'duplicado': False, 'sha256': sha256, 'content_type': content_type,
+                    'filename': key[len(DOCUMENTS_FOLDER):]
+                }),
                 'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
             }
         except Exception as e:
             print("Erro na função:", str(e))
             return response_error(500, str(e))
+        finally:
+            if file_content is not None:
+                medidor.registrar(
+                    len(file_content), context, arquivo=resumir(filename, 80),
+                    bytes_armazenados=len(conteudo) if conteudo is not None else None
+                )
+                if isinstance(file_content, memoryview):
+                    # Libera a view para o buffer poder ser trocado na próxima invocação
+                    file_content.release()
+
+    elif raw_path == '/upload-doc-plataforma/direto' and http_method == 'POST':
+        try:
+            return iniciar_upload_direto(event)
+        except Exception as e:
+            print("Erro ao iniciar upload direto:", str(e))
+            return response_error(500, str(e))
+
+    elif raw_path == '/upload-doc-plataforma/confirmar' and http_method == 'POST':
+        try:
+            return confirmar_upload_direto(event)
+        except Exception as e:
+            print("Erro ao confirmar upload direto:", str(e))
+            return response_error(500, str(e))
+
+    elif raw_path.startswith('/upload-doc-plataforma/multipart/') and http_method == 'POST':
+        etapa = raw_path.rsplit('/', 1)[-1]
+        if etapa not in ('iniciar', 'partes', 'concluir', 'abortar'):
+            return response_error(404, 'Not found')
+        try:
+            return operar_multipart(event, etapa)
+        except Exception as e:
+            print(f"Erro no multipart ({etapa}):", str(e))
+            return response_error(500, str(e))
+
+    elif raw_path == '/documentos-plataforma' and http_method == 'GET':
+        try:
+            return listar_documentos_indexados(event)
+        except Exception as e:
+            print("Erro ao listar documentos:", str(e))
+            return response_error(500, str(e))
 
     elif raw_path == '/download-doc-plataforma' and http_method == 'GET':
         try:
@@ -165,35 +569,17 @@ def lambda_handler(event, context):
 
             key = DOCUMENTS_FOLDER + filename
 
-            payload = {
-                "operation": "download",
-                "key": key,
-                "expiration": 3600
-            }
-
-            api_response = http.request(
-                'POST',
-                S3_API_GATEWAY_URL,
-                body=json.dumps(payload),
-                headers={'Content-Type': 'application/json'}
-            )
-
-            if api_response.status != 200:
-                print("Erro ao obter URL assinada para download:", api_response.status, api_response.data.decode())
-                return response_error(502, 'Falha ao obter URL assinada para download.')
-
-            presigned_data = json.loads(api_response.data.decode())
-            presigned_url = presigned_data.get('url')
-
-            if not presigned_url:
-                return response_error(502, 'URL assinada não retornada pelo serviço.')
+            try:
+                presigned_url, expires_in = assinador.url_download(key, 3600)
+            except FalhaAssinatura as e:
+                return response_error(502, str(e))
 
             return {
                 'statusCode': 200,
                 'body': json.dumps({
                     'download_url': presigned_url,
                     'filename': filename,
-                    'expires_in': 3600
+                    'expires_in': expires_in
                 }),
                 'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
             }
@@ -0,0 +1,213 @@
+"""
+Obtenção das URLs assinadas do S3 usadas pelo upload-documentos.
+
+- local (padrão): chama gerar_url_upload / gerar_url_download de
+  url_assinada.py no próprio processo, sem rede. Exige que a role da Lambda
+  tenha permissão no Access Point.
+- remoto: comportamento antigo, um POST para a Lambda url_assinada atrás de
+  S3_API_GATEWAY_URL. Fica como alternativa via PRESIGN_MODO=remoto.
+"""
+
+import os
+import json
+
+import urllib3
+
+S3_API_GATEWAY_URL = os.environ.get('S3_API_GATEWAY_URL', 'https://ktvl2lg1fh.execute-api.us-east-1.amazonaws.com/generation-uri')
+PRESIGN_MODO = os.environ.get('PRESIGN_MODO', 'local')
+
+
+class FalhaAssinatura(Exception):
+    """Não foi possível obter a URL assinada."""
+
+
+class AssinadorLocal:
+    """Gera as URLs com o boto3, no mesmo processo."""
+
+    def __init__(self):
+        # Importado só no modo local para não carregar o boto3 à toa no remoto
+        import url_assinada
+        self._url_assinada = url_assinada
+
+    def url_upload(self, key, expiration, email=None, content_type=None, document_type=None, sha256=None):
+        url = self._url_assinada.gerar_url_upload(
+            key, expiration, email=email,
+            content_type=content_type or 'application/pdf',
+            document_type=document_type, sha256=sha256
+        )
+        if not url:
+            raise FalhaAssinatura('Falha ao obter URL assinada.')
+        return url
+
+    def post_upload(self, key, expiration, email=None, content_type=None, document_type=None,
+                    tamanho_maximo=None):
+        post = self._url_assinada.gerar_post_upload(
+            key, expiration, email=email,
+            content_type=content_type or 'application/pdf',
+            document_type=document_type, tamanho_maximo=tamanho_maximo
+        )
+        if not post:
+            raise FalhaAssinatura('Falha ao obter POST assinado.')
+        return post
+
+    def metadados(self, key):
+        """HEAD do arquivo no S3; None se ele não existir."""
+        return self._url_assinada.obter_metadados(key)
+
+    def iniciar_multipart(self, key, numeros_partes, expiration, email=None, content_type=None,
+                          document_type=None, sha256=None):
+        """Retorna (upload_id, [{'numero', 'url'}, ...])."""
+        upload_id = self._url_assinada.iniciar_multipart(
+            key, email=email, content_type=content_type or 'application/pdf', document_type=document_type,
+            sha256=sha256
+        )
+        if not upload_id:
+            raise FalhaAssinatura('Falha ao iniciar upload multipart.')
+        return upload_id, self._url_assinada.gerar_urls_partes(key, upload_id, numeros_partes, expiration)
+
+    def urls_partes(self, key, upload_id, numeros_partes, expiration):
+        return self._url_assinada.gerar_urls_partes(key, upload_id, numeros_partes, expiration)
+
+    def concluir_multipart(self, key, upload_id, partes):
+        if not self._url_assinada.concluir_multipart(key, upload_id, partes):
+            raise FalhaAssinatura('Falha ao concluir upload multipart.')
+
+    def abortar_multipart(self, key, upload_id):
+        if not self._url_assinada.abortar_multipart(key, upload_id):
+            raise FalhaAssinatura('Falha ao abortar upload multipart.')
+
+    def url_download(self, key, expiration):
+        """Retorna (url, segundos de validade restantes); a URL pode vir do cache."""
+        url, restante = self._url_assinada.obter_url_download(key, expiration)
+        if not url:
+            raise FalhaAssinatura('Falha ao obter URL assinada para download.')
+        return url, restante
+
+
+class AssinadorRemoto:
+    """Pede as URLs à Lambda url_assinada via API Gateway."""
+
+    def __init__(self, endpoint=S3_API_GATEWAY_URL, http=None):
+        self.endpoint = endpoint
+        self.http = http or urllib3.PoolManager()
+
+    def _solicitar(self, payload, mensagem_erro):
+        api_response = self.http.request(
+            'POST',
+            self.endpoint,
+            body=json.dumps(payload),
+            headers={'Content-Type': 'application/json'}
+        )
+        print(f"Resposta da API Gateway: status={api_response.status}")
+        if api_response.status != 200:
+            print("Erro ao obter URL assinada:", api_response.status, api_response.data.decode())
+            raise FalhaAssinatura(mensagem_erro)
+
+        presigned_data = json.loads(api_response.data.decode())
+        if not presigned_data.get('url'):
+            raise FalhaAssinatura('URL assinada não retornada pelo serviço.')
+        return presigned_data
+
+    def url_upload(self, key, expiration, email=None, content_type=None, document_type=None, sha256=None):
+        payload = {
+            "operation": "upload",
+            "key": key,
+            "expiration": expiration,
+            "email": email,  # Adicionado para garantir metadado na URL assinada
+            "content_type": content_type,  # Garante que o Content-Type da URL assinada será igual ao do PUT
+            "document_type": document_type,
+            "sha256": sha256
+        }
+        print(f"Payload para API Gateway: {payload}")
+        return self._solicitar(payload, 'Falha ao obter URL assinada.')['url']
+
+    def post_upload(self, key, expiration, email=None, content_type=None, document_type=None,
+                    tamanho_maximo=None):
+        payload = {
+            "operation": "upload_post",
+            "key": key,
+            "expiration": expiration,
+            "email": email,
+            "content_type": content_type,
+            "document_type": document_type,
+            "tamanho_maximo": tamanho_maximo
+        }
+        presigned_data = self._solicitar(payload, 'Falha ao obter POST assinado.')
+        return {'url': presigned_data['url'], 'fields': presigned_data['fields']}
+
+    def metadados(self, key):
+        payload = {"operation": "metadados", "key": key}
+        api_response = self.http.request(
+            'POST',
+            self.endpoint,
+            body=json.dumps(payload),
+            headers={'Content-Type': 'application/json'}
+        )
+        if api_response.status == 404:
+            return None
+        if api_response.status != 200:
+            raise FalhaAssinatura('Falha ao consultar o arquivo no S3.')
+        dados = json.loads(api_response.data.decode())
+        return {campo: dados.get(campo) for campo in ('tamanho', 'etag', 'content_type', 'metadados')}
+
+    def iniciar_multipart(self, key, numeros_partes, expiration, email=None, content_type=None,
+                          document_type=None, sha256=None):
+        payload = {
+            "operation": "multipart_iniciar",
+            "key": key,
+            "partes": list(numeros_partes),
+            "expiration": expiration,
+            "email": email,
+            "content_type": content_type,
+            "document_type": document_type,
+            "sha256": sha256
+        }
+        dados = self._operacao(payload, 'Falha ao iniciar upload multipart.')
+        return dados['upload_id'], dados['partes']
+
+    def urls_partes(self, key, upload_id, numeros_partes, expiration):
+        payload = {
+            "operation": "multipart_partes",
+            "key": key,
+            "upload_id": upload_id,
+            "partes": list(numeros_partes),
+            "expiration": expiration
+        }
+        return self._operacao(payload, 'Falha ao assinar as partes do upload.')['partes']
+
+    def concluir_multipart(self, key, upload_id, partes):
+        payload = {"operation": "multipart_concluir", "key": key, "upload_id": upload_id, "partes": partes}
+        self._operacao(payload, 'Falha ao concluir upload multipart.')
+
+    def abortar_multipart(self, key, upload_id):
+        payload = {"operation": "multipart_abortar", "key": key, "upload_id": upload_id}
+        self._operacao(payload, 'Falha ao abortar upload multipart.')
+
+    def _operacao(self, payload, mensagem_erro):
+        api_response = self.http.request(
+            'POST',
+            self.endpoint,
+            body=json.dumps(payload),
+            headers={'Content-Type': 'application/json'}
+        )
+        if api_response.status != 200:
+            print(f"Erro em {payload['operation']}:", api_response.status, api_response.data.decode())
+            raise FalhaAssinatura(mensagem_erro)
+        return json.loads(api_response.data.decode())
+
+    def url_download(self, key, expiration):
+        payload = {
+            "operation": "download",
+            "key": key,
+            "expiration": expiration
+        }
+        presigned_data = self._solicitar(payload, 'Falha ao obter URL assinada para download.')
+        return presigned_data['url'], presigned_data.get('expiration', expiration)
+
+
+def criar_assinador(modo=PRESIGN_MODO):
+    if modo == 'remoto':
+        return AssinadorRemoto()
+    if modo == 'local':
+        return AssinadorLocal()
+    raise ValueError(f"PRESIGN_MODO inválido: {modo} (use 'local' ou 'remoto')")
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark da validação (validacao.py) contra o resto do caminho do
+POST /upload-doc-plataforma, para confirmar que o custo é desprezível.
+
+    python bench_validacao.py             # arquivo de 5 MB
+    python bench_validacao.py 20          # arquivo de 20 MB
+"""
+
+import os
+import sys
+import base64
+import timeit
+import hashlib
+
+from validacao import validar, validar_base64
+from ingestao import decodificar_base64
+
+
+def medir(funcao, repeticoes):
+    """Melhor tempo por chamada, em microssegundos."""
+    return min(timeit.repeat(funcao, number=repeticoes, repeat=5)) / repeticoes * 1e6
+
+
+def main(megabytes=5):
+    conteudo = b'%PDF-1.7\n' + os.urandom(megabytes * 1024 * 1024)
+    texto = base64.b64encode(conteudo).decode('ascii')
+    corpo = '{"filename": "rg.pdf", "file_content": "' + texto + '"}'
+    inicio = corpo.index(texto)
+    fim = inicio + len(texto)
+
+    resultados = [
+        ('validar (bytes decodificados)', medir(lambda: validar(conteudo, len(conteudo), 'application/pdf'), 20000)),
+        ('validar_base64 (prefixo do body)', medir(
+            lambda: validar_base64(corpo, inicio, fim, 'application/pdf'), 200)),
+        ('decodificar_base64 + sha256', medir(
+            lambda: decodificar_base64(corpo, inicio, fim, resumo=hashlib.sha256()).release(), 3)),
+    ]
+    referencia = resultados[-1][1]
+    print(f"Arquivo de {len(conteudo)} bytes ({len(texto)} caracteres em base64)")
+    for nome, micros in resultados:
+        print(f"  {nome:<34} {micros:>12.1f} µs  ({micros / referencia:.4%} da decodificação)")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
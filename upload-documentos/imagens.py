@@ -0,0 +1,132 @@
+"""
+Normalização opcional das imagens antes de irem para o S3.
+
+Fotos de celular chegam na resolução da câmera (e com EXIF, que pode trazer
+localização e modelo do aparelho). Com IMAGEM_NORMALIZAR=1, PNG/JPEG/GIF são:
+- girados conforme a orientação do EXIF e reduzidos até caberem em
+  IMAGEM_RESOLUCAO_MAXIMA (maior lado, em pixels);
+- regravados sem EXIF, na qualidade IMAGEM_QUALIDADE;
+- opcionalmente convertidos para um único formato (IMAGEM_FORMATO).
+
+Depende do Pillow; se ele não estiver instalado (ou a imagem não puder ser
+lida), o arquivo segue como chegou. GIFs animados também não são alterados.
+"""
+
+import io
+import os
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow é opcional: sem ele, nada é normalizado
+    Image = None
+
+IMAGEM_NORMALIZAR = os.environ.get('IMAGEM_NORMALIZAR', '0').lower() in ('1', 'true', 'sim')
+IMAGEM_RESOLUCAO_MAXIMA = int(os.environ.get('IMAGEM_RESOLUCAO_MAXIMA', '2048'))
+IMAGEM_QUALIDADE = int(os.environ.get('IMAGEM_QUALIDADE', '85'))
+# Vazio mantém o formato de origem; 'jpeg', 'png' ou 'webp' converte todas as imagens
+IMAGEM_FORMATO = os.environ.get('IMAGEM_FORMATO', '').strip().lower()
+
+_FORMATOS = {
+    'image/jpeg': 'JPEG',
+    'image/png': 'PNG',
+    'image/gif': 'GIF',
+    'image/webp': 'WEBP',
+}
+_CONTENT_TYPES = {formato: content_type for content_type, formato in _FORMATOS.items()}
+_FORMATO_CONFIGURADO = {'jpg': 'JPEG', 'jpeg': 'JPEG', 'png': 'PNG', 'webp': 'WEBP'}.get(IMAGEM_FORMATO)
+# Extensões aceitas por formato; a primeira é a usada ao renomear
+_EXTENSOES = {'JPEG': ('jpg', 'jpeg'), 'PNG': ('png',), 'GIF': ('gif',), 'WEBP': ('webp',)}
+
+
+def normalizacao_ativa():
+    return IMAGEM_NORMALIZAR and Image is not None
+
+
+def content_type_armazenado(content_type):
+    """
+    Content-Type com que uma imagem deste tipo deve ser armazenada: o de
+    IMAGEM_FORMATO quando a conversão está ativa, senão o próprio. Serve para
+    achar a chave final antes de normalizar (GIFs animados, que não são
+    convertidos, são a exceção).
+    """
+    formato_origem = _FORMATOS.get((content_type or '').split(';')[0].strip().lower())
+    if not formato_origem or not _FORMATO_CONFIGURADO or not normalizacao_ativa():
+        return content_type
+    return _CONTENT_TYPES[_FORMATO_CONFIGURADO]
+
+
+def chave_com_extensao(key, content_type):
+    """
+    `key` com a extensão do formato de `content_type` (foto.png -> foto.jpg
+    depois de convertida para JPEG), para o nome bater com o Content-Type do
+    objeto. Chaves que já têm uma extensão do formato e tipos que não são
+    imagem ficam como estão.
+    """
+    formato = _FORMATOS.get((content_type or '').split(';')[0].strip().lower())
+    if not formato:
+        return key
+    pasta, _, nome = key.rpartition('/')
+    base, ponto, extensao = nome.rpartition('.')
+    if not ponto:
+        base = nome
+    elif extensao.lower() in _EXTENSOES[formato]:
+        return key
+    return f"{pasta}/{base}.{_EXTENSOES[formato][0]}" if pasta else f"{base}.{_EXTENSOES[formato][0]}"
+
+
+def _opcoes_gravacao(formato):
+    if formato == 'JPEG':
+        return {'quality': IMAGEM_QUALIDADE, 'optimize': True, 'progressive': True}
+    if formato == 'WEBP':
+        return {'quality': IMAGEM_QUALIDADE, 'method': 4}
+    if formato == 'PNG':
+        return {'optimize': True}
+    return {}
+
+
+def normalizar_imagem(conteudo, content_type):
+    """
+    Retorna (conteudo, content_type) do arquivo a ser armazenado.
+
+    Se o arquivo não for uma imagem suportada, a normalização estiver desligada
+    ou a versão regravada não trouxer ganho (sem redução, conversão nem EXIF
+    removido, e maior que a original), devolve o próprio `conteudo`.
+    """
+    formato_origem = _FORMATOS.get((content_type or '').split(';')[0].strip().lower())
+    if not formato_origem or not normalizacao_ativa():
+        return conteudo, content_type
+
+    try:
+        imagem = Image.open(io.BytesIO(conteudo))
+        if getattr(imagem, 'n_frames', 1) > 1:
+            return conteudo, content_type
+
+        limite = (IMAGEM_RESOLUCAO_MAXIMA, IMAGEM_RESOLUCAO_MAXIMA)
+        if imagem.format == 'JPEG':
+            # O decoder do JPEG já reduz por 1/2, 1/4 ou 1/8 ao ler: bem mais
+            # barato que decodificar a foto inteira e redimensionar depois
+            imagem.draft('RGB', limite)
+        tinha_exif = bool(imagem.getexif())
+        original = imagem.size
+
+        imagem = ImageOps.exif_transpose(imagem)
+        imagem.thumbnail(limite, Image.LANCZOS)
+        reduzida = imagem.size != original
+
+        formato = _FORMATO_CONFIGURADO or formato_origem
+        if formato == 'JPEG' and imagem.mode not in ('RGB', 'L'):
+            imagem = imagem.convert('RGB')
+        elif formato == 'GIF' and imagem.mode not in ('P', 'L'):
+            imagem = imagem.convert('P', palette=Image.ADAPTIVE)
+
+        saida = io.BytesIO()
+        # Sem exif=...: os metadados não são copiados para o arquivo novo
+        imagem.save(saida, format=formato, **_opcoes_gravacao(formato))
+    except Exception as e:
+        print(f"Imagem não normalizada ({content_type}): {e}")
+        return conteudo, content_type
+
+    convertida = formato != formato_origem
+    if not (reduzida or convertida or tinha_exif) and saida.tell() >= len(conteudo):
+        return conteudo, content_type
+    return saida.getbuffer(), _CONTENT_TYPES[formato]
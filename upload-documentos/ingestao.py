@@ -0,0 +1,161 @@
+"""
+Leitura do corpo do POST /upload-doc-plataforma com memória limitada.
+
+- Logs só com resumos de tamanho limitado (nunca o evento nem o arquivo).
+- O base64 do arquivo é decodificado em blocos direto num bytearray do módulo,
+  reaproveitado entre invocações com o container quente; o chamador recebe uma
+  memoryview sobre esse buffer, que vai para o PUT sem cópias.
+- No corpo JSON, o campo file_content é localizado no texto e decodificado de
+  lá, sem que o json.loads crie uma segunda cópia do base64.
+- O SHA-256 do arquivo é calculado durante a decodificação.
+- A cada upload é registrado o pico de memória do processo (ru_maxrss).
+"""
+
+import os
+import re
+import json
+import time
+import binascii
+import resource
+
+# Blocos de base64 decodificados por vez (múltiplo de 4)
+INGESTAO_BLOCO_BASE64 = int(os.environ.get('INGESTAO_BLOCO_BASE64', str(256 * 1024))) // 4 * 4
+# Tamanho máximo de cada valor escrito nos logs
+LOG_LIMITE_CARACTERES = int(os.environ.get('LOG_LIMITE_CARACTERES', '200'))
+
+_CAMPO_ARQUIVO = re.compile(r'"file_content"\s*:\s*"')
+_ESPACOS = re.compile(r'\s+')
+# Quebras de linha/espaços que aparecem em base64 (MIME quebra em 76 colunas)
+_CARACTERES_ESPACO = ('\n', '\r', ' ', '\t')
+
+# Buffer reaproveitado entre invocações; cresce até o maior arquivo já recebido
+_buffer = bytearray()
+
+
+class CorpoInvalido(ValueError):
+    """O base64 do arquivo não pôde ser decodificado."""
+
+
+def resumir(valor, limite=LOG_LIMITE_CARACTERES):
+    """Representação do valor para log, truncada em `limite` caracteres."""
+    texto = valor if isinstance(valor, str) else repr(valor)
+    if len(texto) <= limite:
+        return texto
+    return f"{texto[:limite]}... ({len(texto)} caracteres)"
+
+
+def resumo_evento(event):
+    """Campos do evento que interessam no log, sem o corpo nem headers sensíveis."""
+    headers = event.get('headers') or {}
+    body = event.get('body')
+    return {
+        'metodo': event.get('requestContext', {}).get('http', {}).get('method'),
+        'caminho': event.get('rawPath'),
+        'request_id': event.get('requestContext', {}).get('requestId'),
+        'body_caracteres': len(body) if isinstance(body, (str, bytes)) else None,
+        'isBase64Encoded': event.get('isBase64Encoded', False),
+        'headers': {
+            nome: resumir(valor, 80) for nome, valor in headers.items()
+            if nome.lower() in ('content-type', 'content-length', 'filename', 'document-type', 'user-agent')
+        },
+    }
+
+
+def tem_espacos(texto, inicio=0, fim=None):
+    """
+    Se texto[inicio:fim] tem espaços ou quebras de linha. Um str.find por
+    caractere, sem copiar o trecho: em 7 MB de base64 é dezenas de vezes mais
+    rápido que uma busca por regex com \\s.
+    """
+    fim = len(texto) if fim is None else fim
+    return any(texto.find(c, inicio, fim) != -1 for c in _CARACTERES_ESPACO)
+
+
+def _obter_buffer(tamanho):
+    global _buffer
+    if len(_buffer) < tamanho:
+        # Novo bytearray em vez de redimensionar: views da invocação anterior
+        # ainda vivas impediriam o resize (BufferError)
+        _buffer = bytearray(tamanho)
+    return _buffer
+
+
+def decodificar_base64(texto, inicio=0, fim=None, resumo=None):
+    """
+    Decodifica texto[inicio:fim] (base64) em blocos para o buffer do módulo.
+    Se `resumo` (ex.: hashlib.sha256()) for informado, cada bloco decodificado
+    também é passado para ele, sem reler o conteúdo.
+    Retorna uma memoryview com os bytes decodificados.
+    """
+    fim = len(texto) if fim is None else fim
+    if tem_espacos(texto, inicio, fim):
+        # Raro (base64 com quebras de linha): remove os espaços numa cópia
+        texto = _ESPACOS.sub('', texto[inicio:fim])
+        inicio, fim = 0, len(texto)
+
+    buffer = _obter_buffer((fim - inicio) // 4 * 3 + 3)
+    escrito = 0
+    try:
+        for pos in range(inicio, fim, INGESTAO_BLOCO_BASE64):
+            bloco = binascii.a2b_base64(texto[pos:min(pos + INGESTAO_BLOCO_BASE64, fim)])
+            buffer[escrito:escrito + len(bloco)] = bloco
+            escrito += len(bloco)
+            if resumo is not None:
+                resumo.update(bloco)
+    except (binascii.Error, ValueError) as e:
+        raise CorpoInvalido(f"Erro ao decodificar file_content: {e}")
+    return memoryview(buffer)[:escrito]
+
+
+def separar_arquivo_json(body):
+    """
+    Separa o campo file_content de um corpo JSON.
+
+    Retorna (campos, texto, inicio, fim): os demais campos já parseados e a
+    posição do base64 em `texto`. Normalmente `texto` é o próprio body; se o
+    valor tiver escapes JSON, cai no json.loads completo e `texto` é o valor
+    parseado. Sem file_content, texto é None; se o corpo não for um objeto
+    JSON, campos também é None.
+    """
+    achado = _CAMPO_ARQUIVO.search(body)
+    if achado:
+        inicio = achado.end()
+        fim = body.find('"', inicio)
+        if fim != -1 and body.find('\\', inicio, fim) == -1:
+            try:
+                campos = json.loads(body[:inicio] + body[fim:])
+            except ValueError:
+                campos = None
+            # Confere que o trecho removido era mesmo o valor de file_content
+            if isinstance(campos, dict) and campos.pop('file_content', None) == '':
+                return campos, body, inicio, fim
+
+    campos = json.loads(body)
+    if not isinstance(campos, dict):
+        return None, None, 0, 0
+    valor = campos.pop('file_content', None)
+    if not valor:
+        return campos, None, 0, 0
+    return campos, valor, 0, len(valor)
+
+
+class MedidorMemoria:
+    """Duração e pico de memória (RSS) do processo durante um upload."""
+
+    def __init__(self):
+        self.inicio = time.monotonic()
+        self.pico_inicial_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    def registrar(self, tamanho, context=None, **extras):
+        # ru_maxrss é o pico desde o início do processo (em KB no Linux); o
+        # aumento mostra quanto este upload empurrou o pico para cima
+        pico_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print(json.dumps({
+            'metrica': 'upload',
+            'bytes': tamanho,
+            'duracao_ms': round((time.monotonic() - self.inicio) * 1000, 1),
+            'pico_memoria_mb': round(pico_kb / 1024, 1),
+            'aumento_pico_mb': round((pico_kb - self.pico_inicial_kb) / 1024, 1),
+            'limite_memoria_mb': int(getattr(context, 'memory_limit_in_mb', 0)) or None,
+            **extras,
+        }))
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Upload multipart para o S3 com partes enviadas em paralelo.
+
+O conteúdo é fatiado com memoryview (sem copiar os bytes), cada fatia vai para
+a URL assinada da sua parte e, no fim, o upload é concluído com os ETags das
+partes. Se alguma parte falhar depois das tentativas, as partes que ainda não
+começaram são canceladas e o upload é abortado para não deixar partes órfãs
+cobrando armazenamento.
+
+O POST /upload-doc-plataforma não usa este envio: o corpo de uma Lambda atrás
+do API Gateway fica abaixo de 6 MB, menor que uma parte. Arquivos grandes vão
+direto do cliente ao S3 pelas etapas /upload-doc-plataforma/multipart/*, que
+usam calcular_partes e as URLs de parte do assinador; enviar_multipart é usado
+por scripts (ver abaixo).
+
+Para testar contra um S3 local (moto_server):
+
+    moto_server -p 5000 &
+    S3_ENDPOINT_URL=http://localhost:5000 S3_BUCKET=docs-rh \
+        python multipart.py arquivo.pdf documentos/arquivo.pdf
+"""
+
+import os
+import sys
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import urllib3
+
+# O S3 exige partes de no mínimo 5 MB (exceto a última) e no máximo 10000 partes
+TAMANHO_MINIMO_PARTE = 5 * 1024 * 1024
+MAXIMO_PARTES = 10000
+
+MULTIPART_TAMANHO_PARTE = max(TAMANHO_MINIMO_PARTE, int(os.environ.get('MULTIPART_TAMANHO_PARTE_BYTES', str(8 * 1024 * 1024))))
+MULTIPART_CONCORRENCIA = int(os.environ.get('MULTIPART_CONCORRENCIA', '4'))
+MULTIPART_TENTATIVAS = int(os.environ.get('MULTIPART_TENTATIVAS', '3'))
+MULTIPART_EXPIRACAO = int(os.environ.get('MULTIPART_EXPIRACAO_SEGUNDOS', '3600'))
+
+
+class FalhaMultipart(Exception):
+    """Uma parte não pôde ser enviada; o upload foi abortado."""
+
+
+def calcular_partes(tamanho, tamanho_parte=MULTIPART_TAMANHO_PARTE):
+    """Retorna (tamanho_parte, quantidade) respeitando o limite de 10000 partes."""
+    tamanho_parte = max(tamanho_parte, math.ceil(tamanho / MAXIMO_PARTES), TAMANHO_MINIMO_PARTE)
+    return tamanho_parte, max(1, math.ceil(tamanho / tamanho_parte))
+
+
+def _enviar_parte(http, numero, url, fatia, tentativas, cancelado):
+    ultimo_erro = None
+    for _ in range(tentativas):
+        if cancelado.is_set():
+            raise FalhaMultipart(f"Parte {numero} cancelada: outra parte falhou")
+        try:
+            resposta = http.request('PUT', url, body=fatia, headers={'Content-Length': str(len(fatia))})
+            if resposta.status == 200:
+                return {'numero': numero, 'etag': resposta.headers.get('ETag')}
+            ultimo_erro = f"status {resposta.status}: {resposta.data[:200]!r}"
+        except urllib3.exceptions.HTTPError as e:
+            ultimo_erro = str(e)
+    raise FalhaMultipart(f"Parte {numero} falhou após {tentativas} tentativa(s): {ultimo_erro}")
+
+
+def enviar_multipart(assinador, key, conteudo, content_type=None, email=None, document_type=None, sha256=None,
+                     http=None, tamanho_parte=MULTIPART_TAMANHO_PARTE, concorrencia=MULTIPART_CONCORRENCIA,
+                     tentativas=MULTIPART_TENTATIVAS):
+    """
+    Envia `conteudo` (bytes, bytearray ou memoryview) em partes paralelas.
+
+    No máximo `concorrencia` partes ficam em trânsito ao mesmo tempo; como as
+    fatias são views sobre o mesmo buffer, a memória extra fica limitada aos
+    buffers de rede do urllib3. Retorna a URL do objeto (sem assinatura).
+    """
+    visao = memoryview(conteudo)
+    tamanho_parte, quantidade = calcular_partes(len(visao), tamanho_parte)
+    http = http or urllib3.PoolManager(maxsize=concorrencia)
+
+    upload_id, partes = assinador.iniciar_multipart(
+        key, range(1, quantidade + 1), MULTIPART_EXPIRACAO,
+        email=email, content_type=content_type, document_type=document_type, sha256=sha256
+    )
+    print(f"Multipart {key}: {len(visao)} bytes em {quantidade} parte(s) de até {tamanho_parte} bytes")
+
+    cancelado = threading.Event()
+    try:
+        with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+            futuros = [
+                executor.submit(
+                    _enviar_parte, http, p['numero'], p['url'],
+                    visao[(p['numero'] - 1) * tamanho_parte:p['numero'] * tamanho_parte], tentativas, cancelado
+                )
+                for p in partes
+            ]
+            try:
+                for futuro in as_completed(futuros):
+                    futuro.result()
+            except Exception:
+                # Na primeira falha, as partes na fila não começam e as em
+                # trânsito não tentam de novo; a saída do with espera essas
+                # terminarem, para que o abort não corra com um PUT em andamento
+                cancelado.set()
+                for futuro in futuros:
+                    futuro.cancel()
+                raise
+        enviadas = [f.result() for f in futuros]
+        assinador.concluir_multipart(key, upload_id, enviadas)
+    except Exception:
+        try:
+            assinador.abortar_multipart(key, upload_id)
+        except Exception as e:
+            print(f"Falha ao abortar multipart {key} ({upload_id}): {e}")
+        raise
+
+    return partes[0]['url'].split('?')[0]
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print("Uso: python multipart.py <arquivo local> <chave no S3>")
+        sys.exit(1)
+
+    from assinador import AssinadorLocal
+
+    with open(sys.argv[1], 'rb') as f:
+        dados = f.read()
+    url = enviar_multipart(AssinadorLocal(), sys.argv[2], dados, content_type='application/octet-stream')
+    print(f"✅ Enviado: {url}")
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Reconcilia o índice documentos_arquivos com os objetos do S3.
+
+Lista os prefixos configurados (em paralelo, com paginação), consulta os
+metadados (HEAD) só dos objetos novos ou alterados e, numa transação:
+- insere/atualiza no índice os objetos novos ou alterados;
+- remove do índice as chaves que não existem mais no S3.
+
+Com o índice em dia, as consultas de documentos vão ao Postgres em vez de
+listar o bucket. Roda como Lambda agendada (reconciliar.lambda_handler) ou
+pela linha de comando:
+
+    python reconciliar.py                     # prefixos de RECONCILIAR_PREFIXOS
+    python reconciliar.py documentos/a documentos/b
+"""
+
+import os
+import sys
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from psycopg2.extras import execute_values
+
+import url_assinada
+from comum.db import conexao
+
+# Prefixos listados, separados por vírgula. Dividir documentos/ em vários
+# prefixos (ex.: documentos/a,documentos/b,...) paraleliza a listagem.
+RECONCILIAR_PREFIXOS = [p for p in os.environ.get('RECONCILIAR_PREFIXOS', 'documentos/').split(',') if p]
+RECONCILIAR_CONCORRENCIA_HEAD = int(os.environ.get('RECONCILIAR_CONCORRENCIA_HEAD', '16'))
+
+
+def _metadados(obj):
+    try:
+        return obj, url_assinada.obter_metadados(obj['chave'])
+    except Exception as e:
+        print(f"Falha no HEAD de {obj['chave']}: {e}")
+        return obj, None
+
+
+def reconciliar(prefixos=None):
+    prefixos = prefixos or RECONCILIAR_PREFIXOS
+    inicio = time.monotonic()
+
+    with conexao() as conn:
+        with conn.cursor() as cur:
+            # Instante do banco antes de listar: linhas registradas depois disso
+            # podem não aparecer na listagem e não são removidas
+            cur.execute('SELECT now()')
+            listado_em = cur.fetchone()[0]
+            # Não segura a transação aberta durante a listagem
+            conn.rollback()
+
+            listagem = url_assinada.listar_prefixos(prefixos)
+            objetos = {obj['chave']: obj for lista in listagem.values() for obj in lista}
+
+            cur.execute('''
+                CREATE TEMP TABLE s3_listagem (chave VARCHAR(1024) PRIMARY KEY, tamanho BIGINT, etag VARCHAR(255))
+                ON COMMIT DROP
+            ''')
+            execute_values(
+                cur,
+                'INSERT INTO s3_listagem (chave, tamanho, etag) VALUES %s',
+                [(o['chave'], o['tamanho'], o['etag']) for o in objetos.values()],
+                page_size=1000
+            )
+
+            # Só objetos novos ou com conteúdo diferente precisam de HEAD
+            cur.execute('''
+                SELECT l.chave
+                FROM s3_listagem l
+                LEFT JOIN documentos_arquivos d ON d.chave = l.chave
+                WHERE d.chave IS NULL OR d.etag IS DISTINCT FROM l.etag OR d.tamanho <> l.tamanho
+            ''')
+            alterados = [objetos[row[0]] for row in cur.fetchall()]
+
+            with ThreadPoolExecutor(max_workers=RECONCILIAR_CONCORRENCIA_HEAD) as executor:
+                consultados = [(obj, meta) for obj, meta in executor.map(_metadados, alterados) if meta]
+
+            if consultados:
+                execute_values(
+                    cur,
+                    '''
+                    INSERT INTO documentos_arquivos
+                        (chave, email_candidato, tipo_documento, content_type, tamanho, etag, sha256)
+                    VALUES %s
+                    ON CONFLICT (chave) DO UPDATE SET
+                        email_candidato = EXCLUDED.email_candidato,
+                        tipo_documento = EXCLUDED.tipo_documento,
+                        content_type = EXCLUDED.content_type,
+                        tamanho = EXCLUDED.tamanho,
+                        etag = EXCLUDED.etag,
+                        sha256 = EXCLUDED.sha256
+                    ''',
+                    [
+                        (
+                            obj['chave'],
+                            meta['metadados'].get('email'),
+                            meta['metadados'].get('document-type'),
+                            meta['content_type'],
+                            meta['tamanho'],
+                            meta['etag'],
+                            meta['metadados'].get('sha256'),
+                        )
+                        for obj, meta in consultados
+                    ],
+                    page_size=500
+                )
+
+            cur.execute(
+                '''
+                DELETE FROM documentos_arquivos d
+                WHERE d.chave LIKE ANY(%s)
+                  AND d.enviado_em < %s
+                  AND NOT EXISTS (SELECT 1 FROM s3_listagem l WHERE l.chave = d.chave)
+                ''',
+                ([p.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%' for p in prefixos], listado_em)
+            )
+            removidos = cur.rowcount
+        conn.commit()
+
+    resumo = {
+        'prefixos': len(prefixos),
+        'objetos_s3': len(objetos),
+        'atualizados': len(consultados),
+        'falhas_head': len(alterados) - len(consultados),
+        'removidos': removidos,
+        'duracao_ms': round((time.monotonic() - inicio) * 1000, 1),
+    }
+    print(json.dumps({'metrica': 'reconciliacao_documentos', **resumo}))
+    return resumo
+
+
+def lambda_handler(event, context):
+    prefixos = (event or {}).get('prefixos')
+    return {'statusCode': 200, 'body': json.dumps(reconciliar(prefixos))}
+
+
+if __name__ == '__main__':
+    print(reconciliar(sys.argv[1:] or None))
@@ -0,0 +1,47 @@
+"""
+Deduplicação do upload: só conta como duplicado o reenvio do mesmo arquivo
+(mesma chave, tipo de documento e conteúdo); conteúdo igual com outro nome é um
+upload normal.
+"""
+
+from contextlib import contextmanager
+
+import pytest
+
+from conftest import ConexaoFalsa, carregar_lambda
+
+
+@pytest.fixture
+def app():
+    return carregar_lambda('upload-documentos')
+
+
+def consultar(app, monkeypatch, *respostas):
+    conn = ConexaoFalsa(*respostas)
+
+    @contextmanager
+    def conexao():
+        yield conn
+
+    monkeypatch.setattr(app, 'conexao', conexao)
+    return conn
+
+
+def test_mesmo_arquivo_e_duplicado(app, monkeypatch):
+    conn = consultar(app, monkeypatch, [(1,)])
+    assert app.buscar_duplicado('documentos/rg.pdf', 'ana@exemplo.com', 'rg', 'ab' * 32) is True
+    query, vars_ = conn.executados[0]
+    assert 'chave = %s' in query
+    assert vars_ == ('documentos/rg.pdf', 'ana@exemplo.com', 'rg', 'ab' * 32)
+
+
+def test_outro_nome_ou_tipo_nao_e_duplicado(app, monkeypatch):
+    consultar(app, monkeypatch, [])
+    assert app.buscar_duplicado('documentos/rg-copia.pdf', 'ana@exemplo.com', 'rg', 'ab' * 32) is False
+
+
+def test_sem_email_ou_tipo_nao_consulta(app, monkeypatch):
+    conn = consultar(app, monkeypatch)
+    assert app.buscar_duplicado('documentos/rg.pdf', None, 'rg', 'ab' * 32) is False
+    assert app.buscar_duplicado('documentos/rg.pdf', 'ana@exemplo.com', None, 'ab' * 32) is False
+    assert conn.executados == []
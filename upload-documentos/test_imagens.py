@@ -0,0 +1,61 @@
+"""
+Normalização de imagens: com IMAGEM_FORMATO a imagem convertida é gravada com
+a extensão do novo formato, para a chave bater com o Content-Type do objeto.
+"""
+
+import io
+
+import pytest
+
+import imagens
+from imagens import chave_com_extensao, content_type_armazenado, normalizar_imagem
+
+Image = pytest.importorskip('PIL.Image')
+
+
+@pytest.mark.parametrize('key, content_type, esperado', [
+    ('documentos/foto.png', 'image/jpeg', 'documentos/foto.jpg'),
+    ('documentos/foto.PNG', 'image/png', 'documentos/foto.PNG'),
+    ('documentos/foto.jpeg', 'image/jpeg', 'documentos/foto.jpeg'),
+    ('documentos/foto.tirada.em.casa.jpg', 'image/webp', 'documentos/foto.tirada.em.casa.webp'),
+    ('documentos/foto', 'image/png', 'documentos/foto.png'),
+    ('foto.gif', 'image/png', 'foto.png'),
+    ('documentos/rg.pdf', 'application/pdf', 'documentos/rg.pdf'),
+])
+def test_chave_com_extensao(key, content_type, esperado):
+    assert chave_com_extensao(key, content_type) == esperado
+
+
+def png(largura=40, altura=30):
+    saida = io.BytesIO()
+    Image.new('RGBA', (largura, altura), (200, 10, 10, 255)).save(saida, format='PNG')
+    return saida.getvalue()
+
+
+@pytest.fixture
+def converter_para_jpeg(monkeypatch):
+    monkeypatch.setattr(imagens, 'IMAGEM_NORMALIZAR', True)
+    monkeypatch.setattr(imagens, '_FORMATO_CONFIGURADO', 'JPEG')
+
+
+def test_conversao_muda_o_content_type_e_a_extensao(converter_para_jpeg):
+    conteudo, content_type = normalizar_imagem(png(), 'image/png')
+
+    assert content_type == 'image/jpeg'
+    assert bytes(conteudo[:3]) == b'\xff\xd8\xff'
+    assert content_type_armazenado('image/png') == content_type
+    assert chave_com_extensao('documentos/foto.png', content_type) == 'documentos/foto.jpg'
+
+
+def test_sem_conversao_mantem_o_formato(monkeypatch):
+    monkeypatch.setattr(imagens, 'IMAGEM_NORMALIZAR', True)
+    monkeypatch.setattr(imagens, '_FORMATO_CONFIGURADO', None)
+
+    _, content_type = normalizar_imagem(png(), 'image/png')
+
+    assert content_type == 'image/png'
+    assert content_type_armazenado('image/png') == 'image/png'
+
+
+def test_content_type_armazenado_so_para_imagens(converter_para_jpeg):
+    assert content_type_armazenado('application/pdf') == 'application/pdf'
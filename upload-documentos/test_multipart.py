@@ -0,0 +1,160 @@
+"""
+Upload multipart contra um S3 local (moto_server): etapas iniciar, partes,
+concluir e abortar do lambda_handler e o envio em partes de multipart.py,
+que cancela as partes restantes na primeira falha e aborta o upload.
+"""
+
+import json
+
+import pytest
+
+pytest.importorskip('boto3')
+moto_server = pytest.importorskip('moto.server')
+
+import urllib3
+
+import url_assinada
+from assinador import AssinadorLocal
+from conftest import carregar_lambda
+from multipart import FalhaMultipart, MULTIPART_TAMANHO_PARTE, TAMANHO_MINIMO_PARTE, enviar_multipart
+
+BUCKET = 'docs-rh'
+
+
+@pytest.fixture(scope='module')
+def endpoint():
+    servidor = moto_server.ThreadedMotoServer(ip_address='127.0.0.1', port=0, verbose=False)
+    servidor.start()
+    host, porta = servidor.get_host_and_port()
+    yield f'http://{host}:{porta}'
+    servidor.stop()
+
+
+@pytest.fixture
+def s3(endpoint, monkeypatch):
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'teste')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'teste')
+    monkeypatch.setattr(url_assinada, 'S3_ENDPOINT_URL', endpoint)
+    monkeypatch.setattr(url_assinada, 'ACCESS_POINT_ARN', BUCKET)
+    monkeypatch.setattr(url_assinada, '_s3_client', None)
+    cliente = url_assinada.cliente_s3()
+    cliente.create_bucket(Bucket=BUCKET)
+    yield cliente
+    for upload in cliente.list_multipart_uploads(Bucket=BUCKET).get('Uploads', []):
+        cliente.abort_multipart_upload(Bucket=BUCKET, Key=upload['Key'], UploadId=upload['UploadId'])
+    for objeto in cliente.list_objects_v2(Bucket=BUCKET).get('Contents', []):
+        cliente.delete_object(Bucket=BUCKET, Key=objeto['Key'])
+    monkeypatch.setattr(url_assinada, '_s3_client', None)
+
+
+def conteudo(tamanho):
+    return bytes(i % 251 for i in range(tamanho))
+
+
+def uploads_pendentes(s3):
+    return s3.list_multipart_uploads(Bucket=BUCKET).get('Uploads', [])
+
+
+class HttpComFalha:
+    """urllib3 de verdade, mas os PUTs das partes em `falhas` voltam 500."""
+
+    def __init__(self, falhas=()):
+        self.http = urllib3.PoolManager()
+        self.falhas = set(falhas)
+        self.partes = []
+
+    def request(self, metodo, url, **kwargs):
+        numero = int(url.split('partNumber=')[1].split('&')[0])
+        self.partes.append(numero)
+        if numero in self.falhas:
+            return urllib3.HTTPResponse(body=b'erro', status=500)
+        return self.http.request(metodo, url, **kwargs)
+
+
+def test_envio_em_partes(s3):
+    dados = conteudo(2 * TAMANHO_MINIMO_PARTE + 1234)
+    url = enviar_multipart(
+        AssinadorLocal(), 'documentos/grande.pdf', dados, content_type='application/pdf',
+        email='ana@exemplo.com', document_type='rg', tamanho_parte=TAMANHO_MINIMO_PARTE
+    )
+
+    objeto = s3.get_object(Bucket=BUCKET, Key='documentos/grande.pdf')
+    assert objeto['Body'].read() == dados
+    assert objeto['ContentType'] == 'application/pdf'
+    assert objeto['Metadata'] == {'email': 'ana@exemplo.com', 'document-type': 'rg'}
+    assert url.endswith('/documentos/grande.pdf')
+    assert uploads_pendentes(s3) == []
+
+
+def test_falha_numa_parte_cancela_as_demais_e_aborta(s3):
+    http = HttpComFalha(falhas={1})
+    with pytest.raises(FalhaMultipart):
+        enviar_multipart(
+            AssinadorLocal(), 'documentos/falha.pdf', conteudo(4 * TAMANHO_MINIMO_PARTE), http=http,
+            tamanho_parte=TAMANHO_MINIMO_PARTE, concorrencia=1, tentativas=2
+        )
+
+    # a parte 1 esgotou as tentativas; as partes 2 a 4 nem começaram
+    assert http.partes == [1, 1]
+    assert uploads_pendentes(s3) == []
+    assert 'Contents' not in s3.list_objects_v2(Bucket=BUCKET)
+
+
+@pytest.fixture
+def upload(s3, monkeypatch):
+    app = carregar_lambda('upload-documentos')
+    registrados = []
+    monkeypatch.setattr(app, 'registrar_arquivo', lambda key, metadados: registrados.append((key, metadados)))
+
+    def etapa(nome, **corpo):
+        event = {
+            'rawPath': f'/upload-doc-plataforma/multipart/{nome}',
+            'requestContext': {'http': {'method': 'POST'}},
+            'body': json.dumps(corpo),
+        }
+        resposta = app.lambda_handler(event, None)
+        return resposta['statusCode'], json.loads(resposta['body'])
+
+    etapa.registrados = registrados
+    return etapa
+
+
+def test_etapas_iniciar_partes_concluir(s3, upload):
+    dados = conteudo(MULTIPART_TAMANHO_PARTE + 10)
+    status, inicio = upload('iniciar', filename='contrato.pdf', tamanho=len(dados),
+                            email='ana@exemplo.com', document_type='contrato')
+    assert status == 200
+    tamanho_parte, upload_id = inicio['tamanho_parte'], inicio['upload_id']
+    assert [p['numero'] for p in inicio['partes']] == [1, 2]
+
+    # a parte 2 recebe uma URL nova, como numa retomada
+    status, novas = upload('partes', filename='contrato.pdf', upload_id=upload_id, partes=[2])
+    assert status == 200
+    urls = {p['numero']: p['url'] for p in inicio['partes']}
+    urls.update({p['numero']: p['url'] for p in novas['partes']})
+
+    http = urllib3.PoolManager()
+    etags = []
+    for numero, url in sorted(urls.items()):
+        fatia = dados[(numero - 1) * tamanho_parte:numero * tamanho_parte]
+        resposta = http.request('PUT', url, body=fatia)
+        assert resposta.status == 200
+        etags.append({'numero': numero, 'etag': resposta.headers['ETag']})
+
+    status, corpo = upload('concluir', filename='contrato.pdf', upload_id=upload_id, partes=etags)
+    assert status == 200
+    assert corpo['tamanho'] == len(dados)
+    assert corpo['email'] == 'ana@exemplo.com'
+    assert [key for key, _ in upload.registrados] == ['documentos/contrato.pdf']
+    assert s3.get_object(Bucket=BUCKET, Key='documentos/contrato.pdf')['Body'].read() == dados
+
+
+def test_etapa_abortar(s3, upload):
+    status, inicio = upload('iniciar', filename='desistiu.pdf', tamanho=TAMANHO_MINIMO_PARTE)
+    assert status == 200
+    assert len(uploads_pendentes(s3)) == 1
+
+    status, _ = upload('abortar', filename='desistiu.pdf', upload_id=inicio['upload_id'])
+    assert status == 200
+    assert uploads_pendentes(s3) == []
+    assert upload.registrados == []
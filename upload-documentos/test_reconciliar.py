@@ -0,0 +1,122 @@
+"""
+Reconciliação do índice documentos_arquivos com o S3: HEAD só dos objetos
+novos ou alterados, upsert dos metadados e remoção das chaves que sumiram do
+bucket, restrita aos prefixos listados.
+"""
+
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip('boto3')
+
+import reconciliar
+from conftest import ConexaoFalsa, CursorFalso
+
+LISTADO_EM = datetime(2026, 10, 18, 12, 0)
+
+
+class ConexaoReconciliacao(ConexaoFalsa):
+    """ConexaoFalsa cujo cursor informa `removidos` como rowcount do DELETE."""
+
+    def __init__(self, alterados, removidos=0):
+        super().__init__([(LISTADO_EM,)], [], [(chave,) for chave in alterados], [])
+        self.removidos = removidos
+
+    def cursor(self, name=None):
+        cur = CursorFalso(self)
+        cur.rowcount = self.removidos
+        return cur
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    """Listagem e HEAD falsos; `s3.objetos` por prefixo e `s3.metadados` por chave."""
+    class S3:
+        objetos = {}
+        metadados = {}
+        heads = []
+        lotes = []
+
+    def obter_metadados(chave):
+        S3.heads.append(chave)
+        meta = S3.metadados[chave]
+        if isinstance(meta, Exception):
+            raise meta
+        return meta
+
+    monkeypatch.setattr(reconciliar.url_assinada, 'listar_prefixos', lambda prefixos: {
+        p: S3.objetos.get(p, []) for p in prefixos
+    })
+    monkeypatch.setattr(reconciliar.url_assinada, 'obter_metadados', obter_metadados)
+    monkeypatch.setattr(reconciliar, 'execute_values', lambda cur, sql, linhas, page_size: S3.lotes.append(
+        (sql, list(linhas))
+    ))
+    return S3
+
+
+def rodar(monkeypatch, conn, prefixos):
+    @contextmanager
+    def conexao():
+        yield conn
+
+    monkeypatch.setattr(reconciliar, 'conexao', conexao)
+    return reconciliar.reconciliar(prefixos)
+
+
+def objeto(chave, tamanho=10, etag='"e"'):
+    return {'chave': chave, 'tamanho': tamanho, 'etag': etag}
+
+
+def meta(email, tipo, tamanho=10, etag='"e"'):
+    return {
+        'metadados': {'email': email, 'document-type': tipo, 'sha256': 'ab' * 32},
+        'content_type': 'application/pdf', 'tamanho': tamanho, 'etag': etag,
+    }
+
+
+def test_head_so_dos_alterados_e_upsert(s3, monkeypatch):
+    s3.objetos = {'documentos/': [objeto('documentos/rg.pdf'), objeto('documentos/cpf.pdf'), objeto('documentos/novo.pdf')]}
+    s3.metadados = {
+        'documentos/novo.pdf': meta('ana@exemplo.com', 'rg'),
+        'documentos/cpf.pdf': RuntimeError('403'),
+    }
+    conn = ConexaoReconciliacao(['documentos/novo.pdf', 'documentos/cpf.pdf'], removidos=2)
+
+    resumo = rodar(monkeypatch, conn, ['documentos/'])
+
+    assert sorted(s3.heads) == ['documentos/cpf.pdf', 'documentos/novo.pdf']
+    listagem, upsert = s3.lotes
+    assert sorted(linha[0] for linha in listagem[1]) == ['documentos/cpf.pdf', 'documentos/novo.pdf', 'documentos/rg.pdf']
+    assert 'ON CONFLICT (chave) DO UPDATE' in upsert[0]
+    assert upsert[1] == [
+        ('documentos/novo.pdf', 'ana@exemplo.com', 'rg', 'application/pdf', 10, '"e"', 'ab' * 32)
+    ]
+    assert conn.commits == 1
+    assert {k: v for k, v in resumo.items() if k != 'duracao_ms'} == {
+        'prefixos': 1, 'objetos_s3': 3, 'atualizados': 1, 'falhas_head': 1, 'removidos': 2,
+    }
+
+
+def test_remocao_restrita_aos_prefixos_e_ao_instante_da_listagem(s3, monkeypatch):
+    conn = ConexaoReconciliacao([])
+
+    rodar(monkeypatch, conn, ['documentos/a_b', 'documentos/100%'])
+
+    sql, (padroes, listado_em) = conn.executados[-1]
+    assert sql.strip().startswith('DELETE FROM documentos_arquivos')
+    # _ e % do prefixo são literais no LIKE
+    assert padroes == ['documentos/a\\_b%', 'documentos/100\\%%']
+    assert listado_em == LISTADO_EM
+
+
+def test_nada_alterado_nao_faz_upsert(s3, monkeypatch):
+    s3.objetos = {'documentos/': [objeto('documentos/rg.pdf')]}
+    conn = ConexaoReconciliacao([])
+
+    resumo = rodar(monkeypatch, conn, ['documentos/'])
+
+    assert s3.heads == []
+    assert len(s3.lotes) == 1
+    assert resumo['atualizados'] == 0 and resumo['removidos'] == 0
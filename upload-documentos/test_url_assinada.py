@@ -0,0 +1,46 @@
+"""
+Entradas inválidas em "partes" voltam 400, inclusive fora do modo lote, em vez
+de uma exceção não tratada na Lambda.
+"""
+
+import json
+
+import pytest
+
+pytest.importorskip('boto3')
+
+import url_assinada
+
+
+@pytest.fixture(autouse=True)
+def sem_s3(monkeypatch):
+    monkeypatch.setattr(url_assinada, 'iniciar_multipart', lambda *a, **k: 'upload-1')
+    monkeypatch.setattr(url_assinada, 'gerar_urls_partes', lambda key, upload_id, numeros, exp: numeros)
+    monkeypatch.setattr(url_assinada, 'concluir_multipart', lambda key, upload_id, partes: True)
+
+
+def invocar(**corpo):
+    resposta = url_assinada.lambda_handler({'body': json.dumps({'key': 'documentos/a.pdf', **corpo})}, None)
+    return resposta['statusCode'], json.loads(resposta['body'])
+
+
+@pytest.mark.parametrize('operation', ['multipart_iniciar', 'multipart_partes'])
+@pytest.mark.parametrize('partes', ['abc', [{'x': 1}], [1, None], {'numero': 1}])
+def test_partes_invalidas(operation, partes):
+    assert invocar(operation=operation, upload_id='upload-1', partes=partes) == (400, {'error': 'partes inválidas'})
+
+
+@pytest.mark.parametrize('partes', ['abc', [{'numero': 'z', 'etag': 'e'}], [{'etag': 'e'}], [None]])
+def test_concluir_partes_invalidas(partes):
+    assert invocar(operation='multipart_concluir', upload_id='upload-1', partes=partes) == (
+        400, {'error': 'partes inválidas'}
+    )
+
+
+def test_partes_validas():
+    status, dados = invocar(operation='multipart_partes', upload_id='upload-1', partes=['1', 2])
+    assert status == 200
+    assert dados['partes'] == [1, 2]
+
+    status, _ = invocar(operation='multipart_concluir', upload_id='upload-1', partes=[{'numero': '2', 'etag': 'e'}])
+    assert status == 200
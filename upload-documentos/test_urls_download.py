@@ -0,0 +1,90 @@
+"""
+Cache das URLs de download: a mesma URL volta enquanto restar pelo menos
+URL_DOWNLOAD_VALIDADE_MINIMA da validade pedida, com os segundos restantes
+(o expires_in do /download-doc-plataforma); depois disso uma nova é assinada.
+"""
+
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('boto3')
+
+import url_assinada
+from url_assinada import obter_url_download
+
+
+class S3Falso:
+    def __init__(self):
+        self.assinaturas = 0
+        self.falhar = False
+
+    def generate_presigned_url(self, operacao, Params, ExpiresIn):
+        if self.falhar:
+            raise RuntimeError('sem credenciais')
+        self.assinaturas += 1
+        return f"https://s3/{Params['Key']}?expira={ExpiresIn}&n={self.assinaturas}"
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    s3 = S3Falso()
+    s3.agora = 1000.0
+    monkeypatch.setattr(url_assinada, 'cliente_s3', lambda: s3)
+    monkeypatch.setattr(url_assinada, 'time', SimpleNamespace(time=lambda: s3.agora))
+    monkeypatch.setattr(url_assinada, '_urls_download', OrderedDict())
+    monkeypatch.setattr(url_assinada, 'URL_DOWNLOAD_VALIDADE_MINIMA', 0.5)
+    return s3
+
+
+def test_reaproveita_com_a_validade_restante(s3):
+    url, validade = obter_url_download('documentos/rg.pdf', 3600)
+    assert validade == 3600
+
+    s3.agora += 1000
+    assert obter_url_download('documentos/rg.pdf', 3600) == (url, 2600)
+    s3.agora += 800
+    assert obter_url_download('documentos/rg.pdf', 3600) == (url, 1800)
+    assert s3.assinaturas == 1
+
+
+def test_abaixo_da_validade_minima_assina_de_novo(s3):
+    url, _ = obter_url_download('documentos/rg.pdf', 3600)
+
+    s3.agora += 1801
+    nova, validade = obter_url_download('documentos/rg.pdf', 3600)
+
+    assert nova != url
+    assert validade == 3600
+    assert s3.assinaturas == 2
+    # A nova URL substitui a antiga no cache
+    assert obter_url_download('documentos/rg.pdf', 3600) == (nova, 3600)
+
+
+def test_chave_inclui_arquivo_e_expiracao(s3):
+    obter_url_download('documentos/rg.pdf', 3600)
+    obter_url_download('documentos/rg.pdf', 60)
+    obter_url_download('documentos/cpf.pdf', 3600)
+    assert s3.assinaturas == 3
+
+
+def test_descarta_a_menos_usada_acima_do_maximo(s3, monkeypatch):
+    monkeypatch.setattr(url_assinada, 'URL_DOWNLOAD_CACHE_MAX', 2)
+    obter_url_download('documentos/a.pdf', 3600)
+    obter_url_download('documentos/b.pdf', 3600)
+    obter_url_download('documentos/a.pdf', 3600)
+    obter_url_download('documentos/c.pdf', 3600)
+
+    assert list(url_assinada._urls_download) == [('documentos/a.pdf', 3600), ('documentos/c.pdf', 3600)]
+    assert s3.assinaturas == 3
+
+
+def test_falha_nao_entra_no_cache(s3):
+    s3.falhar = True
+    assert obter_url_download('documentos/rg.pdf', 3600) == (None, 0)
+    assert not url_assinada._urls_download
+
+    s3.falhar = False
+    url, validade = obter_url_download('documentos/rg.pdf', 3600)
+    assert url is not None and validade == 3600
@@ -0,0 +1,102 @@
+"""
+Validação do arquivo pelos primeiros bytes: extensão que não bate com o
+conteúdo (415), limites de tamanho por tipo de documento (413) e formatos não
+reconhecidos, recusados ou aceitos conforme UPLOAD_RECUSAR_TIPOS_DESCONHECIDOS.
+"""
+
+import base64
+
+import pytest
+
+import validacao
+from validacao import ArquivoRecusado, validar, validar_base64, validar_tamanho
+
+PDF = b'%PDF-1.7\n' + b'x' * 100
+PNG = b'\x89PNG\r\n\x1a\n' + b'x' * 100
+JPEG = b'\xff\xd8\xff\xe0' + b'x' * 100
+DOCX = b'PK\x03\x04' + b'x' * 100
+
+
+def recusado(funcao, *args, **kwargs):
+    with pytest.raises(ArquivoRecusado) as erro:
+        funcao(*args, **kwargs)
+    return erro.value.status
+
+
+@pytest.mark.parametrize('conteudo, declarado, esperado', [
+    (PDF, 'application/pdf', 'application/pdf'),
+    (PNG, 'image/png', 'image/png'),
+    (JPEG, 'image/jpeg; charset=binary', 'image/jpeg'),
+    (PNG, None, 'image/png'),
+])
+def test_assinatura_confere(conteudo, declarado, esperado):
+    assert validar(conteudo, len(conteudo), declarado) == esperado
+    texto = base64.b64encode(conteudo).decode('ascii')
+    assert validar_base64(texto, content_type_declarado=declarado) == esperado
+
+
+@pytest.mark.parametrize('conteudo, declarado', [
+    (PNG, 'application/pdf'),
+    (PDF, 'image/png'),
+    (JPEG, 'image/gif'),
+    (DOCX, 'application/pdf'),
+])
+def test_assinatura_diferente_da_extensao(conteudo, declarado, monkeypatch):
+    for recusar in (True, False):
+        monkeypatch.setattr(validacao, 'UPLOAD_RECUSAR_TIPOS_DESCONHECIDOS', recusar)
+        assert recusado(validar, conteudo, len(conteudo), declarado) == 415
+        texto = base64.b64encode(conteudo).decode('ascii')
+        assert recusado(validar_base64, texto, content_type_declarado=declarado) == 415
+
+
+def test_base64_dentro_do_json():
+    texto = '{"file_content": "' + base64.b64encode(PNG).decode('ascii') + '"}'
+    inicio = texto.index('": "') + 4
+    fim = texto.rindex('"')
+    assert validar_base64(texto, inicio, fim, 'image/png') == 'image/png'
+
+
+def test_formato_desconhecido_recusado_por_padrao(monkeypatch):
+    monkeypatch.setattr(validacao, 'UPLOAD_RECUSAR_TIPOS_DESCONHECIDOS', True)
+    assert recusado(validar, DOCX, len(DOCX), 'application/octet-stream') == 415
+
+
+def test_formato_desconhecido_aceito_quando_configurado(monkeypatch):
+    monkeypatch.setattr(validacao, 'UPLOAD_RECUSAR_TIPOS_DESCONHECIDOS', False)
+    docx = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+    assert validar(DOCX, len(DOCX), docx) == docx
+    assert validar(DOCX, len(DOCX), None) == 'application/octet-stream'
+
+
+@pytest.fixture
+def limites(monkeypatch):
+    monkeypatch.setattr(validacao, 'UPLOAD_TAMANHO_MAXIMO', 1000)
+    monkeypatch.setattr(validacao, 'UPLOAD_LIMITES_POR_TIPO', {'rg': 100, 'laudo': 5000})
+
+
+@pytest.mark.parametrize('document_type, tamanho, status', [
+    ('rg', 100, None),
+    ('rg', 101, 413),
+    ('laudo', 5000, None),
+    ('laudo', 5001, 413),
+    ('cpf', 1000, None),
+    ('cpf', 1001, 413),
+    (None, 1001, 413),
+    ('rg', 0, 400),
+])
+def test_limite_por_tipo(limites, document_type, tamanho, status):
+    if status is None:
+        validar_tamanho(tamanho, document_type)
+    else:
+        assert recusado(validar_tamanho, tamanho, document_type) == status
+
+
+def test_limite_por_tipo_no_base64(limites):
+    # 150 bytes: passa no limite geral, não no do rg; o tamanho vem do texto
+    conteudo = PDF[:9] + b'x' * 141
+    texto = base64.b64encode(conteudo).decode('ascii')
+    assert validar_base64(texto, document_type='cpf') == 'application/pdf'
+    with pytest.raises(ArquivoRecusado) as erro:
+        validar_base64(texto, document_type='rg')
+    assert erro.value.status == 413
+    assert 'para rg' in str(erro.value)
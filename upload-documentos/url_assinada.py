@@ -7,15 +7,49 @@ Este script gera URLs assinadas para upload/download no S3 Access Point
 para usar no Insomnia ou outras ferramentas de teste.
 """
 
+import os
+import time
 import boto3
 import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from botocore.exceptions import ClientError, NoCredentialsError
 
 # 🔧 Configurações
-ACCESS_POINT_ARN = "arn:aws:s3:us-east-1:808155513803:accesspoint/docs-rh"
+# S3_BUCKET e S3_ENDPOINT_URL permitem apontar para um S3 local (ex.: moto_server)
+ACCESS_POINT_ARN = os.environ.get('S3_BUCKET', "arn:aws:s3:us-east-1:808155513803:accesspoint/docs-rh")
 REGION = "us-east-1"
+S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL') or None
 DEFAULT_EXPIRATION = 3600  # 1 hora em segundos
+# Prefixos listados em paralelo por listar_prefixos
+LISTAGEM_CONCORRENCIA = int(os.environ.get('LISTAGEM_CONCORRENCIA', '8'))
+# Itens aceitos num único lote do lambda_handler
+LOTE_MAXIMO = int(os.environ.get('URL_ASSINADA_LOTE_MAXIMO', '100'))
+
+# Uma URL de download em cache é reaproveitada enquanto restar pelo menos esta
+# fração da validade pedida (0.5 = metade)
+URL_DOWNLOAD_VALIDADE_MINIMA = float(os.environ.get('URL_DOWNLOAD_VALIDADE_MINIMA', '0.5'))
+URL_DOWNLOAD_CACHE_MAX = int(os.environ.get('URL_DOWNLOAD_CACHE_MAX', '2048'))
+
+# Cliente S3 criado uma vez por container (o boto3 leva dezenas de ms para
+# carregar os modelos do botocore a cada boto3.client)
+_s3_client = None
+_lock_s3 = threading.Lock()
+
+# (arquivo, expiration) -> (url, instante em que a URL expira)
+_urls_download = OrderedDict()
+_lock_urls = threading.Lock()
+
+def cliente_s3():
+    """Cliente S3 reaproveitado entre invocações com o container quente"""
+    global _s3_client
+    if _s3_client is None:
+        with _lock_s3:
+            if _s3_client is None:
+                _s3_client = boto3.client('s3', region_name=REGION, endpoint_url=S3_ENDPOINT_URL)
+    return _s3_client
 
 def verificar_credenciais():
     """Verifica se as credenciais AWS estão configuradas"""
@@ -34,7 +68,7 @@ def verificar_credenciais():
         print(f"❌ Erro ao verificar credenciais: {str(e)}")
         return False
 
-def gerar_url_upload(nome_arquivo, expiration=DEFAULT_EXPIRATION, email=None, content_type='application/pdf', document_type=None):
+def gerar_url_upload(nome_arquivo, expiration=DEFAULT_EXPIRATION, email=None, content_type='application/pdf', document_type=None, sha256=None):
     """
     Gera URL assinada para upload de arquivo, aceitando metadados personalizados e content-type dinâmico.
     Args:
@@ -43,11 +77,12 @@ def gerar_url_upload(nome_arquivo, expiration=DEFAULT_EXPIRATION, email=None, co
         email: E-mail do remetente (opcional, será incluído como x-amz-meta-email)
         content_type: Content-Type do arquivo (ex: application/pdf, image/png)
         document_type: Tipo do documento (opcional, será incluído como x-amz-meta-document-type)
+        sha256: SHA-256 do conteúdo em hex (opcional, será incluído como x-amz-meta-sha256)
     Returns:
         URL assinada para upload ou None se erro
     """
     try:
-        s3_client = boto3.client('s3', region_name=REGION)
+        s3_client = cliente_s3()
         params = {
             'Bucket': ACCESS_POINT_ARN,
             'Key': nome_arquivo,
@@ -60,6 +95,8 @@ def gerar_url_upload(nome_arquivo, expiration=DEFAULT_EXPIRATION, email=None, co
             metadata['email'] = email
         if document_type:
             metadata['document-type'] = document_type
+        if sha256:
+            metadata['sha256'] = sha256
         
         if metadata:
             params['Metadata'] = metadata
@@ -105,8 +142,31 @@ def gerar_url_download(nome_arquivo, expiration=DEFAULT_EXPIRATION):
     Returns:
         URL assinada para download ou None se erro
     """
+    url, _ = obter_url_download(nome_arquivo, expiration)
+    return url
+
+def obter_url_download(nome_arquivo, expiration=DEFAULT_EXPIRATION):
+    """
+    Como gerar_url_download, mas reaproveita uma URL já gerada para o mesmo
+    arquivo e expiração enquanto ela tiver validade suficiente.
+    
+    Returns:
+        (url, segundos de validade restantes) ou (None, 0) se erro
+    """
+    chave = (nome_arquivo, expiration)
+    agora = time.time()
+    with _lock_urls:
+        item = _urls_download.get(chave)
+        if item is not None:
+            url, expira_em = item
+            restante = int(expira_em - agora)
+            if restante >= expiration * URL_DOWNLOAD_VALIDADE_MINIMA:
+                _urls_download.move_to_end(chave)
+                return url, restante
+            del _urls_download[chave]
+
     try:
-        s3_client = boto3.client('s3', region_name=REGION)
+        s3_client = cliente_s3()
         
         url = s3_client.generate_presigned_url(
             'get_object',
@@ -125,8 +185,65 @@ def gerar_url_download(nome_arquivo, expiration=DEFAULT_EXPIRATION):
         print(f"   URL: {url}")
         print()
         
-        return url
+        with _lock_urls:
+            _urls_download[chave] = (url, agora + expiration)
+            _urls_download.move_to_end(chave)
+            while len(_urls_download) > URL_DOWNLOAD_CACHE_MAX:
+                _urls_download.popitem(last=False)
+        
+        return url, expiration
         
+    except ClientError as e:
+        error_code = e.response['Error']['Code']
+        error_msg = e.response['Error']['Message']
+        print(f"❌ Erro AWS ({error_code}): {error_msg}")
+        return None, 0
+    except Exception as e:
+        print(f"❌ Erro inesperado: {str(e)}")
+        return None, 0
+
+def gerar_post_upload(nome_arquivo, expiration=DEFAULT_EXPIRATION, email=None, content_type='application/pdf',
+                      document_type=None, tamanho_maximo=None):
+    """
+    Gera um POST assinado (formulário multipart) para upload direto pelo navegador.
+    Ao contrário da URL de PUT, o POST permite limitar o tamanho do arquivo.
+    Args:
+        nome_arquivo: Nome do arquivo (ex: documentos/teste.pdf)
+        expiration: Tempo de expiração em segundos
+        email: E-mail do remetente (opcional, vira o campo x-amz-meta-email)
+        content_type: Content-Type do arquivo
+        document_type: Tipo do documento (opcional, vira o campo x-amz-meta-document-type)
+        tamanho_maximo: Tamanho máximo aceito em bytes (opcional)
+    Returns:
+        {'url': ..., 'fields': {...}} ou None se erro
+    """
+    try:
+        fields = {'Content-Type': content_type}
+        if email:
+            fields['x-amz-meta-email'] = email
+        if document_type:
+            fields['x-amz-meta-document-type'] = document_type
+
+        # Todo campo enviado no formulário precisa constar nas condições da política
+        conditions = [{campo: valor} for campo, valor in fields.items()]
+        if tamanho_maximo:
+            conditions.append(['content-length-range', 1, tamanho_maximo])
+
+        post = cliente_s3().generate_presigned_post(
+            ACCESS_POINT_ARN,
+            nome_arquivo,
+            Fields=fields,
+            Conditions=conditions,
+            ExpiresIn=expiration
+        )
+
+        print(f"\U0001F4E4 POST de UPLOAD gerado:")
+        print(f"   Arquivo: {nome_arquivo}")
+        print(f"   Content-Type: {content_type}")
+        print()
+
+        return post
+
     except ClientError as e:
         error_code = e.response['Error']['Code']
         error_msg = e.response['Error']['Message']
@@ -136,19 +253,187 @@ def gerar_url_download(nome_arquivo, expiration=DEFAULT_EXPIRATION):
         print(f"❌ Erro inesperado: {str(e)}")
         return None
 
-def listar_arquivos():
+def obter_metadados(nome_arquivo):
+    """
+    Consulta (HEAD) um arquivo no Access Point.
+    
+    Returns:
+        {'tamanho', 'etag', 'content_type', 'metadados'} ou None se o arquivo não existir
+    """
+    try:
+        response = cliente_s3().head_object(Bucket=ACCESS_POINT_ARN, Key=nome_arquivo)
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+            return None
+        raise
+    return {
+        'tamanho': response['ContentLength'],
+        'etag': response['ETag'].strip('"'),
+        'content_type': response.get('ContentType'),
+        'metadados': response.get('Metadata', {}),
+    }
+
+def iniciar_multipart(nome_arquivo, email=None, content_type='application/pdf', document_type=None, sha256=None):
+    """
+    Inicia um upload multipart, para arquivos grandes enviados em partes.
+    Os metadados e o Content-Type são definidos aqui, não nas partes.
+    Returns:
+        UploadId ou None se erro
+    """
+    try:
+        params = {
+            'Bucket': ACCESS_POINT_ARN,
+            'Key': nome_arquivo,
+            'ContentType': content_type
+        }
+        metadata = {}
+        if email:
+            metadata['email'] = email
+        if document_type:
+            metadata['document-type'] = document_type
+        if sha256:
+            metadata['sha256'] = sha256
+        if metadata:
+            params['Metadata'] = metadata
+
+        upload_id = cliente_s3().create_multipart_upload(**params)['UploadId']
+        print(f"\U0001F4E6 Upload multipart iniciado: {nome_arquivo} (UploadId {upload_id})")
+        return upload_id
+
+    except ClientError as e:
+        error_code = e.response['Error']['Code']
+        error_msg = e.response['Error']['Message']
+        print(f"❌ Erro AWS ({error_code}): {error_msg}")
+        return None
+    except Exception as e:
+        print(f"❌ Erro inesperado: {str(e)}")
+        return None
+
+def gerar_urls_partes(nome_arquivo, upload_id, numeros_partes, expiration=DEFAULT_EXPIRATION):
+    """
+    Gera uma URL assinada de PUT para cada parte (numeradas a partir de 1).
+    A assinatura é local, sem chamada ao S3.
+    Returns:
+        Lista de {'numero': n, 'url': ...}
+    """
+    s3_client = cliente_s3()
+    return [
+        {
+            'numero': numero,
+            'url': s3_client.generate_presigned_url(
+                'upload_part',
+                Params={
+                    'Bucket': ACCESS_POINT_ARN,
+                    'Key': nome_arquivo,
+                    'UploadId': upload_id,
+                    'PartNumber': numero
+                },
+                ExpiresIn=expiration
+            )
+        }
+        for numero in numeros_partes
+    ]
+
+def concluir_multipart(nome_arquivo, upload_id, partes):
+    """
+    Conclui o upload multipart.
+    Args:
+        partes: lista de {'numero': n, 'etag': ...} (o ETag devolvido no PUT de cada parte)
+    Returns:
+        True se concluído, False se erro
+    """
+    try:
+        cliente_s3().complete_multipart_upload(
+            Bucket=ACCESS_POINT_ARN,
+            Key=nome_arquivo,
+            UploadId=upload_id,
+            MultipartUpload={
+                'Parts': [
+                    {'PartNumber': int(p['numero']), 'ETag': p['etag']}
+                    for p in sorted(partes, key=lambda p: int(p['numero']))
+                ]
+            }
+        )
+        print(f"✅ Upload multipart concluído: {nome_arquivo} ({len(partes)} partes)")
+        return True
+
+    except ClientError as e:
+        error_code = e.response['Error']['Code']
+        error_msg = e.response['Error']['Message']
+        print(f"❌ Erro AWS ({error_code}): {error_msg}")
+        return False
+
+def abortar_multipart(nome_arquivo, upload_id):
+    """Cancela o upload multipart e descarta as partes já enviadas"""
+    try:
+        cliente_s3().abort_multipart_upload(Bucket=ACCESS_POINT_ARN, Key=nome_arquivo, UploadId=upload_id)
+        print(f"🗑️  Upload multipart abortado: {nome_arquivo}")
+        return True
+    except ClientError as e:
+        error_code = e.response['Error']['Code']
+        error_msg = e.response['Error']['Message']
+        print(f"❌ Erro AWS ({error_code}): {error_msg}")
+        return False
+
+def listar_pagina(prefixo='', token=None, max_chaves=1000):
+    """
+    Lista uma página de objetos sob `prefixo`.
+    Args:
+        token: ContinuationToken devolvido pela página anterior (None na primeira)
+        max_chaves: Itens por página (máximo 1000, limite do S3)
+    Returns:
+        (objetos, proximo_token); proximo_token é None na última página
+    """
+    params = {'Bucket': ACCESS_POINT_ARN, 'Prefix': prefixo, 'MaxKeys': min(int(max_chaves), 1000)}
+    if token:
+        params['ContinuationToken'] = token
+    response = cliente_s3().list_objects_v2(**params)
+    objetos = [
+        {
+            'chave': obj['Key'],
+            'tamanho': obj['Size'],
+            'etag': obj['ETag'].strip('"'),
+            'modificado_em': obj['LastModified'].isoformat(),
+        }
+        for obj in response.get('Contents', [])
+    ]
+    return objetos, response.get('NextContinuationToken') if response.get('IsTruncated') else None
+
+def listar_objetos(prefixo=''):
+    """Percorre todas as páginas sob `prefixo` (gerador, sem o limite de 1000 chaves)"""
+    token = None
+    while True:
+        objetos, token = listar_pagina(prefixo, token)
+        yield from objetos
+        if not token:
+            return
+
+def listar_prefixos(prefixos, concorrencia=LISTAGEM_CONCORRENCIA):
+    """
+    Lista vários prefixos em paralelo (ex.: um por candidato), cada um com
+    paginação própria. O cliente S3 do boto3 pode ser usado por várias threads.
+    Returns:
+        {prefixo: [objetos]}
+    """
+    prefixos = list(dict.fromkeys(prefixos))
+    if len(prefixos) <= 1:
+        return {p: list(listar_objetos(p)) for p in prefixos}
+    with ThreadPoolExecutor(max_workers=min(concorrencia, len(prefixos))) as executor:
+        resultados = executor.map(lambda p: list(listar_objetos(p)), prefixos)
+        return dict(zip(prefixos, resultados))
+
+def listar_arquivos(prefixo=''):
     """Lista arquivos no Access Point"""
     try:
-        s3_client = boto3.client('s3', region_name=REGION)
-        
-        response = s3_client.list_objects_v2(Bucket=ACCESS_POINT_ARN)
+        total = 0
+        for obj in listar_objetos(prefixo):
+            if total == 0:
+                print(f"📁 Arquivos no Access Point:")
+            total += 1
+            size_mb = obj['tamanho'] / (1024 * 1024)
+            print(f"   📄 {obj['chave']} ({size_mb:.2f} MB) - {obj['modificado_em']}")
         
-        if 'Contents' in response:
-            print(f"📁 Arquivos no Access Point:")
-            for obj in response['Contents']:
-                size_mb = obj['Size'] / (1024 * 1024)
-                print(f"   📄 {obj['Key']} ({size_mb:.2f} MB) - {obj['LastModified']}")
-        else:
+        if total == 0:
             print("📁 Access Point vazio (nenhum arquivo encontrado)")
         
         print()
@@ -259,15 +544,28 @@ def gerar_collection_insomnia():
 def lambda_handler(event, context):
     """
     Lambda handler para gerar URL assinada de upload/download no S3 Access Point.
-    Espera no event:
+    Espera no event uma operação:
       {
-        "operation": "upload" ou "download",
+        "operation": "upload", "upload_post", "download", "metadados", "listar",
+                     "multipart_iniciar", "multipart_partes", "multipart_concluir" ou "multipart_abortar",
         "key": "documentos/teste.pdf",
         "expiration": 3600 (opcional),
         "email": "usuario@email.com" (opcional),
         "content_type": "application/pdf" (opcional),
-        "document_type": "CV" (opcional)
+        "document_type": "CV" (opcional),
+        "sha256": "..." (opcional, upload e multipart_iniciar),
+        "tamanho_maximo": 10485760 (opcional, só upload_post),
+        "prefixo", "token", "max_chaves" (só listar, que dispensa "key"),
+        "upload_id": "..." (multipart_partes/concluir/abortar),
+        "partes": 3 ou [1, 2, 3] (multipart_iniciar/partes) ou [{"numero": 1, "etag": "..."}] (multipart_concluir)
       }
+    ou um lote, em que os campos fora de "items" valem como padrão para cada item:
+      {
+        "expiration": 3600 (opcional),
+        "items": [{"operation": "download", "key": "documentos/rg.pdf"}, ...]
+      }
+    No lote, cada item da resposta traz o próprio "status" e, em caso de erro,
+    "error"; a falha de um item não afeta os demais.
     """
 
     print("EVENTO RECEBIDO:", json.dumps(event))
@@ -280,59 +578,161 @@ def lambda_handler(event, context):
                 "statusCode": 400,
                 "body": json.dumps({"error": f"Body inválido: {str(e)}"})
             }
+
+    itens = event.get("items")
+    if itens is None:
+        status, dados = executar_operacao(event)
+        return {
+            "statusCode": status,
+            "body": json.dumps(dados)
+        }
+
+    if not isinstance(itens, list):
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": "items deve ser uma lista"})
+        }
+    if len(itens) > LOTE_MAXIMO:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": f"Máximo de {LOTE_MAXIMO} itens por lote"})
+        }
+
+    padroes = {campo: valor for campo, valor in event.items() if campo != "items"}
+    resultados = []
+    for item in itens:
+        if not isinstance(item, dict):
+            resultados.append({"status": 400, "error": "Item deve ser um objeto"})
+            continue
+        try:
+            status, dados = executar_operacao({**padroes, **item})
+        except Exception as e:
+            print(f"❌ Erro no item {item.get('key')}: {str(e)}")
+            status, dados = 500, {"error": str(e)}
+        # Itens com erro ecoam a operação e a chave para o cliente casar com o pedido
+        resultados.append({"status": status, "operation": item.get("operation"), "key": item.get("key"), **dados})
+
+    return {
+        "statusCode": 200,
+        "body": json.dumps({"items": resultados})
+    }
+
+
+def executar_operacao(event):
+    """Executa uma operação (upload, download, multipart...). Retorna (status, dados)."""
     operation = event.get("operation")
     key = event.get("key")
     expiration = event.get("expiration", DEFAULT_EXPIRATION)
     email = event.get("email")
     content_type = event.get("content_type", "application/pdf")
     document_type = event.get("document_type")
+    sha256 = event.get("sha256")
+
+    if operation == "listar":
+        # Lista paginada sob um prefixo (ex.: documentos/<candidato>); "token" continua a página anterior
+        try:
+            objetos, proximo_token = listar_pagina(event.get("prefixo") or "", event.get("token"),
+                                                   event.get("max_chaves", 1000))
+        except ClientError as e:
+            print(f"❌ Erro ao listar arquivos: {str(e)}")
+            return 500, {"error": "Erro ao listar arquivos"}
+        return 200, {"operation": "listar", "objetos": objetos, "proximo_token": proximo_token}
 
     if not operation or not key:
-        return {
-            "statusCode": 400,
-            "body": json.dumps({
-                "error": "Parâmetros obrigatórios: operation (upload|download) e key"
-            })
-        }
+        return 400, {"error": "Parâmetros obrigatórios: operation e key"}
 
     if operation == "upload":
-        url = gerar_url_upload(key, expiration, email=email, content_type=content_type, document_type=document_type)
+        url = gerar_url_upload(key, expiration, email=email, content_type=content_type, document_type=document_type,
+                               sha256=sha256)
         if url:
-            return {
-                "statusCode": 200,
-                "body": json.dumps({
-                    "url": url,
-                    "operation": "upload",
-                    "key": key,
-                    "expiration": expiration,
-                    "email": email,
-                    "document_type": document_type
-                })
+            return 200, {
+                "url": url,
+                "operation": "upload",
+                "key": key,
+                "expiration": expiration,
+                "email": email,
+                "document_type": document_type
             }
         else:
-            return {
-                "statusCode": 500,
-                "body": json.dumps({"error": "Erro ao gerar URL de upload"})
+            return 500, {"error": "Erro ao gerar URL de upload"}
+    elif operation == "upload_post":
+        post = gerar_post_upload(key, expiration, email=email, content_type=content_type,
+                                 document_type=document_type, tamanho_maximo=event.get("tamanho_maximo"))
+        if post:
+            return 200, {
+                "url": post["url"],
+                "fields": post["fields"],
+                "operation": "upload_post",
+                "key": key,
+                "expiration": expiration
             }
+        else:
+            return 500, {"error": "Erro ao gerar POST de upload"}
+    elif operation == "metadados":
+        try:
+            metadados = obter_metadados(key)
+        except Exception as e:
+            print(f"❌ Erro ao consultar metadados: {str(e)}")
+            return 500, {"error": "Erro ao consultar metadados"}
+        if metadados is None:
+            return 404, {"error": "Arquivo não encontrado"}
+        return 200, {"operation": "metadados", "key": key, **metadados}
+    elif operation in ("multipart_iniciar", "multipart_partes"):
+        upload_id = event.get("upload_id")
+        if operation == "multipart_partes" and not upload_id:
+            return 400, {"error": "upload_id é obrigatório"}
+        # "partes" é a quantidade de partes ou a lista dos números; validado
+        # antes de iniciar o upload para não deixar um multipart órfão
+        partes = event.get("partes") or []
+        try:
+            if isinstance(partes, int):
+                numeros = list(range(1, partes + 1))
+            elif isinstance(partes, list):
+                numeros = [int(n) for n in partes]
+            else:
+                raise TypeError(partes)
+        except (TypeError, ValueError):
+            return 400, {"error": "partes inválidas"}
+        if any(n < 1 or n > 10000 for n in numeros):
+            return 400, {"error": "Partes devem estar entre 1 e 10000"}
+        if operation == "multipart_iniciar":
+            upload_id = iniciar_multipart(key, email=email, content_type=content_type, document_type=document_type,
+                                          sha256=sha256)
+            if not upload_id:
+                return 500, {"error": "Erro ao iniciar upload multipart"}
+        return 200, {
+            "operation": operation,
+            "key": key,
+            "upload_id": upload_id,
+            "partes": gerar_urls_partes(key, upload_id, numeros, expiration),
+            "expiration": expiration
+        }
+    elif operation in ("multipart_concluir", "multipart_abortar"):
+        upload_id = event.get("upload_id")
+        if not upload_id:
+            return 400, {"error": "upload_id é obrigatório"}
+        if operation == "multipart_concluir":
+            try:
+                partes = [{"numero": int(p["numero"]), "etag": p["etag"]} for p in event.get("partes") or []]
+            except (TypeError, ValueError, KeyError):
+                return 400, {"error": "partes inválidas"}
+            ok = concluir_multipart(key, upload_id, partes)
+        else:
+            ok = abortar_multipart(key, upload_id)
+        if not ok:
+            return 500, {"error": f"Erro em {operation}"}
+        return 200, {"operation": operation, "key": key, "upload_id": upload_id}
     elif operation == "download":
-        url = gerar_url_download(key, expiration)
+        url, restante = obter_url_download(key, expiration)
         if url:
-            return {
-                "statusCode": 200,
-                "body": json.dumps({
-                    "url": url,
-                    "operation": "download",
-                    "key": key,
-                    "expiration": expiration
-                })
+            return 200, {
+                "url": url,
+                "operation": "download",
+                "key": key,
+                "expiration": restante
             }
         else:
-            return {
-                "statusCode": 500,
-                "body": json.dumps({"error": "Erro ao gerar URL de download"})
-            }
+            return 500, {"error": "Erro ao gerar URL de download"}
     else:
-        return {
-            "statusCode": 400,
-            "body": json.dumps({"error": "operation deve ser 'upload' ou 'download'"})
-        }
+        return 400, {"error": "operation deve ser upload, upload_post, download, metadados, listar, "
+                              "multipart_iniciar, multipart_partes, multipart_concluir ou multipart_abortar"}
@@ -0,0 +1,126 @@
+"""
+Validação barata do arquivo antes de qualquer chamada de rede.
+
+O tipo real é identificado pelos primeiros bytes (assinatura do formato), não
+pela extensão; arquivos corrompidos, de tipo não aceito ou com extensão que não
+bate com o conteúdo são recusados antes da URL assinada e do PUT. No corpo em
+base64 bastam os primeiros caracteres e o comprimento do texto, então a recusa
+acontece antes mesmo de decodificar o arquivo.
+
+Com UPLOAD_RECUSAR_TIPOS_DESCONHECIDOS=false, arquivos de formato não
+reconhecido voltam a ser aceitos com o Content-Type declarado (comportamento
+anterior); PDF, PNG, JPEG e GIF continuam precisando bater com a extensão.
+
+Limites de tamanho por tipo de documento vêm de UPLOAD_LIMITES_POR_TIPO (JSON,
+ex.: {"rg": 5242880, "comprovante_residencia": 10485760}); tipos sem limite
+próprio usam UPLOAD_TAMANHO_MAXIMO_BYTES.
+
+Micro-benchmark: python bench_validacao.py
+"""
+
+import os
+import re
+import json
+import binascii
+
+from ingestao import tem_espacos
+
+UPLOAD_TAMANHO_MAXIMO = int(os.environ.get('UPLOAD_TAMANHO_MAXIMO_BYTES', str(20 * 1024 * 1024)))
+UPLOAD_LIMITES_POR_TIPO = {
+    tipo: int(limite) for tipo, limite in json.loads(os.environ.get('UPLOAD_LIMITES_POR_TIPO') or '{}').items()
+}
+# 'true' (padrão): só PDF, PNG, JPEG e GIF; 'false': outros formatos passam (415 só na extensão trocada)
+UPLOAD_RECUSAR_TIPOS_DESCONHECIDOS = os.environ.get('UPLOAD_RECUSAR_TIPOS_DESCONHECIDOS', 'true').lower() == 'true'
+
+# (assinatura, content_type); todas cabem nos primeiros 8 bytes
+ASSINATURAS = (
+    (b'%PDF-', 'application/pdf'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+)
+_TIPOS_RECONHECIDOS = {content_type for _, content_type in ASSINATURAS}
+TAMANHO_CABECALHO = 8
+# Caracteres de base64 que decodificam os primeiros TAMANHO_CABECALHO bytes
+_CARACTERES_CABECALHO = (TAMANHO_CABECALHO + 2) // 3 * 4
+
+_ESPACOS = re.compile(r'\s+')
+
+
+class ArquivoRecusado(ValueError):
+    """O arquivo não passou na validação; `status` é o código HTTP da resposta."""
+
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+
+def detectar_tipo(cabecalho):
+    """Content-Type pela assinatura nos primeiros bytes, ou None se não reconhecida."""
+    cabecalho = bytes(cabecalho[:TAMANHO_CABECALHO])
+    for assinatura, content_type in ASSINATURAS:
+        if cabecalho.startswith(assinatura):
+            return content_type
+    return None
+
+
+def limite_para(document_type):
+    return UPLOAD_LIMITES_POR_TIPO.get(document_type, UPLOAD_TAMANHO_MAXIMO)
+
+
+def validar_tamanho(tamanho, document_type=None):
+    limite = limite_para(document_type)
+    if tamanho <= 0:
+        raise ArquivoRecusado(400, 'Arquivo vazio.')
+    if tamanho > limite:
+        tipo = f" para {document_type}" if document_type in UPLOAD_LIMITES_POR_TIPO else ''
+        raise ArquivoRecusado(413, f'Arquivo com {tamanho} bytes excede o limite de {limite} bytes{tipo}.')
+
+
+def validar(cabecalho, tamanho, content_type_declarado=None, document_type=None):
+    """
+    Confere tipo e tamanho do arquivo a partir dos primeiros bytes e do tamanho
+    total. Retorna o content_type detectado ou levanta ArquivoRecusado.
+
+    `content_type_declarado` (normalmente o da extensão do arquivo), se for de
+    um dos tipos reconhecidos, precisa bater com o conteúdo. Conteúdo de
+    formato não reconhecido é recusado, ou, com
+    UPLOAD_RECUSAR_TIPOS_DESCONHECIDOS=false, aceito com o tipo declarado.
+    """
+    validar_tamanho(tamanho, document_type)
+    detectado = detectar_tipo(cabecalho)
+    declarado = (content_type_declarado or '').split(';')[0].strip().lower()
+    if detectado is None:
+        if UPLOAD_RECUSAR_TIPOS_DESCONHECIDOS or declarado in _TIPOS_RECONHECIDOS:
+            raise ArquivoRecusado(415, 'Tipo de arquivo não aceito: envie PDF, PNG, JPEG ou GIF.')
+        return content_type_declarado or 'application/octet-stream'
+
+    if declarado in _TIPOS_RECONHECIDOS and declarado != detectado:
+        raise ArquivoRecusado(415, f'O conteúdo do arquivo é {detectado}, mas a extensão indica {declarado}.')
+    return detectado
+
+
+def validar_base64(texto, inicio=0, fim=None, content_type_declarado=None, document_type=None):
+    """
+    Igual a validar(), mas direto sobre o base64 em texto[inicio:fim]: decodifica
+    só o começo e calcula o tamanho pelo comprimento do texto.
+    """
+    fim = len(texto) if fim is None else fim
+    trecho = texto[inicio:min(fim, inicio + _CARACTERES_CABECALHO)]
+    final = texto[max(inicio, fim - 2):fim]
+    quantidade = fim - inicio
+    if tem_espacos(texto, inicio, fim):
+        # Raro (base64 com quebras de linha): conta sem os espaços
+        sem_espacos = _ESPACOS.sub('', texto[inicio:fim])
+        trecho, final = sem_espacos[:_CARACTERES_CABECALHO], sem_espacos[-2:]
+        quantidade = len(sem_espacos)
+
+    try:
+        cabecalho = binascii.a2b_base64(trecho[:len(trecho) // 4 * 4])
+    except (binascii.Error, ValueError):
+        raise ArquivoRecusado(400, 'file_content não é um base64 válido.')
+
+    preenchimento = len(final) - len(final.rstrip('='))
+    tamanho = quantidade // 4 * 3 - preenchimento if quantidade % 4 == 0 else quantidade * 3 // 4
+    return validar(cabecalho, tamanho, content_type_declarado, document_type)
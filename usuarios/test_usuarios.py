@@ -0,0 +1,58 @@
+"""
+Cada rota de escrita abaixo deve fazer um único comando SQL (um round trip
+até o RDS) e manter o corpo de resposta de antes.
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import carregar_lambda
+
+usuarios = carregar_lambda('usuarios')
+
+
+def test_criar_usuario_um_comando(invocar):
+    corpo = {'nome': 'Bruno', 'email': 'bruno@exemplo.com', 'empresa': 'acme', 'role': 'admin'}
+    resposta, conn = invocar(usuarios, 'POST', '/usuarios', corpo, [(7,)])
+
+    assert conn.comandos == 1
+    assert conn.commits == 1
+    assert resposta['statusCode'] == 201
+    assert json.loads(resposta['body']) == {
+        'id': 7, 'nome': 'Bruno', 'email': 'bruno@exemplo.com', 'role': 'admin', 'empresa': 'acme'
+    }
+    # Usuário, token e e-mail com o link no mesmo comando
+    sql = conn.executados[0][0]
+    assert 'INSERT INTO usuarios' in sql
+    assert 'INSERT INTO reset_tokens' in sql
+    assert 'INSERT INTO email_outbox' in sql
+
+
+@pytest.mark.parametrize('linhas, status, body', [
+    ([(datetime.utcnow() + timedelta(hours=1),)], 200, {'message': 'Senha criada com sucesso'}),
+    ([(datetime.utcnow() - timedelta(hours=1),)], 400, {'error': 'Token expirado'}),
+    ([], 400, {'error': 'Token inválido'}),
+], ids=['valido', 'expirado', 'desconhecido'])
+def test_criar_senha_um_comando(invocar, linhas, status, body):
+    corpo = {'token': 'abc', 'senha': 'segredo'}
+    resposta, conn = invocar(usuarios, 'POST', '/usuarios/7/senha', corpo, linhas)
+
+    assert conn.comandos == 1
+    assert resposta['statusCode'] == status
+    assert json.loads(resposta['body']) == body
+
+
+def test_deletar_usuario_um_comando(invocar):
+    resposta, conn = invocar(usuarios, 'DELETE', '/usuarios', {'id': 7}, [])
+
+    assert conn.comandos == 1
+    assert conn.commits == 1
+    assert resposta['statusCode'] == 200
+    assert json.loads(resposta['body']) == {'message': 'Usuário com id 7 deletado com sucesso.'}
+    # Tokens de senha e usuário no mesmo comando
+    sql, vars_ = conn.executados[0]
+    assert 'DELETE FROM reset_tokens' in sql
+    assert 'DELETE FROM usuarios' in sql
+    assert vars_ == (7, 7)